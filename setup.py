@@ -36,8 +36,8 @@ setup(
     license='Apache 2.0',
     description='Provides an interface to describe symmetry representations.',
     install_requires=[
-        'numpy', 'sympy', 'fsc.export', 'fsc.hdf5-io>=0.6', 'h5py', 'pymatgen',
-        'click>=7.0'
+        'numpy>=1.17', 'sympy', 'fsc.export', 'fsc.hdf5-io>=0.6', 'h5py',
+        'pymatgen', 'click>=7.0'
     ],
     python_requires=">=3.6",
     extras_require=EXTRAS_REQUIRE,
@@ -54,10 +54,14 @@ setup(
         'Development Status :: 4 - Beta'
     ],
     packages=find_packages(),
+    package_data={
+        'symmetry_representation':
+        ['data/*.npz', '_get_repr_matrix/data/*.hdf5']
+    },
     entry_points={
         'console_scripts':
         ['symmetry-repr = symmetry_representation._cli:cli'],
         'fsc.hdf5_io.load':
-        ['symmetry_representation = symmetry_representation']
+        ['symmetry_representation = symmetry_representation._get_repr_matrix']
     },
 )
@@ -10,11 +10,49 @@ A tool for describing symmetry operations and their representations.
 
 __version__ = '0.3.3'
 
+import sys
+
 from . import io
 from ._sym_op import *
-from ._compatibility import *
-from ._get_repr_matrix import *
+from ._block_matrix import *
+from ._profiling import *
+from ._cosets import *
+from ._lattice import *
+from ._space_groups import *
+from ._symmetrize import *
+from ._kpoint_mesh import *
+from ._group_tables import *
+from ._lazy_import import lazy_attribute_getter
+
+# These submodules depend on sympy, scipy or pymatgen, which are slow to
+# import. They are imported only when one of their attributes is accessed.
+_LAZY_ATTRIBUTES = {
+    '._compatibility': ['is_compatible', 'filter_compatible'],
+    '._get_repr_matrix': [
+        'Orbital',
+        'OrbitalBasis',
+        'Spin',
+        'WANNIER_ORBITALS',
+        'SPIN_UP',
+        'SPIN_DOWN',
+        'NO_SPIN',
+        'get_time_reversal',
+        'get_repr_matrix',
+        'iter_symmetry_operations',
+        'iter_block_repr_matrices',
+    ],
+}
+
+if sys.version_info < (3, 7):
+    # module-level '__getattr__' is supported only from Python 3.7
+    from ._compatibility import *
+    from ._get_repr_matrix import *
+else:
+    __getattr__ = lazy_attribute_getter(__name__, _LAZY_ATTRIBUTES)
 
 __all__ = [
     'io'
-] + _sym_op.__all__ + _compatibility.__all__ + _get_repr_matrix.__all__  # pylint: disable=undefined-variable
+] + _sym_op.__all__ + _block_matrix.__all__ + _profiling.__all__ + _cosets.__all__ + _lattice.__all__ + _space_groups.__all__ + _symmetrize.__all__ + _kpoint_mesh.__all__ + _group_tables.__all__ + [  # pylint: disable=undefined-variable
+    name
+    for attributes in _LAZY_ATTRIBUTES.values() for name in attributes
+]
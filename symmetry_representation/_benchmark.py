@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Defines the benchmark suite which is run by ``symmetry-repr bench``. Each
+benchmark case consists of a setup function, which creates the input data and
+returns the function to be timed. The results are collected into a
+JSON-serializable report, such that reports of different versions can be
+compared.
+"""
+
+import os
+import time
+import platform
+import tempfile
+import itertools
+import importlib
+from collections import namedtuple
+
+import numpy as np
+
+from . import __version__
+from . import io
+from ._sym_op import SymmetryGroup, SymmetryOperation, RealSpaceOperator
+
+BenchmarkCase = namedtuple('BenchmarkCase', ['name', 'params', 'setup'])
+
+# rotation by 90 degrees around the z-axis, which maps all WANNIER_ORBITALS
+# shells used in the benchmarks onto themselves
+_C4Z = np.array([[0, -1, 0], [1, 0, 0], [0, 0, 1]])
+
+
+def get_benchmark_cases(*, quick=False):
+    """
+    Returns the benchmark cases.
+
+    Arguments
+    ---------
+    quick : bool
+        If true, only small problem sizes are included.
+    """
+    cases = []
+    for shell, spin, numeric, num_sites in itertools.product([
+        's', 'p', 'd', 'f', 'sp2', 'sp3', 'sp3d2'
+    ], [False, True], [True, False], [1, 4] if quick else [1, 4, 16]):
+        if not numeric and (
+            num_sites > 4 or
+            (quick and (num_sites > 1 or shell in ['f', 'sp3d2']))
+        ):
+            # the analytic mode is too slow for large problems
+            continue
+        cases.append(
+            BenchmarkCase(
+                name='get_repr_matrix',
+                params=dict(
+                    shell=shell,
+                    spin=spin,
+                    numeric=numeric,
+                    num_sites=num_sites
+                ),
+                setup=_setup_get_repr_matrix
+            )
+        )
+    for supercell_size in [2, 4] if quick else [2, 4, 8, 16]:
+        cases.append(
+            BenchmarkCase(
+                name='positions_mapping',
+                params=dict(supercell_size=supercell_size),
+                setup=_setup_positions_mapping
+            )
+        )
+    for num_symmetries in [6, 24] if quick else [6, 24, 48]:
+        cases.append(
+            BenchmarkCase(
+                name='filter_compatible',
+                params=dict(num_symmetries=num_symmetries),
+                setup=_setup_filter_compatible
+            )
+        )
+    for file_format, repr_dim in itertools.product(
+        io.FILE_FORMATS, [8, 32] if quick else [8, 32, 128]
+    ):
+        for operation in ['save', 'load']:
+            cases.append(
+                BenchmarkCase(
+                    name='io_' + operation,
+                    params=dict(file_format=file_format, repr_dim=repr_dim),
+                    setup=_setup_io
+                )
+            )
+    return cases
+
+
+def run_benchmarks(*, name_filter=None, repeat=3, quick=False, callback=None):
+    """
+    Runs the benchmark cases and returns the report.
+
+    Arguments
+    ---------
+    name_filter : str, optional
+        If given, only the benchmarks whose name contains this string are run.
+    repeat : int
+        Number of times each benchmark is timed.
+    quick : bool
+        If true, only small problem sizes are included.
+    callback : Callable, optional
+        Function which is called with each benchmark result, e.g. for
+        displaying the progress.
+    """
+    results = []
+    for case in get_benchmark_cases(quick=quick):
+        if name_filter is not None and name_filter not in case.name:
+            continue
+        result = _run_case(case, repeat=repeat)
+        if callback is not None:
+            callback(result)
+        results.append(result)
+    return dict(
+        environment=_get_environment(), repeat=repeat, benchmarks=results
+    )
+
+
+def _run_case(case, *, repeat):
+    """
+    Runs a single benchmark case. Errors are recorded in the result instead of
+    being raised, such that benchmarks which are not supported by a version do
+    not abort the suite.
+    """
+    result = dict(name=case.name, params=case.params)
+    context = {}
+    try:
+        func = case.setup(context=context, name=case.name, **case.params)
+        times = []
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start_time)
+    except Exception as exc:  # pylint: disable=broad-except
+        result['error'] = '{}: {}'.format(type(exc).__name__, exc)
+        return result
+    finally:
+        if 'cleanup' in context:
+            context['cleanup']()
+    result.update(
+        times=times,
+        min=min(times),
+        median=float(np.median(times)),
+        **context.get('extra', {})
+    )
+    return result
+
+
+def _get_environment():
+    """
+    Returns the versions of the package, Python and the main dependencies.
+    """
+    res = dict(
+        symmetry_representation=__version__,
+        python=platform.python_version(),
+        platform=platform.platform(),
+    )
+    for module_name in ['numpy', 'scipy', 'sympy', 'h5py', 'pymatgen']:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            res[module_name] = None
+            continue
+        try:
+            res[module_name] = module.__version__
+        except AttributeError:
+            res[module_name] = _get_distribution_version(module_name)
+    return res
+
+
+def _get_distribution_version(distribution_name):
+    """
+    Returns the installed version of a distribution, for packages which do
+    not define '__version__'.
+    """
+    try:
+        import importlib.metadata  # pylint: disable=import-outside-toplevel
+        return importlib.metadata.version(distribution_name)
+    except ImportError:  # Python < 3.8
+        return 'unknown'
+
+
+def _setup_get_repr_matrix(*, context, name, shell, spin, numeric, num_sites):  # pylint: disable=unused-argument
+    """
+    Creates the representation matrix of a four-fold rotation, for orbitals
+    on sites along the rotation axis.
+    """
+    from ._get_repr_matrix import (  # pylint: disable=import-outside-toplevel
+        Orbital, WANNIER_ORBITALS, SPIN_UP, SPIN_DOWN, NO_SPIN, get_repr_matrix
+    )
+    orbitals = [
+        Orbital(
+            position=[0, 0, i / num_sites],
+            function_string=function_string,
+            spin=spin_value
+        ) for spin_value in ((SPIN_UP, SPIN_DOWN) if spin else (NO_SPIN, ))
+        for i in range(num_sites)
+        for function_string in WANNIER_ORBITALS[shell]
+    ]
+    context['extra'] = dict(num_orbitals=len(orbitals))
+    real_space_operator = RealSpaceOperator(rotation_matrix=_C4Z)
+
+    def func():
+        get_repr_matrix(
+            orbitals=orbitals,
+            real_space_operator=real_space_operator,
+            rotation_matrix_cartesian=_C4Z,
+            numeric=numeric
+        )
+
+    return func
+
+
+def _setup_positions_mapping(*, context, name, supercell_size):  # pylint: disable=unused-argument
+    """
+    Maps the positions of a body-centered cubic supercell under a four-fold
+    screw rotation.
+    """
+    from ._get_repr_matrix import Orbital  # pylint: disable=import-outside-toplevel
+    from ._get_repr_matrix._get_repr_matrix import _get_positions_mapping  # pylint: disable=import-outside-toplevel
+
+    cell_positions = np.array(
+        list(itertools.product(range(supercell_size), repeat=3))
+    )
+    positions = np.concatenate([cell_positions, cell_positions + 0.5]
+                               ) / supercell_size
+    orbitals = [
+        Orbital(position=position, function_string='1')
+        for position in positions
+    ]
+    context['extra'] = dict(num_positions=len(orbitals))
+    real_space_operator = RealSpaceOperator(
+        rotation_matrix=_C4Z, translation_vector=[0, 0, 1 / supercell_size]
+    )
+
+    def func():
+        _get_positions_mapping(
+            orbitals=orbitals,
+            real_space_operator=real_space_operator,
+            position_tolerance=1e-4
+        )
+
+    return func
+
+
+def _setup_filter_compatible(*, context, name, num_symmetries):  # pylint: disable=unused-argument
+    """
+    Filters the symmetries of a cubic group against a tetragonally strained
+    structure.
+    """
+    from pymatgen.core import Structure  # pylint: disable=import-outside-toplevel
+    from ._compatibility import filter_compatible  # pylint: disable=import-outside-toplevel
+
+    structure = Structure(
+        lattice=np.diag([1., 1., 1.1]), species=['Si'], coords=[[0, 0, 0]]
+    )
+    symmetry_group = SymmetryGroup(
+        symmetries=[
+            SymmetryOperation(rotation_matrix=rot, repr_matrix=np.eye(1))
+            for rot in _get_cubic_rotations()[:num_symmetries]
+        ],
+        full_group=False
+    )
+
+    def func():
+        filter_compatible(symmetry_group, structure=structure)
+
+    return func
+
+
+def _setup_io(*, context, name, file_format, repr_dim):
+    """
+    Saves or loads a numeric symmetry group with the 48 elements of the cubic
+    point group, and permutation-like representation matrices.
+    """
+    temp_dir = tempfile.TemporaryDirectory()
+    context['cleanup'] = temp_dir.cleanup
+    file_path = os.path.join(temp_dir.name, 'symmetries.hdf5')
+    random_state = np.random.RandomState(42)
+    symmetry_group = SymmetryGroup(
+        symmetries=[
+            SymmetryOperation(
+                rotation_matrix=rot,
+                repr_matrix=np.eye(repr_dim)[
+                    random_state.permutation(repr_dim)] * 1j
+            ) for rot in _get_cubic_rotations()
+        ],
+        full_group=True
+    )
+    io.save(symmetry_group, file_path, file_format=file_format)
+    context['extra'] = dict(size_bytes=os.path.getsize(file_path))
+    if name == 'io_save':
+        return lambda: io.save(
+            symmetry_group, file_path, file_format=file_format
+        )
+    return lambda: io.load(file_path)
+
+
+def _get_cubic_rotations():
+    """
+    Returns the 48 elements of the cubic point group, as signed permutation
+    matrices.
+    """
+    res = []
+    for permutation in itertools.permutations(range(3)):
+        for signs in itertools.product([1, -1], repeat=3):
+            rot = np.zeros((3, 3), dtype=int)
+            rot[range(3), permutation] = signs
+            res.append(rot)
+    # put the identity first, such that the smaller groups contain it
+    res.sort(key=lambda rot: not np.array_equal(rot, np.eye(3)))
+    return res
@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Defines the de-duplicated HDF5 format, where the representation matrices of a
+symmetry group are stored as references to a table of unique blocks, plus the
+row and column permutations.
+
+By default, each file contains its own table of unique blocks. Alternatively,
+the blocks can be stored in a shared block table file, such that blocks which
+repeat across files are stored only once. The symmetry group files then
+contain only the indices of their blocks in the shared table (and the hashes
+of the blocks, which are checked when loading). The shared table is only
+appended to, such that the indices remain valid. It must not be written by
+multiple processes at the same time.
+"""
+
+import os
+
+import h5py
+import numpy as np
+
+from ._sym_op import SymmetryGroup, PackedSymmetryGroup
+from ._block_matrix import BlockPermutationMatrix, BlockTable
+from ._packed_io import FORMAT_KEY, has_format
+
+FORMAT_NAME = 'block_symmetry_group'
+FORMAT_VERSION = 1
+TABLE_FORMAT_NAME = 'block_table'
+TABLE_FORMAT_VERSION = 1
+
+
+def is_block_format(hdf5_handle):
+    """
+    Checks whether the given HDF5 location contains a symmetry group in the
+    de-duplicated block format.
+    """
+    return has_format(hdf5_handle, FORMAT_NAME)
+
+
+def encode(obj, hdf5_handle, *, decimals=12, block_table_path=None):
+    """
+    Write a symmetry group to the given HDF5 location, in de-duplicated block
+    format. If ``block_table_path`` is given, the blocks are stored in the shared
+    block table file of that path, and the path relative to the directory of
+    the symmetry group file is stored as a reference.
+    """
+    if not isinstance(obj, SymmetryGroup):
+        raise TypeError(
+            "Only symmetry groups can be saved in block format, got object of type '{}'."
+            .format(type(obj))
+        )
+    packed_group = PackedSymmetryGroup.from_symmetry_group(obj)
+    if not packed_group.numeric:
+        raise ValueError(
+            "Analytic symmetry groups cannot be saved in block format, use the 'packed' format instead."
+        )
+    block_table = BlockTable()
+    block_matrices = []
+    block_ids = []
+    for matrix in packed_group.repr_matrices:
+        if isinstance(matrix, BlockPermutationMatrix):
+            # the blocks are added to the table, and the references updated
+            # accordingly
+            block_ids.append(
+                np.array([
+                    block_table.add(matrix.blocks[block_id])
+                    for block_id in matrix.block_ids
+                ],
+                         dtype=int)
+            )
+        else:
+            matrix = BlockPermutationMatrix.from_dense(
+                matrix, decimals=decimals, block_table=block_table
+            )
+            block_ids.append(matrix.block_ids)
+        block_matrices.append(matrix)
+
+    hdf5_handle.attrs[FORMAT_KEY] = FORMAT_NAME
+    hdf5_handle.attrs['format_version'] = FORMAT_VERSION
+    hdf5_handle.attrs['full_group'] = bool(packed_group.full_group)
+    for key in ['rotation_matrices', 'translation_vectors', 'repr_has_cc']:
+        hdf5_handle[key] = getattr(packed_group, key)
+
+    hdf5_handle['block_hashes'] = np.array(block_table.hashes, dtype='S40')
+    if block_table_path is None:
+        hdf5_handle['block_shapes'] = np.array([
+            block.shape for block in block_table.blocks
+        ],
+                                               dtype=np.int64).reshape(-1, 2)
+        hdf5_handle['block_data'] = np.concatenate(
+            [block.flatten()
+             for block in block_table.blocks] + [np.zeros(0, dtype=complex)]
+        )
+    else:
+        with h5py.File(block_table_path, 'a') as table_handle:
+            hdf5_handle['shared_block_ids'] = _add_to_shared_table(
+                table_handle, block_table=block_table
+            )
+        hdf5_handle.attrs['block_table'] = os.path.relpath(
+            os.path.abspath(block_table_path),
+            os.path.dirname(os.path.abspath(hdf5_handle.file.filename))
+        )
+    hdf5_handle['segment_offsets'] = np.concatenate(
+        [[0], np.cumsum([len(ids) for ids in block_ids])]
+    ).astype(np.int64)
+    hdf5_handle['segment_block_ids'] = np.concatenate(
+        block_ids + [np.zeros(0, dtype=int)]
+    ).astype(np.int64)
+    hdf5_handle['row_indices'] = np.array([
+        matrix.row_indices for matrix in block_matrices
+    ],
+                                          dtype=np.int64)
+    hdf5_handle['col_indices'] = np.array([
+        matrix.col_indices for matrix in block_matrices
+    ],
+                                          dtype=np.int64)
+
+
+def decode(hdf5_handle, *, dense=True, file_path=None):
+    """
+    Construct the packed symmetry group stored at the given HDF5 location. If
+    ``dense`` is false, the representation matrices are given as
+    :class:`.BlockPermutationMatrix`. The ``file_path`` of the symmetry group
+    file is needed to locate a shared block table.
+    """
+    format_version = hdf5_handle.attrs['format_version']
+    if format_version > FORMAT_VERSION:
+        raise ValueError(
+            'Block format version {} is not supported, the latest supported version is {}.'
+            .format(format_version, FORMAT_VERSION)
+        )
+    if 'block_table' in hdf5_handle.attrs:
+        if file_path is None:
+            raise ValueError(
+                'The path of the symmetry group file is needed to locate its shared block table.'
+            )
+        table_path = os.path.join(
+            os.path.dirname(os.path.abspath(file_path)),
+            hdf5_handle.attrs['block_table']
+        )
+        with h5py.File(table_path, 'r') as table_handle:
+            blocks = _read_from_shared_table(
+                table_handle,
+                block_ids=np.array(hdf5_handle['shared_block_ids']),
+                block_hashes=np.array(hdf5_handle['block_hashes'])
+            )
+    else:
+        blocks = _read_blocks(
+            block_shapes=np.array(hdf5_handle['block_shapes']),
+            block_data=np.array(hdf5_handle['block_data'])
+        )
+    segment_offsets = np.array(hdf5_handle['segment_offsets'])
+    segment_block_ids = np.array(hdf5_handle['segment_block_ids'])
+    repr_matrices = [
+        BlockPermutationMatrix(
+            blocks=blocks,
+            block_ids=segment_block_ids[start:end],
+            row_indices=row_indices,
+            col_indices=col_indices
+        ) for start, end, row_indices, col_indices in zip(
+            segment_offsets[:-1], segment_offsets[1:],
+            np.array(hdf5_handle['row_indices']),
+            np.array(hdf5_handle['col_indices'])
+        )
+    ]
+    if dense:
+        repr_matrices = np.array([
+            matrix.to_dense() for matrix in repr_matrices
+        ])
+    return PackedSymmetryGroup(
+        rotation_matrices=np.array(hdf5_handle['rotation_matrices']),
+        translation_vectors=np.array(hdf5_handle['translation_vectors']),
+        repr_matrices=repr_matrices,
+        repr_has_cc=np.array(hdf5_handle['repr_has_cc']),
+        full_group=bool(hdf5_handle.attrs['full_group'])
+    )
+
+
+def _read_blocks(*, block_shapes, block_data):
+    """
+    Split the concatenated block data into the blocks of the given shapes.
+    """
+    block_offsets = np.concatenate([[0],
+                                    np.cumsum(np.prod(block_shapes, axis=1))])
+    return [
+        block_data[start:end].reshape(shape) for start, end, shape in
+        zip(block_offsets[:-1], block_offsets[1:], block_shapes)
+    ]
+
+
+def _add_to_shared_table(table_handle, *, block_table):
+    """
+    Append the blocks which are not yet contained to the shared block table
+    file, and return the indices of all given blocks in the shared table.
+    """
+    if FORMAT_KEY not in table_handle.attrs:
+        table_handle.attrs[FORMAT_KEY] = TABLE_FORMAT_NAME
+        table_handle.attrs['format_version'] = TABLE_FORMAT_VERSION
+        table_handle.create_dataset(
+            'block_shapes', (0, 2), maxshape=(None, 2), dtype=np.int64
+        )
+        table_handle.create_dataset(
+            'block_data', (0, ), maxshape=(None, ), dtype=complex
+        )
+        table_handle.create_dataset(
+            'block_hashes', (0, ), maxshape=(None, ), dtype='S40'
+        )
+    _check_shared_table(table_handle)
+    indices = {
+        block_hash.decode('utf-8'): i
+        for i, block_hash in enumerate(table_handle['block_hashes'])
+    }
+    new_blocks = []
+    res = []
+    for block, block_hash in zip(block_table.blocks, block_table.hashes):
+        if block_hash not in indices:
+            indices[block_hash] = len(indices)
+            new_blocks.append((block, block_hash))
+        res.append(indices[block_hash])
+    if new_blocks:
+        new_data = np.concatenate([block.flatten() for block, _ in new_blocks])
+        for key, values in [
+            ('block_shapes', [block.shape for block, _ in new_blocks]),
+            ('block_hashes', [block_hash for _, block_hash in new_blocks]),
+            ('block_data', new_data),
+        ]:
+            dataset = table_handle[key]
+            values = np.array(values, dtype=dataset.dtype)
+            dataset.resize(len(dataset) + len(values), axis=0)
+            dataset[-len(values):] = values
+    return np.array(res, dtype=np.int64)
+
+
+def _read_from_shared_table(table_handle, *, block_ids, block_hashes):
+    """
+    Read the blocks with the given indices from the shared block table file,
+    and check that their hashes match.
+    """
+    _check_shared_table(table_handle)
+    if len(block_ids) == 0:
+        return []
+    if not np.all(
+        np.array(table_handle['block_hashes'])[block_ids] == block_hashes
+    ):
+        raise ValueError(
+            'The blocks in the shared block table do not match the symmetry group file.'
+        )
+    block_shapes = np.array(table_handle['block_shapes'])
+    block_offsets = np.concatenate([[0],
+                                    np.cumsum(np.prod(block_shapes, axis=1))])
+    block_data = table_handle['block_data']
+    return [
+        block_data[block_offsets[i]:block_offsets[i +
+                                                  1]].reshape(block_shapes[i])
+        for i in block_ids
+    ]
+
+
+def _check_shared_table(table_handle):
+    """
+    Checks that the given HDF5 file is a shared block table of a supported
+    version.
+    """
+    if not has_format(table_handle, TABLE_FORMAT_NAME):
+        raise ValueError('The file is not a shared block table.')
+    format_version = table_handle.attrs['format_version']
+    if format_version > TABLE_FORMAT_VERSION:
+        raise ValueError(
+            'Block table format version {} is not supported, the latest supported version is {}.'
+            .format(format_version, TABLE_FORMAT_VERSION)
+        )
@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Defines matrices composed of dense blocks which are placed at permuted rows
+and columns.
+"""
+
+import hashlib
+
+import numpy as np
+from fsc.export import export
+
+
+@export
+class BlockPermutationMatrix:
+    """
+    Describes a square matrix which is composed of dense blocks, placed at
+    permuted rows and columns. Blocks which are the same for different parts of
+    the matrix are stored only once. Each row and column belongs to exactly
+    one block.
+
+    The matrix can be applied to vectors and matrices (with ``@``, from
+    either side) without creating the dense matrix, with a cost which is
+    linear in its size.
+
+    Arguments
+    ---------
+    blocks : List[array]
+        The unique blocks.
+    block_ids : array
+        For each block of the matrix, the index of the corresponding unique
+        block.
+    row_indices : array
+        Concatenated row indices of the blocks, in the order given by the
+        ``block_ids``.
+    col_indices : array
+        Concatenated column indices of the blocks, in the order given by the
+        ``block_ids``.
+    """
+    def __init__(self, *, blocks, block_ids, row_indices, col_indices):
+        self.blocks = [np.asarray(block) for block in blocks]
+        self.block_ids = np.asarray(block_ids, dtype=int)
+        self.row_indices = np.asarray(row_indices, dtype=int)
+        self.col_indices = np.asarray(col_indices, dtype=int)
+        if len(self.row_indices) != len(self.col_indices):
+            raise ValueError(
+                'The number of row and column indices must be the same.'
+            )
+        block_shapes = np.array([self.blocks[i].shape for i in self.block_ids],
+                                dtype=int).reshape(-1, 2)
+        self._row_offsets = np.concatenate([[0],
+                                            np.cumsum(block_shapes[:, 0])])
+        self._col_offsets = np.concatenate([[0],
+                                            np.cumsum(block_shapes[:, 1])])
+        if (
+            self._row_offsets[-1] != len(self.row_indices)
+            or self._col_offsets[-1] != len(self.col_indices)
+        ):
+            raise ValueError(
+                'The number of row and column indices does not match the block shapes.'
+            )
+        self._block_groups = None
+
+    # the matrix is applied to arrays with '__rmatmul__', instead of being
+    # converted to a dense array by numpy
+    __array_ufunc__ = None
+
+    @classmethod
+    def from_dense(cls, matrix, *, decimals=12, block_table=None):
+        """
+        Decompose a dense matrix into its blocks, which are the connected
+        components of its non-zero entries.
+
+        Arguments
+        ---------
+        matrix : array
+            The dense (square) matrix.
+        decimals : int
+            Number of decimals to which the matrix entries are rounded. Entries
+            which are zero after rounding are not part of the blocks.
+        block_table : BlockTable, optional
+            Table of unique blocks which is used (and extended) for
+            de-duplicating the blocks. If not given, the blocks are
+            de-duplicated only within the given matrix.
+        """
+        # scipy is imported here because it is slow to import
+        from scipy.sparse import coo_matrix  # pylint: disable=import-outside-toplevel
+        from scipy.sparse.csgraph import connected_components  # pylint: disable=import-outside-toplevel
+
+        matrix = _round_complex(np.asarray(matrix), decimals=decimals)
+        size = matrix.shape[0]
+        if block_table is None:
+            block_table = BlockTable()
+        rows, cols = np.nonzero(matrix)
+        graph = coo_matrix((np.ones(len(rows)), (rows, cols + size)),
+                           shape=(2 * size, 2 * size))
+        _, labels = connected_components(graph, directed=False)
+        row_labels = labels[:size]
+        col_labels = labels[size:]
+        # order the blocks by their first row
+        _, first_rows = np.unique(row_labels, return_index=True)
+        block_labels = row_labels[np.sort(first_rows)]
+
+        block_ids = []
+        row_indices = []
+        col_indices = []
+        for label in block_labels:
+            block_rows = np.flatnonzero(row_labels == label)
+            block_cols = np.flatnonzero(col_labels == label)
+            block_ids.append(
+                block_table.add(matrix[np.ix_(block_rows, block_cols)])
+            )
+            row_indices.append(block_rows)
+            col_indices.append(block_cols)
+        return cls(
+            blocks=block_table.blocks,
+            block_ids=block_ids,
+            row_indices=np.concatenate(row_indices),
+            col_indices=np.concatenate(col_indices)
+        )
+
+    @property
+    def shape(self):
+        return (len(self.row_indices), len(self.col_indices))
+
+    def iter_blocks(self):
+        """
+        Iterate over the blocks of the matrix, yielding the block and its row
+        and column indices.
+        """
+        for i, block_id in enumerate(self.block_ids):
+            yield (
+                self.blocks[block_id],
+                self.row_indices[self._row_offsets[i]:self._row_offsets[i +
+                                                                        1]],
+                self.col_indices[self._col_offsets[i]:self._col_offsets[i + 1]]
+            )
+
+    def _get_block_groups(self):
+        """
+        Returns the row and column indices of the blocks, stacked for each
+        unique block.
+        """
+        if self._block_groups is None:
+            self._block_groups = []
+            for block_id in np.unique(self.block_ids):
+                positions = np.flatnonzero(self.block_ids == block_id)
+                num_rows, num_cols = self.blocks[block_id].shape
+                self._block_groups.append((
+                    self.blocks[block_id],
+                    self.row_indices[self._row_offsets[positions][:,
+                                                                  np.newaxis] +
+                                     np.arange(num_rows)],
+                    self.col_indices[self._col_offsets[positions][:,
+                                                                  np.newaxis] +
+                                     np.arange(num_cols)]
+                ))
+        return self._block_groups
+
+    def __matmul__(self, other):
+        """
+        Applies the matrix to a vector or (the rows of) a matrix.
+        """
+        other = np.asarray(other)
+        if other.shape[0] != self.shape[1]:
+            raise ValueError(
+                'Cannot multiply matrix of shape {} with array of shape {}.'.
+                format(self.shape, other.shape)
+            )
+        res = np.zeros((self.shape[0], ) + other.shape[1:],
+                       dtype=np.result_type(complex, other))
+        for block, rows, cols in self._get_block_groups():
+            res[rows] = np.einsum('ij,kj...->ki...', block, other[cols])
+        return res
+
+    def __rmatmul__(self, other):
+        """
+        Applies the matrix from the right to a vector or (the columns of) a
+        matrix.
+        """
+        other = np.asarray(other)
+        return np.swapaxes(self.transpose() @ np.swapaxes(other, 0, -1), 0, -1)
+
+    def transpose(self):
+        """
+        Returns the transposed matrix.
+        """
+        return BlockPermutationMatrix(
+            blocks=[block.T for block in self.blocks],
+            block_ids=self.block_ids,
+            row_indices=self.col_indices,
+            col_indices=self.row_indices
+        )
+
+    def conj(self):
+        """
+        Returns the complex conjugate matrix.
+        """
+        return BlockPermutationMatrix(
+            blocks=[block.conj() for block in self.blocks],
+            block_ids=self.block_ids,
+            row_indices=self.row_indices,
+            col_indices=self.col_indices
+        )
+
+    def trace(self):
+        """
+        Returns the trace of the matrix, which is calculated block-wise from
+        the block entries whose row and column index coincide.
+        """
+        res = 0j
+        for block, rows, cols in self._get_block_groups():
+            res += np.sum(
+                block * (rows[:, :, np.newaxis] == cols[:, np.newaxis, :])
+            )
+        return res
+
+    def to_dense(self):
+        """
+        Convert to a dense matrix.
+        """
+        dtype = np.result_type(*self.blocks) if self.blocks else complex
+        res = np.zeros(self.shape, dtype=dtype)
+        for block, rows, cols in self.iter_blocks():
+            res[np.ix_(rows, cols)] = block
+        return res
+
+    def __array__(self, dtype=None, copy=None):  # pylint: disable=unused-argument
+        res = self.to_dense()
+        if dtype is not None:
+            res = res.astype(dtype)
+        return res
+
+
+@export
+class BlockTable:
+    """
+    Table of unique blocks, addressed by the hash of their content.
+    """
+    def __init__(self):
+        self.blocks = []
+        self.hashes = []
+        self._indices = {}
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def add(self, block):
+        """
+        Add a block to the table (if it is not already present), and return its
+        index.
+        """
+        block = np.ascontiguousarray(block)
+        block_hash = get_block_hash(block)
+        try:
+            return self._indices[block_hash]
+        except KeyError:
+            index = len(self.blocks)
+            self._indices[block_hash] = index
+            self.blocks.append(block)
+            self.hashes.append(block_hash)
+            return index
+
+
+def get_block_hash(block):
+    """
+    Calculate the hash identifying the content of a block.
+    """
+    block = np.ascontiguousarray(block, dtype=complex)
+    sha = hashlib.sha1()
+    sha.update(np.array(block.shape, dtype=np.int64).tobytes())
+    sha.update(block.tobytes())
+    return sha.hexdigest()
+
+
+def _round_complex(matrix, *, decimals):
+    """
+    Round the real and imaginary parts of a matrix, removing negative zeros
+    such that equal blocks have equal binary content.
+    """
+    res = np.empty(matrix.shape, dtype=complex)
+    res.real = np.round(matrix.real, decimals) + 0.
+    res.imag = np.round(matrix.imag, decimals) + 0.
+    return res
@@ -6,16 +6,36 @@
 Defines the command-line tool ``symmetry-repr``.
 """
 
+import os
+import json
+import time
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
 import click
-import pymatgen as mg
+import numpy as np
 
 from . import io
-from . import filter_compatible
+from . import SymmetryGroup, SymmetryOperation, Profiler
 
 
 @click.group()
-def cli():
-    pass
+@click.option(
+    '--profile',
+    is_flag=True,
+    help='Show the time spent in the phases of the command when it finishes. '
+    'Work done in worker processes is not included.'
+)
+@click.pass_context
+def cli(ctx, profile):
+    if profile:
+        profiler = Profiler()
+        # the report is shown after the profiler is exited, because the
+        # callbacks are called in reverse order
+        ctx.call_on_close(
+            lambda: click.echo('\n' + profiler.format_report(), err=True)
+        )
+        ctx.with_resource(profiler)
 
 
 @cli.command(
@@ -46,6 +66,10 @@ def filter_symmetries(symmetries, lattice, output):
     """
     Selects symmetries which are compatible with the given lattice.
     """
+    # pymatgen is slow to import, and not needed by the other commands
+    import pymatgen as mg  # pylint: disable=import-outside-toplevel
+    from . import filter_compatible  # pylint: disable=import-outside-toplevel
+
     click.echo(
         "Loading initial symmetries from file '{}'...".format(symmetries)
     )
@@ -57,3 +81,444 @@ def filter_symmetries(symmetries, lattice, output):
     click.echo("Saving filtered symmetries to file '{}'...".format(output))
     io.save(filtered_symmetries, output)
     click.echo("Done!")
+
+
+@cli.command(
+    short_help='Convert symmetry files to the current or packed format.'
+)
+@click.argument(
+    'inputs', nargs=-1, required=True, type=click.Path(exists=True)
+)
+@click.option(
+    '--output-dir',
+    '-o',
+    type=click.Path(file_okay=False),
+    required=True,
+    help='Directory where the converted files are written.'
+)
+@click.option(
+    '--format',
+    'file_format',
+    type=click.Choice(io.FILE_FORMATS),
+    default='hdf5',
+    help='Format of the converted files.'
+)
+@click.option(
+    '--jobs',
+    '-j',
+    type=click.IntRange(min=1),
+    default=1,
+    help='Number of files which are converted in parallel.'
+)
+@click.option(
+    '--block-table',
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Shared block table file for the 'blocks' format, which stores the "
+    "blocks repeating across the converted files only once."
+)
+def migrate(inputs, output_dir, file_format, jobs, block_table):
+    """
+    Converts symmetry files (or directories containing them) from any readable
+    format to the given format. The relative paths inside input directories are
+    kept. Objects which are not symmetry groups are always written in the
+    'hdf5' format.
+    """
+    if block_table is not None:
+        if file_format != 'blocks':
+            raise click.UsageError(
+                "The '--block-table' option requires the 'blocks' format."
+            )
+        if jobs > 1:
+            raise click.UsageError(
+                "The shared block table cannot be written by multiple jobs."
+            )
+    tasks = [(
+        source, os.path.join(output_dir,
+                             relative_path), file_format, block_table
+    ) for source, relative_path in _get_migrate_sources(inputs)]
+    click.echo(
+        "Converting {} file(s) to '{}' format...".format(
+            len(tasks), file_format
+        )
+    )
+    start_time = time.perf_counter()
+    num_bytes = 0
+    num_failed = 0
+    with contextlib.ExitStack() as stack:
+        if jobs > 1:
+            map_function = stack.enter_context(
+                ProcessPoolExecutor(max_workers=jobs)
+            ).map
+        else:
+            # avoid the overhead of starting a worker process
+            map_function = map
+        for (source, _, _,
+             _), (size,
+                  error) in zip(tasks, map_function(_migrate_file, tasks)):
+            if error is None:
+                num_bytes += size
+            else:
+                num_failed += 1
+                click.echo(
+                    "Failed to convert '{}': {}".format(source, error),
+                    err=True
+                )
+    duration = max(time.perf_counter() - start_time, 1e-9)
+    num_converted = len(tasks) - num_failed
+    click.echo(
+        'Converted {} file(s) ({:.2f} MB) in {:.2f} s: {:.1f} files/s, {:.2f} MB/s.'
+        .format(
+            num_converted, num_bytes / 1e6, duration, num_converted / duration,
+            num_bytes / 1e6 / duration
+        )
+    )
+    if num_failed:
+        raise click.ClickException(
+            '{} file(s) could not be converted.'.format(num_failed)
+        )
+
+
+@cli.command(short_help='Run the benchmark suite.')
+@click.option(
+    '--filter',
+    '-k',
+    'name_filter',
+    default=None,
+    help='Run only the benchmarks whose name contains the given string.'
+)
+@click.option(
+    '--repeat',
+    '-r',
+    type=click.IntRange(min=1),
+    default=3,
+    help='Number of times each benchmark is timed.'
+)
+@click.option(
+    '--quick', is_flag=True, help='Run only the small problem sizes.'
+)
+@click.option(
+    '--output',
+    '-o',
+    type=click.File('w'),
+    default='-',
+    help='Output file for the JSON report (default: standard output).'
+)
+def bench(name_filter, repeat, quick, output):
+    """
+    Runs the built-in benchmarks, and writes a JSON report which can be
+    compared between versions. The progress is shown on standard error.
+    """
+    from . import _benchmark  # pylint: disable=import-outside-toplevel
+
+    def _show_progress(result):
+        if 'error' in result:
+            summary = 'failed ({})'.format(result['error'])
+        else:
+            summary = '{:.4g} s'.format(result['min'])
+        click.echo(
+            '{} {}: {}'.format(
+                result['name'], json.dumps(result['params'], sort_keys=True),
+                summary
+            ),
+            err=True
+        )
+
+    report = _benchmark.run_benchmarks(
+        name_filter=name_filter,
+        repeat=repeat,
+        quick=quick,
+        callback=_show_progress
+    )
+    json.dump(report, output, indent=2, sort_keys=True)
+    output.write('\n')
+
+
+def _parse_orbital_specs(ctx, param, value):  # pylint: disable=unused-argument
+    """
+    Parses orbital specifications of the form 'SITE:SHELL,SHELL,...', where
+    SITE is either a species name or a site index.
+    """
+    from . import WANNIER_ORBITALS  # pylint: disable=import-outside-toplevel
+
+    res = []
+    for spec in value:
+        site, sep, shells = spec.partition(':')
+        shells = [
+            shell.strip() for shell in shells.split(',') if shell.strip()
+        ]
+        if not sep or not site.strip() or not shells:
+            raise click.BadParameter(
+                "Invalid orbital specification '{}', must be of the form 'SITE:SHELL,SHELL,...'."
+                .format(spec)
+            )
+        for shell in shells:
+            if shell not in WANNIER_ORBITALS:
+                raise click.BadParameter(
+                    "Unknown orbital shell '{}', must be one of {}.".format(
+                        shell, sorted(WANNIER_ORBITALS)
+                    )
+                )
+        res.append((site.strip(), shells))
+    return res
+
+
+@cli.command(
+    short_help='Create the symmetry group for a structure and orbital basis.'
+)
+@click.argument('structure', type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    '--orbitals',
+    '-b',
+    'orbital_specs',
+    multiple=True,
+    required=True,
+    callback=_parse_orbital_specs,
+    help="Orbitals of the basis, in the form 'SITE:SHELL,SHELL,...', where "
+    "SITE is a species name or site index (starting from 0), and SHELL is a "
+    "key of 'WANNIER_ORBITALS'. Can be given multiple times."
+)
+@click.option(
+    '--spin/--no-spin',
+    default=False,
+    help='Include both spin up and spin down orbitals.'
+)
+@click.option(
+    '--numeric/--analytic',
+    default=True,
+    help='Create numeric (numpy) or analytic (sympy) representation matrices.'
+)
+@click.option(
+    '--output',
+    '-o',
+    type=click.Path(dir_okay=False),
+    default='symmetries.hdf5',
+    help='Output file for the symmetry group.'
+)
+@click.option(
+    '--format',
+    'file_format',
+    type=click.Choice(io.FILE_FORMATS),
+    default='hdf5',
+    help='Format of the output file.'
+)
+@click.option(
+    '--symprec',
+    type=float,
+    default=0.01,
+    help='Tolerance used for determining the symmetries of the structure.'
+)
+@click.option(
+    '--jobs',
+    '-j',
+    type=click.IntRange(min=1),
+    default=1,
+    help='Number of processes which create the symmetry operations in parallel.'
+)
+def generate(
+    structure, orbital_specs, spin, numeric, output, file_format, symprec, jobs
+):
+    """
+    Creates the full symmetry group of a structure, with representation
+    matrices for the given orbitals. The orbitals are ordered by spin (if
+    enabled), then by site, and then as given by 'WANNIER_ORBITALS'.
+    """
+    from pymatgen.core import Structure  # pylint: disable=import-outside-toplevel
+
+    click.echo("Loading structure from file '{}'...".format(structure))
+    structure = Structure.from_file(structure)
+    orbitals = _get_orbitals(structure, orbital_specs, spin=spin)
+    real_space_operators = _get_structure_symmetries(
+        structure, symprec=symprec
+    )
+    num_symmetries = len(real_space_operators)
+    click.echo(
+        'Creating {} symmetry operation(s) for {} orbital(s)...'.format(
+            num_symmetries, len(orbitals)
+        )
+    )
+    # several chunks per process, to balance the load
+    chunk_size = max(1, -(-num_symmetries // (4 * jobs)))
+    # the symmetry classes cannot be pickled, so plain data is sent to the
+    # worker processes
+    operator_data = [(op.rotation_matrix, op.translation_vector)
+                     for op in real_space_operators]
+    lattice = structure.lattice.matrix
+    tasks = [(orbitals, operator_data[i:i + chunk_size], lattice, numeric)
+             for i in range(0, num_symmetries, chunk_size)]
+
+    # numeric operations in packed format are written as they are created
+    stream = numeric and file_format == 'packed'
+    start_time = time.perf_counter()
+    symmetries = []
+    with contextlib.ExitStack() as stack:
+        if jobs > 1:
+            map_function = stack.enter_context(
+                ProcessPoolExecutor(max_workers=jobs)
+            ).map
+        else:
+            # avoid the overhead of starting a worker process
+            map_function = map
+        if stream:
+            writer = stack.enter_context(
+                io.SymmetryGroupWriter(output, full_group=True)
+            )
+        progress = stack.enter_context(
+            click.progressbar(
+                length=num_symmetries, label='Symmetry operations'
+            )
+        )
+        for chunk_data in map_function(_create_symmetry_operations, tasks):
+            chunk = [
+                SymmetryOperation(
+                    rotation_matrix=rotation_matrix,
+                    translation_vector=translation_vector,
+                    repr_matrix=repr_matrix,
+                    repr_has_cc=repr_has_cc,
+                    numeric=numeric
+                ) for rotation_matrix, translation_vector, repr_matrix,
+                repr_has_cc in chunk_data
+            ]
+            if stream:
+                writer.extend(chunk)
+            else:
+                symmetries.extend(chunk)
+            progress.update(len(chunk))
+    duration = max(time.perf_counter() - start_time, 1e-9)
+    if not stream:
+        io.save(
+            SymmetryGroup(symmetries=symmetries, full_group=True),
+            output,
+            file_format=file_format
+        )
+    click.echo(
+        "Created {} symmetry operation(s) in {:.2f} s ({:.1f} operations/s), saved to '{}'."
+        .format(num_symmetries, duration, num_symmetries / duration, output)
+    )
+
+
+def _get_orbitals(structure, orbital_specs, *, spin):
+    """
+    Creates the basis orbitals from the parsed orbital specifications.
+    """
+    from . import OrbitalBasis  # pylint: disable=import-outside-toplevel
+
+    site_shells = {}
+    for site_key, shells in orbital_specs:
+        try:
+            site_indices = [int(site_key)]
+        except ValueError:
+            site_indices = [
+                i for i, site in enumerate(structure)
+                if site.species_string == site_key
+            ]
+        if not site_indices or not all(
+            0 <= i < len(structure) for i in site_indices
+        ):
+            raise click.ClickException(
+                "No site matches the orbital specification '{}'.".
+                format(site_key)
+            )
+        for i in site_indices:
+            site_shells.setdefault(i, []).extend(shells)
+    return OrbitalBasis.from_structure(structure, site_shells, spin=spin)
+
+
+def _get_structure_symmetries(structure, *, symprec):
+    """
+    Returns the real-space operators of the symmetries of a structure, in
+    reduced coordinates.
+    """
+    from pymatgen.symmetry.analyzer import SpacegroupAnalyzer  # pylint: disable=import-outside-toplevel
+    from . import RealSpaceOperator  # pylint: disable=import-outside-toplevel
+
+    analyzer = SpacegroupAnalyzer(structure, symprec=symprec)
+    return [
+        RealSpaceOperator.from_pymatgen(sym_reduced)
+        for sym_reduced in analyzer.get_symmetry_operations(cartesian=False)
+    ]
+
+
+def _create_symmetry_operations(task):
+    """
+    Creates the symmetry operations for a chunk of real-space operators,
+    returning their rotation matrix, translation vector, representation matrix
+    and complex conjugation flag.
+    """
+    from . import iter_symmetry_operations  # pylint: disable=import-outside-toplevel
+
+    orbitals, operator_data, lattice, numeric = task
+    symmetry_operations = iter_symmetry_operations(
+        orbitals=orbitals,
+        real_space_operators=[
+            _get_real_space_operator(
+                rotation_matrix, translation_vector, numeric=numeric
+            ) for rotation_matrix, translation_vector in operator_data
+        ],
+        lattice=lattice,
+        numeric=numeric
+    )
+    return [(
+        op.rotation_matrix, op.translation_vector, op.repr.matrix,
+        op.repr.has_cc
+    ) for op in symmetry_operations]
+
+
+def _get_real_space_operator(rotation_matrix, translation_vector, *, numeric):
+    """
+    Creates a real-space operator from the (float) arrays determined by
+    pymatgen. In the analytic case, the rotation matrix is converted to
+    integers and the translation vector to rational numbers, such that the
+    operator is exact.
+    """
+    from . import RealSpaceOperator  # pylint: disable=import-outside-toplevel
+
+    if numeric:
+        return RealSpaceOperator(
+            rotation_matrix=rotation_matrix,
+            translation_vector=translation_vector
+        )
+    # sympy is imported here because it is slow to import
+    import sympy as sp  # pylint: disable=import-outside-toplevel
+    return RealSpaceOperator(
+        rotation_matrix=sp.Matrix(np.round(rotation_matrix).astype(int)),
+        translation_vector=sp.Matrix([
+            sp.nsimplify(value, rational=True, tolerance=1e-5)
+            for value in np.array(translation_vector).reshape(-1)
+        ]),
+        numeric=False
+    )
+
+
+def _get_migrate_sources(inputs):
+    """
+    Returns the files to be converted, together with their path relative to the
+    output directory.
+    """
+    for input_path in inputs:
+        if os.path.isdir(input_path):
+            for dirpath, _, filenames in os.walk(input_path):
+                for filename in sorted(filenames):
+                    if os.path.splitext(filename)[1] in ['.hdf5', '.h5']:
+                        source = os.path.join(dirpath, filename)
+                        yield source, os.path.relpath(source, input_path)
+        else:
+            yield input_path, os.path.basename(input_path)
+
+
+def _migrate_file(task):
+    """
+    Converts a single file, returning the size of the input file and the error
+    message (if the conversion failed).
+    """
+    source, target, file_format, block_table = task
+    try:
+        obj = io.load(source)
+        if not isinstance(obj, SymmetryGroup):
+            file_format = 'hdf5'
+            block_table = None
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+        io.save(obj, target, file_format=file_format, block_table=block_table)
+    except (OSError, ValueError, TypeError, KeyError) as exc:
+        return 0, str(exc)
+    return os.path.getsize(source), None
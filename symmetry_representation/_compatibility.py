@@ -15,6 +15,7 @@ import pymatgen as mg
 from fsc.export import export
 
 from . import SymmetryGroup, SymmetryOperation
+from ._profiling import phase, count
 
 
 @export
@@ -29,8 +30,10 @@ def is_compatible(*, structure, symmetry):
     symmetry : SymmetryOperation
         The symmetry operation that is checked for compatibility.
     """
-    analyzer = mg.symmetry.analyzer.SpacegroupAnalyzer(structure)
-    valid_sym_ops = analyzer.get_symmetry_operations(cartesian=False)
+    count('compatibility.checks')
+    with phase('compatibility.symmetry_analysis'):
+        analyzer = mg.symmetry.analyzer.SpacegroupAnalyzer(structure)
+        valid_sym_ops = analyzer.get_symmetry_operations(cartesian=False)
     for sym_op in valid_sym_ops:
         if (
             np.
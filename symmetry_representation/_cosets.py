@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Defines the decomposition of a symmetry group into the cosets of its subgroup
+of pure translations.
+"""
+
+import numpy as np
+from fsc.export import export
+
+from ._sym_op import SymmetryGroup, SymmetryOperation, RealSpaceOperator
+from ._lazy_import import LazyModule
+
+sp = LazyModule('sympy')  # pylint: disable=invalid-name
+
+# number of decimals to which translation vectors are compared
+_DECIMALS = 6
+
+
+@export
+class TranslationCosetDecomposition:
+    """
+    Describes a symmetry group as the cosets of its subgroup of pure
+    translations. Each element :math:`g` is given as :math:`g = r t`, where
+    :math:`r` is a coset representative and :math:`t` a pure translation (up
+    to a lattice vector). The representation matrices are stored only for the
+    representatives, while the pure translations are stored as permutations of
+    the basis. The symmetry operations are created only when they are
+    accessed.
+
+    Arguments
+    ---------
+    representatives : List[SymmetryOperation]
+        The coset representatives.
+    translation_vectors : List[array]
+        Translation vectors of the pure translations.
+    translation_permutations : array
+        Permutations of the basis corresponding to the pure translations, with
+        shape ``(T, N)``. The translation with index ``k`` maps basis function
+        ``j`` to basis function ``translation_permutations[k, j]``.
+    element_indices : array
+        For each element of the group, the indices of its coset
+        representative and pure translation, with shape ``(G, 2)``.
+    lattice_shifts : array
+        For each element of the group, the lattice vector which is added to
+        the translation vector of :math:`r t`, with shape ``(G, d)``.
+    full_group : bool
+        Flag which determines whether the symmetry elements describe the full
+        group or just a generating subset.
+    """
+    def __init__(
+        self,
+        *,
+        representatives,
+        translation_vectors,
+        translation_permutations,
+        element_indices,
+        lattice_shifts,
+        full_group=False
+    ):
+        self.representatives = list(representatives)
+        self.translation_vectors = list(translation_vectors)
+        self.translation_permutations = np.asarray(
+            translation_permutations, dtype=int
+        )
+        self.element_indices = np.asarray(element_indices,
+                                          dtype=int).reshape(-1, 2)
+        self.lattice_shifts = np.asarray(lattice_shifts, dtype=int)
+        self.full_group = full_group
+        if len(self.translation_vectors) != len(self.translation_permutations):
+            raise ValueError(
+                'The number of translation vectors and permutations must match.'
+            )
+        if len(self.element_indices) != len(self.lattice_shifts):
+            raise ValueError(
+                'The number of element indices and lattice shifts must match.'
+            )
+
+    @classmethod
+    def from_symmetry_group(cls, symmetry_group):
+        """
+        Decompose the given symmetry group. The representation matrices of its
+        pure translations must be permutation matrices.
+        """
+        symmetries = symmetry_group.symmetries
+        if not symmetries:
+            raise ValueError('Cannot decompose an empty symmetry group.')
+        decomposition = _Decomposition(
+            rotation_matrices=[sym.rotation_matrix for sym in symmetries],
+            translation_vectors=[sym.translation_vector for sym in symmetries],
+            repr_has_cc=[sym.repr.has_cc for sym in symmetries]
+        )
+        translation_permutations = [
+            _get_permutation(symmetries[i].repr.matrix)
+            for i in decomposition.translation_indices
+        ]
+        if decomposition.add_zero_translation:
+            translation_permutations.insert(
+                0, np.arange(symmetries[0].repr.matrix.shape[0])
+            )
+        return cls(
+            representatives=[
+                symmetries[i] for i in decomposition.representative_indices
+            ],
+            translation_vectors=decomposition.get_translation_vectors(
+                numeric=symmetries[0].numeric
+            ),
+            translation_permutations=translation_permutations,
+            element_indices=decomposition.element_indices,
+            lattice_shifts=decomposition.lattice_shifts,
+            full_group=symmetry_group.full_group
+        )
+
+    @classmethod
+    def from_orbitals(
+        cls,
+        *,
+        orbitals,
+        real_space_operators,
+        rotation_matrices_cartesian=None,
+        numeric,
+        lattice=None,
+        full_group=False,
+        position_tolerance=1e-4
+    ):
+        """
+        Create the decomposition of the (unitary) symmetry operations given by
+        their real-space operators. The representation matrices are created
+        only for the coset representatives, while the pure translations are
+        determined from the positions of the orbitals. Either the
+        ``rotation_matrices_cartesian`` or the ``lattice`` must be given.
+
+        Arguments
+        ---------
+        orbitals : List(Orbital)
+            Basis orbitals with respect to which the representation should be
+            created.
+        real_space_operators : Iterable[.RealSpaceOperator]
+            Real-space operators of the symmetry operations.
+        rotation_matrices_cartesian : Iterable[np.array or sp.Matrix], optional
+            Rotation matrices of the symmetry operations in cartesian
+            coordinates, in the same order as the ``real_space_operators``.
+        numeric : bool
+            Flag to determine whether numeric (numpy) or symbolic (sympy)
+            computation should be used.
+        lattice : array, optional
+            The lattice vectors (as rows), from which the cartesian rotation
+            matrices are computed.
+        full_group : bool
+            Flag which determines whether the symmetry elements describe the
+            full group or just a generating subset.
+        position_tolerance : float
+            Absolute distance between positions (in reciprocal units) for
+            which they are still considered to be the same position.
+        """
+        from ._get_repr_matrix._get_repr_matrix import _ReprMatrixBuilder, _apply_spin_rotation, _get_cartesian_rotations  # pylint: disable=import-outside-toplevel
+
+        real_space_operators = list(real_space_operators)
+        rotation_matrices_cartesian = _get_cartesian_rotations(
+            real_space_operators=real_space_operators,
+            rotation_matrices_cartesian=rotation_matrices_cartesian,
+            lattice=lattice,
+            numeric=numeric
+        )
+        if not real_space_operators:
+            raise ValueError('Cannot decompose an empty symmetry group.')
+        decomposition = _Decomposition(
+            rotation_matrices=[
+                op.rotation_matrix for op in real_space_operators
+            ],
+            translation_vectors=[
+                op.translation_vector for op in real_space_operators
+            ],
+            repr_has_cc=[False] * len(real_space_operators)
+        )
+        builder = _ReprMatrixBuilder(
+            orbitals=orbitals,
+            numeric=numeric,
+            position_tolerance=position_tolerance
+        )
+        representatives = []
+        for i in decomposition.representative_indices:
+            representatives.append(
+                SymmetryOperation.from_real_space_operator(
+                    real_space_operator=real_space_operators[i],
+                    repr_matrix=builder.get_repr_matrix(
+                        real_space_operator=real_space_operators[i],
+                        rotation_matrix_cartesian=rotation_matrices_cartesian[
+                            i],
+                        spin_rot_function=_apply_spin_rotation
+                    ),
+                    numeric=numeric
+                )
+            )
+        translation_vectors = decomposition.get_translation_vectors(
+            numeric=numeric
+        )
+        translation_permutations = [
+            builder.get_translation_permutation(translation_vector)
+            for translation_vector in translation_vectors
+        ]
+        return cls(
+            representatives=representatives,
+            translation_vectors=translation_vectors,
+            translation_permutations=translation_permutations,
+            element_indices=decomposition.element_indices,
+            lattice_shifts=decomposition.lattice_shifts,
+            full_group=full_group
+        )
+
+    def __len__(self):
+        return len(self.element_indices)
+
+    @property
+    def numeric(self):
+        return self.representatives[0].numeric
+
+    def get_translation(self, index):
+        """
+        Create the pure translation with the given index.
+        """
+        permutation = self.translation_permutations[index]
+        size = len(permutation)
+        repr_matrix = np.zeros((size, size), dtype=int)
+        repr_matrix[permutation, np.arange(size)] = 1
+        if not self.numeric:
+            repr_matrix = sp.Matrix(repr_matrix)
+        translation_vector = self.translation_vectors[index]
+        return SymmetryOperation(
+            rotation_matrix=np.eye(len(translation_vector), dtype=int)
+            if self.numeric else sp.eye(len(translation_vector)),
+            translation_vector=translation_vector,
+            repr_matrix=repr_matrix,
+            numeric=self.numeric
+        )
+
+    def get_symmetry(self, index):
+        """
+        Create the symmetry operation with the given index.
+        """
+        representative_index, translation_index = self.element_indices[index]
+        res = self.representatives[representative_index
+                                   ] @ self.get_translation(translation_index)
+        lattice_shift = self.lattice_shifts[index]
+        if np.any(lattice_shift != 0):
+            if not self.numeric:
+                lattice_shift = sp.Matrix(lattice_shift)
+            res.real_space_operator = RealSpaceOperator(
+                rotation_matrix=res.rotation_matrix,
+                translation_vector=res.translation_vector + lattice_shift,
+                numeric=self.numeric
+            )
+        return res
+
+    @property
+    def symmetries(self):
+        return [self.get_symmetry(i) for i in range(len(self))]
+
+    def to_symmetry_group(self):
+        """
+        Convert to a :class:`.SymmetryGroup` with explicit symmetry operations.
+        """
+        return SymmetryGroup(
+            symmetries=self.symmetries, full_group=self.full_group
+        )
+
+
+class _Decomposition:
+    """
+    Determines the coset representatives, pure translations and the
+    decomposition of each element, given the real-space parts of the
+    symmetry operations.
+    """
+    def __init__(self, *, rotation_matrices, translation_vectors, repr_has_cc):
+        rotation_matrices = [
+            np.array(rot).astype(float) for rot in rotation_matrices
+        ]
+        self._translation_vectors = translation_vectors
+        translations_float = [
+            np.array(vec).astype(float).reshape(-1)
+            for vec in translation_vectors
+        ]
+        dim = len(translations_float[0])
+        identity = np.eye(dim)
+
+        self.translation_indices = []
+        translation_lookup = {}
+        for i, (rot, vec, has_cc) in enumerate(
+            zip(rotation_matrices, translations_float, repr_has_cc)
+        ):
+            if not has_cc and np.allclose(rot, identity):
+                key = _get_translation_key(vec)
+                if key not in translation_lookup:
+                    translation_lookup[key] = len(self.translation_indices)
+                    self.translation_indices.append(i)
+        self.add_zero_translation = _get_translation_key(
+            np.zeros(dim)
+        ) not in translation_lookup
+        if self.add_zero_translation:
+            translation_lookup = {
+                key: index + 1
+                for key, index in translation_lookup.items()
+            }
+            translation_lookup[_get_translation_key(np.zeros(dim))] = 0
+        pure_translations = ([np.zeros(dim)]
+                             if self.add_zero_translation else []) + [
+                                 translations_float[i]
+                                 for i in self.translation_indices
+                             ]
+
+        self.representative_indices = []
+        representatives_by_rotation = {}
+        self.element_indices = []
+        self.lattice_shifts = []
+        for i, (rot, vec, has_cc) in enumerate(
+            zip(rotation_matrices, translations_float, repr_has_cc)
+        ):
+            rotation_key = ((np.round(rot) + 0.).tobytes(), bool(has_cc))
+            candidates = representatives_by_rotation.setdefault(
+                rotation_key, []
+            )
+            for representative_index in candidates:
+                representative_vec = translations_float[
+                    self.representative_indices[representative_index]]
+                # solve vec = representative_vec + rot @ t (mod 1) for t
+                translation = np.linalg.solve(rot, vec - representative_vec)
+                translation_index = translation_lookup.get(
+                    _get_translation_key(translation), None
+                )
+                if translation_index is not None:
+                    break
+            else:
+                representative_index = len(self.representative_indices)
+                self.representative_indices.append(i)
+                candidates.append(representative_index)
+                representative_vec = vec
+                translation_index = translation_lookup[_get_translation_key(
+                    np.zeros(dim)
+                )]
+            self.element_indices.append(
+                (representative_index, translation_index)
+            )
+            self.lattice_shifts.append(
+                np.round(
+                    vec - representative_vec -
+                    rot @ pure_translations[translation_index]
+                ).astype(int)
+            )
+
+    def get_translation_vectors(self, *, numeric):
+        """
+        Returns the translation vectors of the pure translations, in the same
+        type as the given translation vectors.
+        """
+        res = [self._translation_vectors[i] for i in self.translation_indices]
+        if self.add_zero_translation:
+            dim = len(
+                np.array(res[0] if res else self._translation_vectors[0]
+                         ).reshape(-1)
+            )
+            res.insert(0, np.zeros(dim) if numeric else sp.zeros(dim, 1))
+        return res
+
+
+def _get_translation_key(translation_vector):
+    """
+    Returns a hashable key which identifies a translation vector up to
+    lattice vectors.
+    """
+    return tuple(
+        (np.round(np.asarray(translation_vector) % 1, _DECIMALS) % 1 +
+         0.).tolist()
+    )
+
+
+def _get_permutation(matrix):
+    """
+    Returns the permutation described by a permutation matrix, such that
+    basis function ``j`` is mapped to ``res[j]``.
+    """
+    matrix = np.array(matrix).astype(complex)
+    res = np.argmax(np.abs(matrix), axis=0)
+    size = matrix.shape[0]
+    expected = np.zeros_like(matrix)
+    expected[res, np.arange(size)] = 1
+    if len(set(res)) != size or not np.allclose(matrix, expected):
+        raise ValueError(
+            'The representation matrix of a pure translation is not a permutation matrix.'
+        )
+    return res
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Defines an exact encoding of analytic (sympy) values as integer arrays. Values
+which are rational linear combinations of 1, sqrt(2), sqrt(3), sqrt(6) and
+their products with the imaginary unit are stored as integer numerators and a
+common denominator. Other values are stored as strings.
+"""
+
+import h5py
+import numpy as np
+import sympy as sp
+
+_BASIS = (
+    sp.Integer(1),
+    sp.sqrt(2),
+    sp.sqrt(3),
+    sp.sqrt(6),
+    sp.I,
+    sp.I * sp.sqrt(2),
+    sp.I * sp.sqrt(3),
+    sp.I * sp.sqrt(6),
+)
+_BASIS_INDICES = {value: i for i, value in enumerate(_BASIS)}
+_INT64_MAX = np.iinfo(np.int64).max
+
+
+def encode(values):
+    """
+    Encode an array of analytic values.
+
+    Arguments
+    ---------
+    values : array
+        Array (with arbitrary shape) of sympy expressions.
+
+    Returns
+    -------
+    dict
+        The ``numerators`` (with an additional trailing dimension for the
+        coefficients of the basis elements), ``denominators``, and the flat
+        ``fallback_indices`` and ``fallback_values`` (as strings) of values
+        which could not be encoded.
+    """
+    values = np.array(values, dtype=object)
+    flat_values = values.ravel()
+    numerators = np.zeros((len(flat_values), len(_BASIS)), dtype=np.int64)
+    denominators = np.ones(len(flat_values), dtype=np.int64)
+    fallback_indices = []
+    fallback_values = []
+    # the number of distinct values is typically much smaller than the
+    # number of matrix entries
+    cache = {}
+    for i, value in enumerate(flat_values):
+        try:
+            code = cache[value]
+        except KeyError:
+            code = cache[value] = _encode_value(value)
+        if code is None:
+            fallback_indices.append(i)
+            fallback_values.append(sp.srepr(sp.sympify(value)))
+        else:
+            numerators[i], denominators[i] = code
+    return dict(
+        numerators=numerators.reshape(values.shape + (len(_BASIS), )),
+        denominators=denominators.reshape(values.shape),
+        fallback_indices=np.array(fallback_indices, dtype=np.int64),
+        fallback_values=np.array(fallback_values, dtype=object)
+    )
+
+
+def decode(*, numerators, denominators, fallback_indices, fallback_values):
+    """
+    Decode an array of analytic values, given the output of :func:`encode`.
+    """
+    shape = np.shape(denominators)
+    codes = np.concatenate([
+        np.reshape(numerators, (-1, len(_BASIS))),
+        np.reshape(denominators, (-1, 1))
+    ],
+                           axis=1)
+    # each distinct value is converted to a sympy expression only once
+    unique_codes, inverse = np.unique(codes, axis=0, return_inverse=True)
+    unique_values = np.empty(len(unique_codes), dtype=object)
+    unique_values[:] = [_decode_value(code) for code in unique_codes]
+    res = unique_values[np.reshape(inverse, -1)]
+    for index, value in zip(fallback_indices, fallback_values):
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        res[index] = sp.sympify(value)
+    return res.reshape(shape)
+
+
+def write(values, hdf5_handle):
+    """
+    Write the encoded analytic values to the given HDF5 group.
+    """
+    for key, value in encode(values).items():
+        if key == 'fallback_values':
+            hdf5_handle.create_dataset(
+                key, data=value, dtype=h5py.string_dtype()
+            )
+        elif value.size > 0:
+            hdf5_handle.create_dataset(
+                key, data=value, compression='gzip', shuffle=True
+            )
+        else:
+            hdf5_handle[key] = value
+
+
+def read(hdf5_handle):
+    """
+    Read the analytic values stored in the given HDF5 group.
+    """
+    return decode(
+        **{
+            key: np.array(hdf5_handle[key])
+            for key in [
+                'numerators', 'denominators', 'fallback_indices',
+                'fallback_values'
+            ]
+        }
+    )
+
+
+def _encode_value(value):
+    """
+    Get the numerators and common denominator of the given value with respect to
+    the basis, or None if it cannot be encoded.
+    """
+    coefficients = [sp.Integer(0)] * len(_BASIS)
+    for term, coeff in sp.expand(sp.sympify(value)
+                                 ).as_coefficients_dict().items():
+        index = _BASIS_INDICES.get(term, None)
+        if index is None or not coeff.is_Rational:
+            return None
+        coefficients[index] += coeff
+    denominator = sp.ilcm(*[coeff.q for coeff in coefficients])
+    numerators = [int(coeff * denominator) for coeff in coefficients]
+    if max([abs(num) for num in numerators] + [denominator]) > _INT64_MAX:
+        return None
+    return numerators, int(denominator)
+
+
+def _decode_value(code):
+    """
+    Create the sympy expression from its numerators and common denominator.
+    """
+    denominator = int(code[-1])
+    return sp.Add(
+        *[
+            sp.Rational(int(num), denominator) * basis_value
+            for num, basis_value in zip(code[:-1], _BASIS) if num != 0
+        ]
+    )
@@ -7,7 +7,8 @@ Contains the functionality for automatically creating symmetry representation ma
 """
 
 from ._orbitals import *
+from ._orbital_basis import *
 from ._get_repr_matrix import *
 from ._orbital_constants import *
 
-__all__ = _orbitals.__all__ + _get_repr_matrix.__all__ + _orbital_constants.__all__  # pylint: disable=undefined-variable
+__all__ = _orbitals.__all__ + _orbital_basis.__all__ + _get_repr_matrix.__all__ + _orbital_constants.__all__  # pylint: disable=undefined-variable
@@ -63,7 +63,8 @@ def _expr_to_vector(
             rcond=None if np.__version__ >= '1.14' else -1
         )[0]
     else:
-        res = sp.linsolve((sp.Matrix(A), sp.Matrix(b)), sp.symbols('a b c'))
+        res = sp.linsolve((sp.Matrix(A), sp.Matrix(b)),
+                          sp.symbols('a0:{}'.format(dim)))
         if len(res) != 1:
             raise ValueError(
                 'Invalid result {res} when trying to match expression {expr} to basis {basis}.'
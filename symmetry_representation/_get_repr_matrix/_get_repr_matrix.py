@@ -15,11 +15,19 @@ import scipy.linalg as la
 from fsc.export import export
 
 from .._sym_op import RealSpaceOperator, SymmetryOperation
+from .._block_matrix import BlockPermutationMatrix
+from .._lattice import to_cartesian_rotations
+from .._profiling import phase, count
 
 from ._orbitals import Spin
+from ._orbital_basis import OrbitalBasis, _PositionFinder
 from ._orbital_constants import SPIN_UP, SPIN_DOWN
-from ._spin_reps import _spin_reps
+from ._spin_reps import _spin_reps, _spin_reps_numeric_batched
 from ._expr_utils import _get_substitution, _expr_to_vector
+from ._monomial_space import _MonomialSpace
+from ._shell_library import (
+    get_shell_library, get_rotation_id, get_standard_rotations
+)
 
 
 @export
@@ -29,7 +37,7 @@ def get_time_reversal(*, orbitals, numeric):
 
     Arguments
     ---------
-    orbitals : List(Orbital)
+    orbitals : List(Orbital) or OrbitalBasis
         Basis orbitals with respect to which the representation should be created.
     numeric : bool
         Flag to determine whether numeric (numpy) or symbolic (sympy) computation
@@ -63,30 +71,42 @@ def get_repr_matrix(
     *,
     orbitals,
     real_space_operator,
-    rotation_matrix_cartesian,
+    rotation_matrix_cartesian=None,
     numeric,
+    lattice=None,
     position_tolerance=1e-4
 ):
     """
-    Create the representation matrix for a unitary operator. If analytic values
-    are used (``numeric=False``), the ``rotation_matrix_cartesian`` must be an
-    exact value.
+    Create the representation matrix for a unitary operator. Either the
+    ``rotation_matrix_cartesian`` or the ``lattice`` must be given. If
+    analytic values are used (``numeric=False``), the
+    ``rotation_matrix_cartesian`` must be an exact value.
 
     Arguments
     ---------
-    orbitals : List(Orbital)
+    orbitals : List(Orbital) or OrbitalBasis
         Basis orbitals with respect to which the representation should be created.
     real_space_operator : .RealSpaceOperator
         Real-space operator of the symmetry operation.
-    rotation_matrix_cartesian : np.array or sp.Matrix
+    rotation_matrix_cartesian : np.array or sp.Matrix, optional
         Rotation matrix of the symmetry operation in cartesian coordinates.
     numeric : bool
         Flag to determine whether numeric (numpy) or symbolic (sympy) computation
         should be used.
+    lattice : array, optional
+        The lattice vectors (as rows), from which the cartesian rotation matrix
+        is computed.
     position_tolerance : float
         Absolute distance between positions (in reciprocal units) for which they
         are still considered to be the same position.
     """
+    rotation_matrix_cartesian, = _get_cartesian_rotations(
+        real_space_operators=[real_space_operator],
+        rotation_matrices_cartesian=None
+        if rotation_matrix_cartesian is None else [rotation_matrix_cartesian],
+        lattice=lattice,
+        numeric=numeric
+    )
     return _get_repr_matrix_impl(
         orbitals=orbitals,
         real_space_operator=real_space_operator,
@@ -97,10 +117,181 @@ def get_repr_matrix(
     )
 
 
-def _get_repr_matrix_impl(  # pylint: disable=too-many-locals
+@export
+def iter_symmetry_operations(
+    *,
+    orbitals,
+    real_space_operators,
+    rotation_matrices_cartesian=None,
+    numeric,
+    lattice=None,
+    position_tolerance=1e-4
+):
+    """
+    Create (unitary) symmetry operations from the basis orbitals, one at a
+    time. The data derived from the orbitals is computed only once, and only
+    a single representation matrix is held in memory by the generator. In
+    combination with :func:`.io.save_stream`, this allows writing symmetry
+    groups which do not fit into memory.
+
+    Either the ``rotation_matrices_cartesian`` or the ``lattice`` must be
+    given. In the latter case, the cartesian rotation matrices are computed
+    from the real-space operators in a single step.
+
+    Arguments
+    ---------
+    orbitals : List(Orbital) or OrbitalBasis
+        Basis orbitals with respect to which the representation should be created.
+    real_space_operators : Iterable[.RealSpaceOperator]
+        Real-space operators of the symmetry operations.
+    rotation_matrices_cartesian : Iterable[np.array or sp.Matrix], optional
+        Rotation matrices of the symmetry operations in cartesian coordinates,
+        in the same order as the ``real_space_operators``.
+    numeric : bool
+        Flag to determine whether numeric (numpy) or symbolic (sympy) computation
+        should be used.
+    lattice : array, optional
+        The lattice vectors (as rows), from which the cartesian rotation
+        matrices are computed.
+    position_tolerance : float
+        Absolute distance between positions (in reciprocal units) for which they
+        are still considered to be the same position.
+    """
+    builder = _ReprMatrixBuilder(
+        orbitals=orbitals,
+        numeric=numeric,
+        position_tolerance=position_tolerance
+    )
+    real_space_operators = list(real_space_operators)
+    rotation_matrices_cartesian = _get_cartesian_rotations(
+        real_space_operators=real_space_operators,
+        rotation_matrices_cartesian=rotation_matrices_cartesian,
+        lattice=lattice,
+        numeric=numeric
+    )
+    builder.add_spin_rotations(rotation_matrices_cartesian)
+    for real_space_operator, rotation_matrix_cartesian in zip(
+        real_space_operators, rotation_matrices_cartesian
+    ):
+        repr_matrix = builder.get_repr_matrix(
+            real_space_operator=real_space_operator,
+            rotation_matrix_cartesian=rotation_matrix_cartesian,
+            spin_rot_function=_apply_spin_rotation
+        )
+        yield SymmetryOperation.from_real_space_operator(
+            real_space_operator=real_space_operator,
+            repr_matrix=repr_matrix,
+            numeric=numeric
+        )
+
+
+@export
+def iter_block_repr_matrices(
+    *,
+    orbitals,
+    real_space_operators,
+    rotation_matrices_cartesian=None,
+    lattice=None,
+    position_tolerance=1e-4
+):
+    """
+    Create the (numeric) representation matrices of unitary symmetry
+    operations as :class:`.BlockPermutationMatrix` instances, one at a time.
+    Each matrix is given by the permutation of the sites, and the blocks
+    mapping the orbitals on a site to those on its image site. The blocks are
+    computed once for each kind of site and rotation, and shared between the
+    matrices. Since the dense matrices are never created, this is suitable
+    for large (supercell) bases. The matrices can be applied to vectors and
+    matrices directly, or stored in a :class:`.PackedSymmetryGroup`.
+
+    Either the ``rotation_matrices_cartesian`` or the ``lattice`` must be
+    given.
+
+    Arguments
+    ---------
+    orbitals : List(Orbital) or OrbitalBasis
+        Basis orbitals with respect to which the representation should be created.
+    real_space_operators : Iterable[.RealSpaceOperator]
+        Real-space operators of the symmetry operations.
+    rotation_matrices_cartesian : Iterable[np.array], optional
+        Rotation matrices of the symmetry operations in cartesian coordinates,
+        in the same order as the ``real_space_operators``.
+    lattice : array, optional
+        The lattice vectors (as rows), from which the cartesian rotation
+        matrices are computed.
+    position_tolerance : float
+        Absolute distance between positions (in reciprocal units) for which they
+        are still considered to be the same position.
+    """
+    builder = _ReprMatrixBuilder(
+        orbitals=orbitals, numeric=True, position_tolerance=position_tolerance
+    )
+    real_space_operators = list(real_space_operators)
+    rotation_matrices_cartesian = _get_cartesian_rotations(
+        real_space_operators=real_space_operators,
+        rotation_matrices_cartesian=rotation_matrices_cartesian,
+        lattice=lattice,
+        numeric=True
+    )
+    builder.add_spin_rotations(rotation_matrices_cartesian)
+    for real_space_operator, rotation_matrix_cartesian in zip(
+        real_space_operators, rotation_matrices_cartesian
+    ):
+        yield builder.get_block_repr_matrix(
+            real_space_operator=real_space_operator,
+            rotation_matrix_cartesian=rotation_matrix_cartesian,
+            spin_rot_function=_apply_spin_rotation
+        )
+
+
+def _get_cartesian_rotations(
+    *, real_space_operators, rotation_matrices_cartesian, lattice, numeric
+):
+    """
+    Returns the rotation matrices in cartesian coordinates, which are either
+    given explicitly or computed from the lattice. In the analytic case, the
+    exact form of the computed rotation matrices is used, which is known only
+    for the rotations in their standard cartesian settings.
+    """
+    if (rotation_matrices_cartesian is None) == (lattice is None):
+        raise ValueError(
+            "Exactly one of the cartesian rotation matrices and the 'lattice' must be given."
+        )
+    if rotation_matrices_cartesian is not None:
+        rotation_matrices_cartesian = list(rotation_matrices_cartesian)
+        if len(real_space_operators) != len(rotation_matrices_cartesian):
+            raise ValueError(
+                'The number of real-space operators ({}) and cartesian rotation matrices ({}) must match.'
+                .format(
+                    len(real_space_operators),
+                    len(rotation_matrices_cartesian)
+                )
+            )
+        return rotation_matrices_cartesian
+    if not real_space_operators:
+        return []
+    rotation_matrices_cartesian = to_cartesian_rotations([
+        op.rotation_matrix for op in real_space_operators
+    ],
+                                                         lattice=lattice)
+    if numeric:
+        return list(rotation_matrices_cartesian)
+    standard_rotations = get_standard_rotations()
+    res = []
+    for rot in rotation_matrices_cartesian:
+        try:
+            res.append(sp.Matrix(standard_rotations[get_rotation_id(rot)]))
+        except KeyError as exc:
+            raise ValueError(
+                'The exact form of the cartesian rotation matrix {} is not known, it must be given explicitly.'
+                .format(rot)
+            ) from exc
+    return res
+
+
+def _get_repr_matrix_impl(
     *, orbitals, real_space_operator, rotation_matrix_cartesian,
-    spin_rot_function, numeric,
-    position_tolerance
+    spin_rot_function, numeric, position_tolerance
 ):
     """
     Implements the functionality for getting the representation matrix. The
@@ -109,7 +300,7 @@ def _get_repr_matrix_impl(  # pylint: disable=too-many-locals
 
     Arguments
     ---------
-    orbitals : List(Orbital)
+    orbitals : List(Orbital) or OrbitalBasis
         Basis orbitals with respect to which the representation should be created.
     real_space_operator : .RealSpaceOperator
         Real-space operator of the symmetry operation.
@@ -125,104 +316,517 @@ def _get_repr_matrix_impl(  # pylint: disable=too-many-locals
         Absolute distance between positions (in reciprocal units) for which they
         are still considered to be the same position.
     """
-
-    orbitals = list(orbitals)
-
-    positions_mapping = _get_positions_mapping(
+    return _ReprMatrixBuilder(
         orbitals=orbitals,
-        real_space_operator=real_space_operator,
+        numeric=numeric,
         position_tolerance=position_tolerance
+    ).get_repr_matrix(
+        real_space_operator=real_space_operator,
+        rotation_matrix_cartesian=rotation_matrix_cartesian,
+        spin_rot_function=spin_rot_function
     )
-    repr_matrix = sp.zeros(len(orbitals))
-    if not numeric:
-        rotation_matrix_cartesian = sp.Matrix(rotation_matrix_cartesian)
-
-    expr_substitution = _get_substitution(rotation_matrix_cartesian)
-    for i, orb in enumerate(orbitals):
-        res_pos_idx = positions_mapping[i]
-        spin_res = spin_rot_function(
-            rotation_matrix_cartesian=rotation_matrix_cartesian,
-            spin=orb.spin,
-            numeric=numeric
-        )
 
-        new_func = orb.function.subs(expr_substitution, simultaneous=True)
-        for new_spin, spin_value in spin_res.items():
-            res_pos_idx_reduced = [
-                idx for idx in res_pos_idx if orbitals[idx].spin == new_spin
-            ]
-            func_basis_reduced = [
-                orbitals[idx].function for idx in res_pos_idx_reduced
-            ]
-            func_vec = _expr_to_vector(
-                new_func, basis=func_basis_reduced, numeric=numeric
+
+class _ReprMatrixBuilder:
+    """
+    Creates representation matrices with respect to a fixed orbital basis. The
+    data derived from the orbitals is computed once, and shared between the
+    symmetry operations.
+
+    The representation matrix is composed of blocks which map the orbitals on
+    one site to the orbitals on the image site. Such a block depends only on
+    the rotation and the orbitals on the two sites, but not on the translation.
+    The blocks are cached, such that operations which share a rotation (for
+    example in non-symmorphic groups, or when lattice translations are
+    included) differ only in the permutation of the sites. Similarly, the
+    effect of a rotation on the spins is computed once per rotation.
+
+    If all orbital functions are polynomials, they are handled as coefficient
+    vectors with respect to the monomials. Rotating a function is then a
+    matrix-vector product, and the rotated function is expressed in terms of
+    the basis functions with a (cached) pseudo-inverse. Otherwise, the
+    functions are rotated by substitution, and expressed in terms of the basis
+    functions by evaluating them at random points. For the standard shells and
+    rotations, the precomputed blocks from the shell library are used instead.
+
+    Arguments
+    ---------
+    orbitals : List(Orbital) or OrbitalBasis
+        Basis orbitals with respect to which the representation should be created.
+    numeric : bool
+        Flag to determine whether numeric (numpy) or symbolic (sympy) computation
+        should be used.
+    position_tolerance : float
+        Absolute distance between positions (in reciprocal units) for which they
+        are still considered to be the same position.
+    """
+    def __init__(self, *, orbitals, numeric, position_tolerance):
+        self.numeric = numeric
+        self.position_tolerance = position_tolerance
+        count('repr_matrix.builders')
+        with phase('repr_matrix.setup'):
+            if isinstance(orbitals, OrbitalBasis):
+                self.basis = orbitals
+            else:
+                self.basis = OrbitalBasis.from_orbitals(
+                    orbitals, position_tolerance=position_tolerance
+                )
+            self.position_finder = _PositionFinder(
+                positions=self.basis.positions,
+                position_tolerance=position_tolerance
             )
-            func_vec_norm = la.norm(np.array(func_vec).astype(complex))
-            if not np.isclose(func_vec_norm, 1):
+            self.sites = self._get_sites()
+            functions = self.basis.functions
+            self._function_space = _MonomialSpace.from_expressions(functions)
+            if self._function_space is not None:
+                self._function_vectors = {
+                    function:
+                    self._function_space.to_vector(function, numeric=numeric)
+                    for function in functions
+                }
+        self._projection_cache = {}
+        self._function_rotations = {}
+        # plain lists of the indices, which are faster to access one by one
+        self._function_indices = self.basis.function_indices.tolist()
+        self._spin_indices = self.basis.spin_indices.tolist()
+        self._orbital_keys = list(
+            zip(self._function_indices, self._spin_indices)
+        )
+        self._block_cache = {}
+        self._spin_cache = {}
+        self._dense_blocks = []
+        self._dense_block_ids = {}
+
+    def _get_sites(self):
+        """
+        Groups the orbital indices by their position.
+        """
+        if not len(self.basis):
+            return []
+        dim = self.position_finder.positions.shape[1]
+        same_position_mapping = self.position_finder.get_mapping(
+            RealSpaceOperator(rotation_matrix=np.eye(dim))
+        )
+        sites = []
+        assigned = set()
+        for i in range(len(self.basis)):
+            if i not in assigned:
+                site = same_position_mapping[i]
+                assigned.update(site)
+                sites.append(site)
+        return sites
+
+    def get_translation_permutation(self, translation_vector):
+        """
+        Returns the permutation of the orbitals under a pure translation, such
+        that orbital ``j`` is mapped to orbital ``res[j]``.
+        """
+        dim = self.position_finder.positions.shape[1]
+        positions_mapping = self.position_finder.get_mapping(
+            RealSpaceOperator(
+                rotation_matrix=np.eye(dim),
+                translation_vector=translation_vector
+            )
+        )
+        res = []
+        for i, orbital_key in enumerate(self._orbital_keys):
+            for idx in positions_mapping[i]:
+                if self._orbital_keys[idx] == orbital_key:
+                    res.append(idx)
+                    break
+            else:
                 raise ValueError(
-                    'Norm {} of vector {} for expression {} created from orbital {} is not one.\nCartesian rotation matrix: {}'
-                    .format(
-                        func_vec_norm, func_vec, new_func, orb,
-                        rotation_matrix_cartesian
-                    )
+                    'Orbital {} is not mapped to an equivalent orbital by the translation {}.'
+                    .format(self.basis[i], translation_vector)
+                )
+        return np.array(res, dtype=int)
+
+    def add_spin_rotations(self, rotation_matrices_cartesian):
+        """
+        Compute the effect of multiple rotations on the spins at once, and add
+        it to the cache. This is done only in the numeric case, since the
+        spin matrices of a stack of rotations can be computed in a single
+        step.
+
+        Arguments
+        ---------
+        rotation_matrices_cartesian : List[np.array]
+            Rotation matrices in cartesian coordinates.
+        """
+        spins = {
+            spin
+            for spin in
+            (OrbitalBasis.SPINS[idx] for idx in set(self._spin_indices))
+            if spin.total == Fraction(1, 2)
+        }
+        if not self.numeric or not spins or not rotation_matrices_cartesian:
+            return
+        with phase('repr_matrix.spin_rotation'):
+            spin_matrices = _spin_reps_numeric_batched(
+                np.array(rotation_matrices_cartesian, dtype=float)
+            )
+            for rotation_matrix_cartesian, spin_matrix in zip(
+                rotation_matrices_cartesian, spin_matrices
+            ):
+                rotation_key = self._get_rotation_key(
+                    rotation_matrix_cartesian
                 )
-            for idx, func_value in zip(res_pos_idx_reduced, func_vec):
-                repr_matrix[idx, i] += func_value * spin_value
-    # check that the matrix is unitary
-    repr_matrix_numeric = np.array(repr_matrix).astype(complex)
-    if not np.allclose(
-        repr_matrix_numeric @ repr_matrix_numeric.conj().T,
-        np.eye(*repr_matrix_numeric.shape)  # pylint: disable=not-an-iterable
+                for spin in spins:
+                    self._spin_cache[
+                        (_apply_spin_rotation, rotation_key,
+                         spin)] = _vec_to_spins(
+                             spin_matrix @ _spin_to_vector(spin, numeric=True)
+                         )
+
+    def _get_rotation_key(self, rotation_matrix_cartesian):
+        """
+        Returns the key which identifies a rotation in the caches.
+        """
+        if self.numeric:
+            return (
+                np.round(np.array(rotation_matrix_cartesian, dtype=float), 10)
+                + 0.
+            ).tobytes()
+        return sp.ImmutableMatrix(rotation_matrix_cartesian)
+
+    def get_repr_matrix(
+        self, *, real_space_operator, rotation_matrix_cartesian,
+        spin_rot_function
+    ):
+        """
+        Create the representation matrix of the given symmetry operation.
+
+        Arguments
+        ---------
+        real_space_operator : .RealSpaceOperator
+            Real-space operator of the symmetry operation.
+        rotation_matrix_cartesian : np.array or sp.Matrix
+            Rotation matrix of the symmetry operation in cartesian coordinates.
+        spin_rot_function : Callable
+            A function which applies the spin rotation, given the initial spin and
+            cartesian rotation matrix.
+        """
+        with phase('repr_matrix.total'):
+            return self._get_repr_matrix(
+                real_space_operator=real_space_operator,
+                rotation_matrix_cartesian=rotation_matrix_cartesian,
+                spin_rot_function=spin_rot_function
+            )
+
+    def _get_repr_matrix(
+        self, *, real_space_operator, rotation_matrix_cartesian,
+        spin_rot_function
     ):
-        max_mismatch = np.max(
-            np.abs(
-                repr_matrix_numeric @ repr_matrix_numeric.conj().T -
+        size = len(self.basis)
+        numeric = self.numeric
+        count('repr_matrix.operations')
+        if numeric:
+            repr_matrix = np.zeros((size, size), dtype=complex)
+        else:
+            repr_matrix = sp.zeros(size)
+        for site, target, _, block in self._iter_blocks(
+            real_space_operator=real_space_operator,
+            rotation_matrix_cartesian=rotation_matrix_cartesian,
+            spin_rot_function=spin_rot_function
+        ):
+            for row, col, value in block:
+                repr_matrix[target[row], site[col]] += value
+
+        # check that the matrix is unitary
+        with phase('repr_matrix.unitarity_check'):
+            repr_matrix_numeric = np.array(repr_matrix).astype(complex)
+            if not np.allclose(
+                repr_matrix_numeric @ repr_matrix_numeric.conj().T,
                 np.eye(*repr_matrix_numeric.shape)  # pylint: disable=not-an-iterable
+            ):
+                max_mismatch = np.max(
+                    np.abs(
+                        repr_matrix_numeric @ repr_matrix_numeric.conj().T -
+                        np.eye(*repr_matrix_numeric.shape)  # pylint: disable=not-an-iterable
+                    )
+                )
+                raise ValueError(
+                    'Representation matrix is not unitary. Maximum mismatch to unity: {}'
+                    .format(max_mismatch)
+                )
+        if numeric:
+            return repr_matrix_numeric
+        else:
+            with phase('repr_matrix.simplify'):
+                repr_matrix.simplify()
+            return repr_matrix
+
+    def get_block_repr_matrix(
+        self, *, real_space_operator, rotation_matrix_cartesian,
+        spin_rot_function
+    ):
+        """
+        Create the representation matrix of the given symmetry operation as a
+        :class:`.BlockPermutationMatrix`, without creating the dense matrix.
+        The blocks are shared between all matrices created by the builder.
+        This is supported only in the numeric case.
+
+        Arguments
+        ---------
+        real_space_operator : .RealSpaceOperator
+            Real-space operator of the symmetry operation.
+        rotation_matrix_cartesian : np.array
+            Rotation matrix of the symmetry operation in cartesian coordinates.
+        spin_rot_function : Callable
+            A function which applies the spin rotation, given the initial spin and
+            cartesian rotation matrix.
+        """
+        if not self.numeric:
+            raise ValueError(
+                'Block representation matrices can only be created in the numeric case.'
+            )
+        with phase('repr_matrix.total'):
+            count('repr_matrix.operations')
+            block_ids = []
+            row_indices = []
+            col_indices = []
+            for site, target, key, block in self._iter_blocks(
+                real_space_operator=real_space_operator,
+                rotation_matrix_cartesian=rotation_matrix_cartesian,
+                spin_rot_function=spin_rot_function
+            ):
+                try:
+                    block_id = self._dense_block_ids[key]
+                except KeyError:
+                    block_id = self._dense_block_ids[key] = len(
+                        self._dense_blocks
+                    )
+                    self._dense_blocks.append(
+                        self._to_dense_block(
+                            block, num_rows=len(target), num_cols=len(site)
+                        )
+                    )
+                block_ids.append(block_id)
+                row_indices.extend(target)
+                col_indices.extend(site)
+            # the blocks are unitary, such that the matrix is unitary if the
+            # sites are mapped onto each other one-to-one
+            if len(set(row_indices)) != len(self.basis):
+                raise ValueError(
+                    'Representation matrix is not unitary: the orbitals are not mapped onto each other one-to-one.'
+                )
+            return BlockPermutationMatrix(
+                blocks=self._dense_blocks,
+                block_ids=block_ids,
+                row_indices=row_indices,
+                col_indices=col_indices
             )
-        )
-        raise ValueError(
-            'Representation matrix is not unitary. Maximum mismatch to unity: {}'
-            .format(max_mismatch)
-        )
-    if numeric:
-        return repr_matrix_numeric
-    else:
-        repr_matrix.simplify()
-        return repr_matrix
 
+    @staticmethod
+    def _to_dense_block(block, *, num_rows, num_cols):
+        """
+        Converts the entries of a block to a dense matrix, and checks that it
+        is unitary.
+        """
+        res = np.zeros((num_rows, num_cols), dtype=complex)
+        for row, col, value in block:
+            res[row, col] += value
+        if num_rows != num_cols or not np.allclose(
+            res @ res.conj().T, np.eye(num_rows)
+        ):
+            raise ValueError(
+                'Representation matrix is not unitary, the block {} is not unitary.'
+                .format(res)
+            )
+        return res
 
-def _get_positions_mapping(orbitals, real_space_operator, position_tolerance):
-    """
-    Calculates the mapping from initial to final positions, given the orbital
-    basis and real space operator.
-    """
-    positions = [orbital.position for orbital in orbitals]
-    res = {}
-    for i, pos1 in enumerate(positions):
-        new_pos = real_space_operator.apply(pos1)
-        res[i] = [
-            j for j, pos2 in enumerate(positions) if _is_same_position(
-                new_pos, pos2, position_tolerance=position_tolerance
+    def _iter_blocks(
+        self, *, real_space_operator, rotation_matrix_cartesian,
+        spin_rot_function
+    ):
+        """
+        Iterate over the sites, yielding the orbital indices of the site and
+        its image site, and the key and entries of the block which maps them.
+        """
+        with phase('repr_matrix.positions_mapping'):
+            positions_mapping = self.position_finder.get_mapping(
+                real_space_operator
             )
-        ]
-    return res
+        if not self.numeric:
+            rotation_matrix_cartesian = sp.Matrix(rotation_matrix_cartesian)
+        rotation_key = self._get_rotation_key(rotation_matrix_cartesian)
+        rotation_id = get_rotation_id(rotation_matrix_cartesian)
+
+        for site in self.sites:
+            target = positions_mapping[site[0]]
+            if not target:
+                raise ValueError(
+                    'The position {} is not mapped onto an orbital position by the real space operator.'
+                    .format(self.basis.positions[site[0]])
+                )
+            key = (
+                spin_rot_function, rotation_key,
+                tuple(self._orbital_keys[idx] for idx in site),
+                tuple(self._orbital_keys[idx] for idx in target)
+            )
+            try:
+                block = self._block_cache[key]
+                count('repr_matrix.block_cache.hits')
+            except KeyError:
+                count('repr_matrix.block_cache.misses')
+                block = self._block_cache[key] = self._get_block(
+                    site=site,
+                    target=target,
+                    rotation_matrix_cartesian=rotation_matrix_cartesian,
+                    rotation_key=rotation_key,
+                    rotation_id=rotation_id,
+                    spin_rot_function=spin_rot_function
+                )
+            yield site, target, key, block
 
+    def _rotate_function(
+        self, function, rotation_matrix_cartesian, rotation_key
+    ):
+        """
+        Applies a rotation to an orbital function. The action of the rotation
+        on the orbital functions, which is either a matrix acting on the
+        coefficient vectors or a substitution of the coordinates, is cached.
+        """
+        try:
+            function_rotation = self._function_rotations[rotation_key]
+        except KeyError:
+            if self._function_space is None:
+                function_rotation = _get_substitution(
+                    rotation_matrix_cartesian
+                )
+            else:
+                function_rotation = self._function_space.get_rotation_matrix(
+                    rotation_matrix_cartesian, numeric=self.numeric
+                )
+            self._function_rotations[rotation_key] = function_rotation
+        if self._function_space is None:
+            return function.subs(function_rotation, simultaneous=True)
+        return function_rotation @ self._function_vectors[function]
+
+    def _get_library_vector(self, function, basis, rotation_id):
+        """
+        Returns the coefficients of a rotated function with respect to the
+        given basis from the shell library, or ``None`` if the library does not
+        contain a shell of the function (under the given rotation) whose
+        functions are all part of the basis.
+        """
+        if rotation_id is None:
+            return None
+        for shell_functions, column in get_shell_library().iter_columns(
+            function, rotation_id, numeric=self.numeric
+        ):
+            if all(func in basis for func in shell_functions):
+                coefficients = dict(zip(shell_functions, column))
+                return [coefficients.get(func, 0) for func in basis]
+        return None
+
+    def _function_to_vector(self, rotated_function, basis):
+        """
+        Expresses a rotated function in terms of the given basis functions.
+        """
+        if self._function_space is None:
+            return _expr_to_vector(
+                rotated_function, basis=basis, numeric=self.numeric
+            )
+        basis = tuple(basis)
+        try:
+            projection = self._projection_cache[basis]
+        except KeyError:
+            projection = self._projection_cache[
+                basis] = self._function_space.get_projection(
+                    [self._function_vectors[function] for function in basis],
+                    numeric=self.numeric
+                )
+        if self.numeric:
+            return projection @ rotated_function
+        return tuple(
+            value.nsimplify() for value in projection @ rotated_function
+        )
 
-def _is_same_position(pos1, pos2, position_tolerance):
-    """
-    Checks if two positions are the same, up to a lattice vector.
-    """
-    return np.isclose(_pos_distance(pos1, pos2), 0, atol=position_tolerance)
+    def _get_block(  # pylint: disable=too-many-locals
+        self, *, site, target, rotation_matrix_cartesian, rotation_key,
+        rotation_id, spin_rot_function
+    ):
+        """
+        Calculates the block mapping the orbitals on a site to the orbitals on
+        its image site. The block is returned as a list of (row, column, value)
+        entries, where the row and column are positions in the list of orbitals
+        on the image and initial site, respectively.
+        """
+        numeric = self.numeric
+        functions = self.basis.functions
+        block = []
+        for col, orbital_idx in enumerate(site):
+            function = functions[self._function_indices[orbital_idx]]
+            spin = OrbitalBasis.SPINS[self._spin_indices[orbital_idx]]
+            spin_key = (spin_rot_function, rotation_key, spin)
+            try:
+                spin_res = self._spin_cache[spin_key]
+            except KeyError:
+                with phase('repr_matrix.spin_rotation'):
+                    spin_res = self._spin_cache[spin_key] = spin_rot_function(
+                        rotation_matrix_cartesian=rotation_matrix_cartesian,
+                        spin=spin,
+                        numeric=numeric
+                    )
+
+            new_func = None
+            for new_spin, spin_value in spin_res.items():
+                new_spin_idx = OrbitalBasis.SPINS.index(new_spin)
+                rows_reduced = [
+                    row for row, idx in enumerate(target)
+                    if self._spin_indices[idx] == new_spin_idx
+                ]
+                func_basis_reduced = [
+                    functions[self._function_indices[target[row]]]
+                    for row in rows_reduced
+                ]
+                func_vec = self._get_library_vector(
+                    function, func_basis_reduced, rotation_id
+                )
+                if func_vec is None:
+                    count('repr_matrix.shell_library.misses')
+                    if new_func is None:
+                        with phase('repr_matrix.substitution'):
+                            new_func = self._rotate_function(
+                                function, rotation_matrix_cartesian,
+                                rotation_key
+                            )
+                    with phase('repr_matrix.expr_to_vector'):
+                        func_vec = self._function_to_vector(
+                            new_func, basis=func_basis_reduced
+                        )
+                else:
+                    count('repr_matrix.shell_library.hits')
+                func_vec_norm = la.norm(np.array(func_vec).astype(complex))
+                if not np.isclose(func_vec_norm, 1):
+                    if new_func is None:
+                        new_func = self._rotate_function(
+                            function, rotation_matrix_cartesian, rotation_key
+                        )
+                    if self._function_space is not None:
+                        new_func = self._function_space.to_expression(new_func)
+                    raise ValueError(
+                        'Norm {} of vector {} for expression {} created from orbital {} is not one.\nCartesian rotation matrix: {}'
+                        .format(
+                            func_vec_norm, func_vec, new_func,
+                            self.basis[orbital_idx], rotation_matrix_cartesian
+                        )
+                    )
+                for row, func_value in zip(rows_reduced, func_vec):
+                    block.append((row, col, func_value * spin_value))
+        return block
 
 
-def _pos_distance(pos1, pos2):
+def _get_positions_mapping(orbitals, real_space_operator, position_tolerance):
     """
-    Returns the periodic distance between two positions.
+    Calculates the mapping from initial to final positions, given the orbital
+    basis and real space operator.
     """
-    delta = np.array(pos1).astype(float).flatten(
-    ) - np.array(pos2).astype(float).flatten()
-    delta %= 1
-    return la.norm(np.array(np.minimum(delta, 1 - delta)).astype(float))
+    return _PositionFinder(
+        positions=[orbital.position for orbital in orbitals],
+        position_tolerance=position_tolerance
+    ).get_mapping(real_space_operator)
 
 
 def _apply_spin_time_reversal(rotation_matrix_cartesian, spin, numeric):
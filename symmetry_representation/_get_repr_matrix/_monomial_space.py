@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Defines the representation of polynomial orbital functions as coefficient
+vectors with respect to the monomials in the cartesian coordinates, and the
+action of rotations on these vectors.
+"""
+
+import itertools
+
+import numpy as np
+import sympy as sp
+
+from ._expr_utils import VEC
+
+
+class _MonomialSpace:
+    """
+    Space of polynomials in the cartesian coordinates up to a given degree. A
+    polynomial is described by its coefficients with respect to the monomials,
+    which are ordered by their degree.
+
+    Since a rotation maps the monomials of a given degree onto polynomials of
+    the same degree, its action on the space is block-diagonal. The block of
+    degree ``k`` is the ``k``-th symmetric tensor power of the rotation matrix.
+
+    Arguments
+    ---------
+    max_degree : int
+        The maximum degree of the polynomials.
+    """
+    def __init__(self, max_degree):
+        self.max_degree = max_degree
+        self.monomials = [
+            exponents for degree in range(max_degree + 1)
+            for exponents in _get_exponents(degree)
+        ]
+        self._indices = {
+            exponents: i
+            for i, exponents in enumerate(self.monomials)
+        }
+        size = len(self.monomials)
+        # Each monomial of non-zero degree is written as the product of a
+        # lower-degree monomial and one of the coordinates. The 'shift'
+        # matrices implement the multiplication by a coordinate.
+        self._shift_matrices = np.zeros((len(VEC), size, size), dtype=int)
+        self._factorizations = []
+        for i, exponents in enumerate(self.monomials):
+            degree = sum(exponents)
+            for var_idx in range(len(VEC)):
+                if degree < max_degree:
+                    self._shift_matrices[
+                        var_idx, self._indices[_increase(exponents, var_idx)],
+                        i] = 1
+            if degree > 0:
+                var_idx = next(
+                    idx for idx, exp in enumerate(exponents) if exp > 0
+                )
+                self._factorizations.append((
+                    i, self._indices[_increase(exponents, var_idx,
+                                               -1)], var_idx
+                ))
+
+    @classmethod
+    def from_expressions(cls, expressions):
+        """
+        Create the space containing the given expressions. Returns ``None`` if
+        any of the expressions is not a polynomial in the cartesian
+        coordinates.
+        """
+        max_degree = 0
+        for expr in expressions:
+            poly = _to_poly(expr)
+            if poly is None:
+                return None
+            max_degree = max(max_degree, poly.total_degree())
+        return cls(max_degree=max_degree)
+
+    def __len__(self):
+        return len(self.monomials)
+
+    def to_vector(self, expr, *, numeric):
+        """
+        Returns the coefficient vector of a polynomial expression.
+        """
+        poly = _to_poly(expr)
+        if poly is None:
+            raise ValueError(
+                "Expression '{}' is not a polynomial in {}.".format(expr, VEC)
+            )
+        if numeric:
+            res = np.zeros(len(self), dtype=complex)
+        else:
+            res = sp.zeros(len(self), 1)
+        for exponents, coeff in poly.terms():
+            try:
+                index = self._indices[exponents]
+            except KeyError as exc:
+                raise ValueError(
+                    "The degree of expression '{}' exceeds the maximum degree {}."
+                    .format(expr, self.max_degree)
+                ) from exc
+            res[index] = complex(coeff) if numeric else coeff
+        return res
+
+    def to_expression(self, vector):
+        """
+        Returns the polynomial expression for a coefficient vector.
+        """
+        return sum((
+            coeff * sp.Mul(*(var**exp for var, exp in zip(VEC, exponents)))
+            for coeff, exponents in zip(vector, self.monomials)
+        ), sp.Integer(0))
+
+    def get_rotation_matrix(self, rotation_matrix_cartesian, *, numeric):
+        """
+        Returns the matrix which maps the coefficient vector of a function
+        ``f`` onto that of the rotated function ``f(R^T r)``.
+        """
+        if numeric:
+            rot = np.array(rotation_matrix_cartesian, dtype=float)
+            res = np.zeros((len(self), len(self)))
+        else:
+            rot = np.array(
+                sp.Matrix(rotation_matrix_cartesian).tolist(), dtype=object
+            )
+            res = np.zeros((len(self), len(self)), dtype=object)
+            res[:] = sp.Integer(0)
+        res[0, 0] = 1
+        # The rotated coordinate 'var_idx' is sum_j R[j, var_idx] * x_j, which
+        # multiplies the (already rotated) lower-degree monomial.
+        for i, lower_idx, var_idx in self._factorizations:
+            res[:, i] = sum(
+                rot[j, var_idx] *
+                (self._shift_matrices[j] @ res[:, lower_idx])
+                for j in range(len(VEC))
+            )
+        if numeric:
+            return res
+        return sp.Matrix(res)
+
+    def get_projection(self, basis_vectors, *, numeric):
+        """
+        Returns the matrix which maps a coefficient vector onto its
+        (least-squares) coefficients with respect to the given basis.
+        """
+        if numeric:
+            return np.linalg.pinv(np.array(basis_vectors).T)
+        basis_matrix = sp.Matrix.hstack(*basis_vectors)
+        gram_matrix = basis_matrix.H @ basis_matrix
+        if gram_matrix.det() == 0:
+            raise ValueError(
+                'The basis functions {} are not linearly independent.'.format([
+                    self.to_expression(vec) for vec in basis_vectors
+                ])
+            )
+        return gram_matrix.inv() @ basis_matrix.H
+
+
+def _get_exponents(degree):
+    """
+    Returns the exponents of all monomials of the given degree.
+    """
+    return sorted((
+        exponents
+        for exponents in itertools.product(range(degree + 1), repeat=len(VEC))
+        if sum(exponents) == degree
+    ),
+                  reverse=True)
+
+
+def _increase(exponents, var_idx, value=1):
+    """
+    Changes the exponent of one variable.
+    """
+    res = list(exponents)
+    res[var_idx] += value
+    return tuple(res)
+
+
+def _to_poly(expr):
+    """
+    Converts an expression to a polynomial in the cartesian coordinates, or
+    returns ``None`` if it is not a polynomial.
+    """
+    try:
+        poly = sp.Poly(expr, *VEC)
+    except sp.PolynomialError:
+        return None
+    if poly.free_symbols - set(VEC):
+        return None
+    return poly
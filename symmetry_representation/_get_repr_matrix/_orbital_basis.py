@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Defines the orbital basis, which stores the orbitals in columnar form.
+"""
+
+from functools import lru_cache
+from collections.abc import Sequence
+
+import numpy as np
+import sympy as sp
+from scipy import spatial
+from fsc.export import export
+
+from .._sym_op import RealSpaceOperator
+from ._orbitals import Orbital
+from ._orbital_constants import WANNIER_ORBITALS, NO_SPIN, SPIN_UP, SPIN_DOWN
+
+
+@export
+class OrbitalBasis(Sequence):
+    """
+    Defines a basis of orbitals. Instead of separate :class:`.Orbital`
+    instances, the basis stores the positions of the sites, and for each
+    orbital the indices of its site, function, shell and spin. Indexing the
+    basis returns the corresponding :class:`.Orbital`, such that it can be
+    used in place of a list of orbitals.
+
+    Arguments
+    ---------
+    site_positions : array
+        Positions of the sites, in reduced coordinates.
+    site_indices : array
+        Index of the site of each orbital.
+    function_strings : list(str)
+        Strings describing the distinct orbital functions.
+    function_indices : array
+        Index of the function of each orbital.
+    spin_indices : array
+        Index of the spin of each orbital, in :attr:`SPINS`.
+    shells : list(str), optional
+        Names of the shells.
+    shell_indices : array, optional
+        Index of the shell of each orbital, or ``-1`` if the shell is not
+        known.
+    """
+
+    SPINS = (NO_SPIN, SPIN_UP, SPIN_DOWN)
+    _BLOCK_KEYS = ('site', 'shell', 'spin')
+
+    def __init__(
+        self,
+        *,
+        site_positions,
+        site_indices,
+        function_strings,
+        function_indices,
+        spin_indices,
+        shells=(),
+        shell_indices=None
+    ):
+        self.site_positions = np.array(site_positions, dtype=float) % 1
+        self.site_indices = np.array(site_indices, dtype=int).reshape(-1)
+        self.positions = self.site_positions[self.site_indices]
+        size = len(self.site_indices)
+
+        # function strings which describe the same function are merged
+        function_table = {}
+        function_map = []
+        self.function_strings = []
+        for function_string in function_strings:
+            function = _sympify(function_string)
+            if function not in function_table:
+                function_table[function] = len(function_table)
+                self.function_strings.append(function_string)
+            function_map.append(function_table[function])
+        self.function_strings = tuple(self.function_strings)
+        self.functions = tuple(function_table)
+        self.function_indices = np.array(function_map, dtype=int)[
+            np.array(function_indices, dtype=int).reshape(-1)]
+
+        self.spin_indices = np.array(spin_indices, dtype=int).reshape(-1)
+        self.shells = tuple(shells)
+        if shell_indices is None:
+            shell_indices = -np.ones(size, dtype=int)
+        self.shell_indices = np.array(shell_indices, dtype=int).reshape(-1)
+        for name in ['function_indices', 'spin_indices', 'shell_indices']:
+            if len(getattr(self, name)) != size:
+                raise ValueError(
+                    "The length {} of '{}' does not match the number of orbitals {}."
+                    .format(len(getattr(self, name)), name, size)
+                )
+        if np.any((self.spin_indices < 0)
+                  | (self.spin_indices >= len(self.SPINS))):
+            raise ValueError(
+                'Invalid spin indices, must be between 0 and {}.'.
+                format(len(self.SPINS) - 1)
+            )
+
+    @classmethod
+    def from_orbitals(cls, orbitals, *, position_tolerance=1e-4):
+        """
+        Create the basis from a list of orbitals. Orbitals whose positions
+        are the same (up to a lattice vector) are assigned to the same site.
+
+        Arguments
+        ---------
+        orbitals : List(Orbital)
+            The basis orbitals.
+        position_tolerance : float
+            Absolute distance between positions (in reciprocal units) for
+            which they are still considered to be the same position.
+        """
+        orbitals = list(orbitals)
+        site_positions = []
+        site_indices = np.zeros(len(orbitals), dtype=int)
+        if orbitals:
+            positions = [orbital.position for orbital in orbitals]
+            same_position_mapping = _PositionFinder(
+                positions=positions, position_tolerance=position_tolerance
+            ).get_mapping(
+                RealSpaceOperator(rotation_matrix=np.eye(len(positions[0])))
+            )
+            assigned = set()
+            for i in range(len(orbitals)):
+                if i not in assigned:
+                    site = same_position_mapping[i]
+                    assigned.update(site)
+                    site_indices[site] = len(site_positions)
+                    site_positions.append(positions[i])
+        function_table = {}
+        function_strings = []
+        function_indices = []
+        for orbital in orbitals:
+            if orbital.function not in function_table:
+                function_table[orbital.function] = len(function_table)
+                function_strings.append(orbital.function_string)
+            function_indices.append(function_table[orbital.function])
+        spin_indices = []
+        for orbital in orbitals:
+            try:
+                spin_indices.append(cls.SPINS.index(orbital.spin))
+            except ValueError as exc:
+                raise NotImplementedError(
+                    'Spins larger than 1/2 are not implemented.'
+                ) from exc
+        return cls(
+            site_positions=np.array(site_positions
+                                    ).reshape(len(site_positions), -1),
+            site_indices=site_indices,
+            function_strings=function_strings,
+            function_indices=function_indices,
+            spin_indices=spin_indices
+        )
+
+    @classmethod
+    def from_structure(cls, structure, shells, *, spin=False):
+        """
+        Create the basis for a structure, given the shells on each site. The
+        orbitals are ordered by spin (if enabled), then by site, and then as
+        given by :data:`.WANNIER_ORBITALS`.
+
+        Arguments
+        ---------
+        structure : pymatgen.Structure
+            The crystal structure.
+        shells : dict
+            Mapping from species names or site indices to the list of shells
+            (keys of :data:`.WANNIER_ORBITALS`) on the corresponding sites.
+        spin : bool
+            Determines whether both spin up and spin down orbitals, or
+            orbitals without spin are created.
+        """
+        species = [site.species_string for site in structure]
+        for key, shell_names in shells.items():
+            if key not in species and key not in range(len(species)):
+                raise ValueError(
+                    "No site matches the key '{}' of the shells.".format(key)
+                )
+            for name in shell_names:
+                if name not in WANNIER_ORBITALS:
+                    raise ValueError(
+                        "Unknown orbital shell '{}', must be one of {}.".
+                        format(name, sorted(WANNIER_ORBITALS))
+                    )
+        shell_table = {}
+        function_table = {}
+        site_indices = []
+        function_indices = []
+        shell_indices = []
+        for i, species_name in enumerate(species):
+            for name in list(shells.get(i, [])
+                             ) + list(shells.get(species_name, [])):
+                shell_index = shell_table.setdefault(name, len(shell_table))
+                for function_string in WANNIER_ORBITALS[name]:
+                    site_indices.append(i)
+                    function_indices.append(
+                        function_table.setdefault(
+                            function_string, len(function_table)
+                        )
+                    )
+                    shell_indices.append(shell_index)
+        spin_values = [1, 2] if spin else [0]
+        return cls(
+            site_positions=structure.frac_coords,
+            site_indices=np.tile(site_indices, len(spin_values)),
+            function_strings=list(function_table),
+            function_indices=np.tile(function_indices, len(spin_values)),
+            spin_indices=np.repeat(spin_values, len(site_indices)),
+            shells=list(shell_table),
+            shell_indices=np.tile(shell_indices, len(spin_values))
+        )
+
+    def __len__(self):
+        return len(self.site_indices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if not -len(self) <= index < len(self):
+            raise IndexError('Orbital index out of range.')
+        return Orbital(
+            position=self.positions[index],
+            function_string=self.function_strings[self.function_indices[index]
+                                                  ],
+            spin=self.SPINS[self.spin_indices[index]]
+        )
+
+    def get_block_indices(self, *keys):
+        """
+        Returns the indices of the orbitals grouped by their site, shell
+        and / or spin. The result is a dictionary which maps the tuple of
+        (site, shell, spin) indices, in the order given by ``keys``, to the
+        array of orbital indices. The groups are ordered by their first
+        orbital.
+
+        Arguments
+        ---------
+        keys : str
+            The properties by which the orbitals are grouped, out of
+            ``'site'``, ``'shell'`` and ``'spin'``. By default, the orbitals
+            are grouped by all three properties.
+        """
+        if not keys:
+            keys = self._BLOCK_KEYS
+        for key in keys:
+            if key not in self._BLOCK_KEYS:
+                raise ValueError(
+                    "Invalid key '{}', must be one of {}.".format(
+                        key, self._BLOCK_KEYS
+                    )
+                )
+        if not len(self):
+            return {}
+        columns = np.stack([getattr(self, key + '_indices') for key in keys],
+                           axis=1)
+        _, first_indices, inverse = np.unique(
+            columns, axis=0, return_index=True, return_inverse=True
+        )
+        inverse = inverse.reshape(-1)
+        return {
+            tuple(int(value) for value in columns[first_indices[group]]):
+            np.flatnonzero(inverse == group)
+            for group in np.argsort(first_indices)
+        }
+
+
+@lru_cache(maxsize=None)
+def _sympify(function_string):
+    """
+    Converts a function string to a sympy expression. Since the same strings
+    are used for many bases, the result is cached.
+    """
+    return sp.sympify(function_string)
+
+
+class _PositionFinder:
+    """
+    Finds the indices of positions which are the same as a given position, up
+    to a lattice vector. A periodic k-d tree is used, such that the lookup does
+    not scale with the number of positions.
+    """
+    def __init__(self, positions, position_tolerance):
+        self.positions = np.array(positions
+                                  ).astype(float).reshape(len(positions), -1)
+        self.position_tolerance = position_tolerance
+        self._tree = spatial.cKDTree(_to_unit_cell(self.positions), boxsize=1.)
+
+    def get_mapping(self, real_space_operator):
+        """
+        Calculates the mapping from initial to final positions, given the
+        real space operator.
+        """
+        rotation_matrix = np.array(real_space_operator.rotation_matrix
+                                   ).astype(float)
+        translation_vector = np.array(real_space_operator.translation_vector
+                                      ).astype(float).flatten()
+        new_positions = self.positions @ rotation_matrix.T + translation_vector
+        return dict(
+            enumerate(
+                sorted(indices) for indices in self._tree.query_ball_point(
+                    _to_unit_cell(new_positions), r=self.position_tolerance
+                )
+            )
+        )
+
+
+def _to_unit_cell(positions):
+    """
+    Maps the given positions to the half-open unit cell.
+    """
+    positions = positions % 1
+    # positions very close to one can be mapped to exactly one by the modulo
+    positions[positions >= 1] = 0
+    return positions
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Defines the library of precomputed blocks for the :data:`.WANNIER_ORBITALS`
+shells under the crystallographic rotations in their standard cartesian
+settings. The library is stored in a data file which is distributed with the
+package, and loaded on first use.
+
+The data file can be re-created with
+``python -m symmetry_representation._get_repr_matrix._shell_library``.
+"""
+
+import os
+import itertools
+from functools import lru_cache
+
+import h5py
+import numpy as np
+import sympy as sp
+
+from .. import _exact_encoding
+from ._orbital_constants import WANNIER_ORBITALS
+from ._monomial_space import _MonomialSpace
+
+LIBRARY_VERSION = 1
+LIBRARY_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'data', 'shell_blocks.hdf5'
+)
+
+_LIBRARY = None
+
+
+def get_shell_library():
+    """
+    Returns the shell library, which is loaded on the first call.
+    """
+    global _LIBRARY  # pylint: disable=global-statement
+    if _LIBRARY is None:
+        _LIBRARY = _ShellLibrary.from_file(LIBRARY_PATH)
+    return _LIBRARY
+
+
+def get_rotation_id(rotation_matrix_cartesian):
+    """
+    Returns the canonical identifier of a rotation matrix, or ``None`` if the
+    matrix is not of the form of a crystallographic rotation in a standard
+    setting. The entries of such matrices are 0, +-1/2, +-sqrt(3)/2 or +-1,
+    and are identified by their signed squares.
+    """
+    try:
+        rot = np.array(rotation_matrix_cartesian, dtype=float)
+    except TypeError:
+        return None
+    if rot.shape != (3, 3):
+        return None
+    code = np.round(4 * np.sign(rot) * rot**2).astype(int)
+    if not np.allclose(np.sign(code) * np.sqrt(np.abs(code) / 4), rot):
+        return None
+    return ','.join(str(value) for value in code.ravel())
+
+
+@lru_cache(maxsize=None)
+def get_standard_rotations():
+    """
+    Returns the (exact) rotation matrices of the cubic and hexagonal point
+    groups, which contain all crystallographic point groups in their standard
+    cartesian settings. The result is cached, and must not be modified.
+    """
+    rotations = []
+    for permutation in itertools.permutations(range(3)):
+        for signs in itertools.product([1, -1], repeat=3):
+            rot = sp.zeros(3, 3)
+            for i, (j, sign) in enumerate(zip(permutation, signs)):
+                rot[i, j] = sign
+            rotations.append(rot)
+    c6z = sp.Matrix([[sp.Rational(1, 2), -sp.sqrt(3) / 2, 0],
+                     [sp.sqrt(3) / 2, sp.Rational(1, 2), 0], [0, 0, 1]])
+    mirror_y = sp.diag(1, -1, 1)
+    for k in range(6):
+        for rot in [c6z**k, c6z**k @ mirror_y]:
+            rotations.extend([rot, -rot])
+    res = {}
+    for rot in rotations:
+        res.setdefault(get_rotation_id(rot), sp.ImmutableMatrix(rot))
+    return res
+
+
+def compute_shell_block(function_strings, rotation_matrix_cartesian):
+    """
+    Computes the exact block of a shell under a rotation, such that the
+    rotated function ``j`` is ``sum_i block[i, j] * function_i``. Returns
+    ``None`` if the rotated functions are not contained in the span of the
+    shell.
+    """
+    functions = [sp.sympify(function) for function in function_strings]
+    space = _MonomialSpace.from_expressions(functions)
+    vectors = [
+        space.to_vector(function, numeric=False) for function in functions
+    ]
+    basis_matrix = sp.Matrix.hstack(*vectors)
+    rotated = space.get_rotation_matrix(
+        rotation_matrix_cartesian, numeric=False
+    ) @ basis_matrix
+    block = (space.get_projection(vectors, numeric=False)
+             @ rotated).applyfunc(lambda value: sp.expand(sp.radsimp(value)))
+    if (basis_matrix @ block -
+        rotated).applyfunc(sp.expand) != sp.zeros(*rotated.shape):
+        return None
+    return block
+
+
+def create_shell_library(file_path=LIBRARY_PATH):
+    """
+    Computes the blocks of all shells under the standard rotations, and writes
+    them to the given file.
+    """
+    rotations = get_standard_rotations()
+    with h5py.File(file_path, 'w') as hdf5_handle:
+        hdf5_handle.attrs['library_version'] = LIBRARY_VERSION
+        for shell_name, function_strings in sorted(WANNIER_ORBITALS.items()):
+            rotation_ids = []
+            blocks = []
+            for rotation_id, rot in sorted(rotations.items()):
+                block = compute_shell_block(function_strings, rot)
+                if block is not None:
+                    rotation_ids.append(rotation_id)
+                    blocks.append(np.array(block.tolist(), dtype=object))
+            shell_handle = hdf5_handle.create_group(shell_name)
+            shell_handle.create_dataset(
+                'function_strings',
+                data=np.array(function_strings, dtype=object),
+                dtype=h5py.string_dtype()
+            )
+            shell_handle.create_dataset(
+                'rotation_ids',
+                data=np.array(rotation_ids, dtype=object),
+                dtype=h5py.string_dtype()
+            )
+            shell_handle['numeric'] = np.array(blocks).astype(complex)
+            _exact_encoding.write(
+                np.array(blocks), shell_handle.create_group('exact')
+            )
+
+
+class _ShellLibrary:
+    """
+    Contains the precomputed blocks of the shells. The analytic blocks are
+    decoded only when they are first accessed.
+
+    Arguments
+    ---------
+    shells : dict
+        The functions (as sympy expressions) of each shell.
+    rotation_ids : dict
+        For each shell, the identifiers of the rotations under which the
+        shell is closed.
+    numeric_blocks : dict
+        For each shell, the stacked numeric blocks.
+    exact_blocks : dict
+        For each shell, a function which returns the stacked analytic blocks.
+    """
+    def __init__(self, *, shells, rotation_ids, numeric_blocks, exact_blocks):
+        self.shells = shells
+        self._rotation_indices = {
+            shell_name: {
+                rotation_id: i
+                for i, rotation_id in enumerate(rotation_ids[shell_name])
+            }
+            for shell_name in shells
+        }
+        self._numeric_blocks = numeric_blocks
+        self._exact_blocks = exact_blocks
+        self._function_shells = {}
+        for shell_name, functions in sorted(shells.items()):
+            for function in functions:
+                self._function_shells.setdefault(function,
+                                                 []).append(shell_name)
+
+    @classmethod
+    def from_file(cls, file_path):
+        """
+        Load the library from the given file.
+        """
+        with h5py.File(file_path, 'r') as hdf5_handle:
+            library_version = hdf5_handle.attrs['library_version']
+            if library_version != LIBRARY_VERSION:
+                raise ValueError(
+                    'Shell library version {} does not match the expected version {}.'
+                    .format(library_version, LIBRARY_VERSION)
+                )
+            shells = {}
+            rotation_ids = {}
+            numeric_blocks = {}
+            exact_blocks = {}
+            for shell_name, shell_handle in hdf5_handle.items():
+                shells[shell_name] = tuple(
+                    sp.sympify(function.decode('utf-8'))
+                    for function in shell_handle['function_strings']
+                )
+                rotation_ids[shell_name] = [
+                    rotation_id.decode('utf-8')
+                    for rotation_id in shell_handle['rotation_ids']
+                ]
+                numeric_blocks[shell_name] = np.array(shell_handle['numeric'])
+                exact_blocks[shell_name] = _LazyExactBlocks({
+                    key: np.array(value)
+                    for key, value in shell_handle['exact'].items()
+                })
+        return cls(
+            shells=shells,
+            rotation_ids=rotation_ids,
+            numeric_blocks=numeric_blocks,
+            exact_blocks=exact_blocks
+        )
+
+    def iter_columns(self, function, rotation_id, *, numeric):
+        """
+        Iterate over the shells which contain the given function and are
+        closed under the given rotation. Yields the functions of the shell,
+        and the coefficients of the rotated function with respect to them.
+        """
+        for shell_name in self._function_shells.get(function, []):
+            try:
+                index = self._rotation_indices[shell_name][rotation_id]
+            except KeyError:
+                continue
+            functions = self.shells[shell_name]
+            if numeric:
+                block = self._numeric_blocks[shell_name][index]
+            else:
+                block = self._exact_blocks[shell_name]()[index]
+            yield functions, block[:, functions.index(function)]
+
+
+class _LazyExactBlocks:
+    """
+    Decodes the encoded analytic blocks of a shell on the first call.
+    """
+    def __init__(self, encoded):
+        self._encoded = encoded
+        self._decoded = None
+
+    def __call__(self):
+        if self._decoded is None:
+            self._decoded = _exact_encoding.decode(**self._encoded)
+        return self._decoded
+
+
+if __name__ == '__main__':
+    create_shell_library()
@@ -11,7 +11,6 @@ Defines the function for getting the spin representation of rotations.
 
 import numpy as np
 import sympy as sp
-import scipy.linalg as la
 
 
 def _spin_reps(rotation_matrix_cartesian, numeric):
@@ -33,73 +32,96 @@ def _spin_reps_numeric(rotation_matrix_cartesian):
     Generate the spin representation matrices for the case of numeric (numpy array)
     output.
     """
+    return _spin_reps_numeric_batched(
+        np.asarray(rotation_matrix_cartesian, dtype=float)[np.newaxis]
+    )[0]
 
-    # general representation of the D1/2 rotation about the axis (l,m,n) around the
-    # angle phi
-    rot = rotation_matrix_cartesian
 
-    def D12(l, m, n, phi):
-        return np.array([[
-            np.cos(phi / 2.) - 1j * n * np.sin(phi / 2.),
-            (-1j * l - m) * np.sin(phi / 2.)
-        ],
-                         [(-1j * l + m) * np.sin(phi / 2.),
-                          np.cos(phi / 2.) + 1j * n * np.sin(phi / 2.)]])
+def _spin_reps_numeric_batched(rotation_matrices_cartesian):  # pylint: disable=too-many-locals
+    """
+    Generate the spin representation matrices for a stack of (proper or
+    improper) rotation matrices, of shape (G, 3, 3). The result has shape
+    (G, 2, 2).
 
-    n = np.zeros(3)
-    tr_unclipped = np.trace(rot)
+    Improper rotations are first multiplied by -1, because spin is a
+    pseudovector. The spin matrix ``w - i (x, y, z) . sigma`` is then given by
+    the unit quaternion ``(w, x, y, z)`` of the proper rotation. The sign of the
+    quaternion (which is not fixed by the rotation) is chosen as follows:
+
+    * For rotations by an angle smaller than pi, ``w`` is positive.
+    * For the improper counterparts of these rotations, ``w`` is negative,
+      because they are treated as a rotation followed by a reflection. The
+      exception is the inversion, which does not act on spin.
+    * For rotations by pi (and reflections), ``w`` is zero and the axis is the
+      eigenvector returned by LAPACK.
+    """
+    rot = np.asarray(rotation_matrices_cartesian, dtype=float)
     det = np.round(np.linalg.det(rot), 5)
-    if det == 1.:  # rotations
-        tr = max(min(tr_unclipped, 3), -1)
-        if not np.isclose(tr, tr_unclipped):
-            raise ValueError(
-                f"Rotation matrix has an invalid trace {tr_unclipped}."
+    if not np.all(np.abs(det) == 1):
+        raise ValueError(
+            'Rotation matrices have invalid determinants {}.'.format(
+                det[np.abs(det) != 1]
             )
-        theta = np.arccos(0.5 * (tr - 1.))  # pylint: disable=assignment-from-no-return,useless-suppression
-        if theta != 0:
-            n[0] = rot[2, 1] - rot[1, 2]
-            n[1] = rot[0, 2] - rot[2, 0]
-            n[2] = rot[1, 0] - rot[0, 1]
-            if np.round(
-                np.linalg.norm(n), 5
-            ) == 0.:  # theta = pi, that is C2 rotations
-                e, v = la.eig(rot)
-                n = v[:, list(np.round(e, 10)).index(1.)]
-                spin = np.round(D12(n[0], n[1], n[2], np.pi), 15)
-            else:
-                n /= np.linalg.norm(n)
-                spin = np.round(D12(n[0], n[1], n[2], theta), 15)
-        else:  # case of unity
-            spin = D12(0, 0, 0, 0)
-    elif det == -1.:  # improper rotations and reflections
-        tr = max(min(tr_unclipped, 1), -3)
-        if not np.isclose(tr, tr_unclipped):
+        )
+    proper_rot = det[:, np.newaxis, np.newaxis] * rot
+    tr_unclipped = np.trace(proper_rot, axis1=1, axis2=2)
+    tr = np.clip(tr_unclipped, -1, 3)
+    if not np.allclose(tr, tr_unclipped):
+        raise ValueError(
+            'Rotation matrices have invalid traces {}.'.format(
+                det * tr_unclipped
+            )
+        )
+    # axial vector of the antisymmetric part, which is 2 * sin(theta) * n
+    axial = np.stack([
+        proper_rot[:, 2, 1] - proper_rot[:, 1, 2],
+        proper_rot[:, 0, 2] - proper_rot[:, 2, 0],
+        proper_rot[:, 1, 0] - proper_rot[:, 0, 1],
+    ],
+                     axis=-1)
+    is_identity = np.round(np.arccos(0.5 * (tr - 1.)), 5) == 0  # pylint: disable=assignment-from-no-return,useless-suppression
+    is_half_turn = (
+        np.round(np.linalg.norm(axial, axis=-1), 5) == 0
+    ) & ~is_identity
+
+    # quaternion of the proper rotation, with positive w
+    quat_w = 0.5 * np.sqrt(1. + tr)
+    quat_xyz = np.zeros_like(axial)
+    is_generic = ~is_half_turn
+    quat_xyz[is_generic] = (
+        axial[is_generic] / (4. * quat_w[is_generic, np.newaxis])
+    )
+    quat_xyz[is_identity] = 0.
+
+    # for rotations by pi, the axis is the eigenvector of the original matrix
+    # to the eigenvalue det = +-1
+    if np.any(is_half_turn):
+        eigvals, eigvecs = np.linalg.eig(rot[is_half_turn])
+        eigval_distance = np.abs(eigvals - det[is_half_turn, np.newaxis])
+        eigval_idx = np.argmin(eigval_distance, axis=-1)
+        min_distance = eigval_distance[np.arange(len(eigval_idx)), eigval_idx]
+        if np.any(min_distance > 1e-5):
             raise ValueError(
-                f"Rotation matrix has an invalid trace {tr_unclipped}."
+                'Rotation matrices {} have no eigenvalue matching their determinant.'
+                .format(rot[is_half_turn][min_distance > 1e-5])
             )
-        theta = np.arccos(0.5 * (tr + 1.))  # pylint: disable=assignment-from-no-return,useless-suppression
-        if np.round(theta, 5) != np.round(np.pi, 5):
-            n[0] = rot[2, 1] - rot[1, 2]
-            n[1] = rot[0, 2] - rot[2, 0]
-            n[2] = rot[1, 0] - rot[0, 1]
-            if np.round(np.linalg.norm(n), 5) == 0.:  # theta = 0 (reflection)
-                e, v = la.eig(rot)
-                # normal vector is eigenvector to eigenvalue -1
-                n = v[:, list(np.round(e, 10)).index(-1.)]
-                # spin is a pseudovector!
-                spin = np.round(D12(n[0], n[1], n[2], np.pi), 15)
-            else:
-                n /= np.linalg.norm(n)
-                # rotation followed by reflection:
-                spin = np.round(
-                    np.dot(
-                        D12(n[0], n[1], n[2], np.pi),
-                        D12(n[0], n[1], n[2], theta)
-                    ), 15
-                )
-        else:  # case of inversion (does not do anything to spin)
-            spin = D12(0, 0, 0, 0)
-    return np.array(spin)
+        axes = np.real(eigvecs[np.arange(len(eigval_idx)), :, eigval_idx])
+        quat_xyz[is_half_turn
+                 ] = axes / np.linalg.norm(axes, axis=-1, keepdims=True)
+        quat_w[is_half_turn] = 0.
+
+    # improper rotations are a rotation followed by a reflection
+    flip_sign = (det == -1) & ~is_identity & ~is_half_turn
+    quat_w[flip_sign] *= -1
+    quat_xyz[flip_sign] *= -1
+
+    quat_x, quat_y, quat_z = quat_xyz.T
+    spin = np.empty((len(rot), 2, 2), dtype=complex)
+    spin[:, 0, 0] = quat_w - 1j * quat_z
+    spin[:, 0, 1] = -1j * quat_x - quat_y
+    spin[:, 1, 0] = -1j * quat_x + quat_y
+    spin[:, 1, 1] = quat_w + 1j * quat_z
+    return np.round(spin, 15)
 
 
 def _spin_reps_analytic(rotation_matrix_cartesian):  # pylint: disable=too-many-branches
@@ -123,7 +145,7 @@ def _spin_reps_analytic(rotation_matrix_cartesian):  # pylint: disable=too-many-
     n = sp.zeros(3, 1)
     tr = rot.trace()
     det = rot.det()
-    if det == 1.:  # rotations
+    if det == 1:  # rotations
         theta = sp.acos(sp.Rational(1, 2) * (tr - 1))
         if theta != 0:
             n[0] = rot[2, 1] - rot[1, 2]
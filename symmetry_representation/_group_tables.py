@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Defines the multiplication table, conjugacy classes and character table of a
+symmetry group. The elements are identified by integer keys of their
+real-space operation, such that no products of symmetry operations need to be
+created.
+
+If the representation matrices fulfil :math:`D(g) D(h) = \\pm D(gh)` (as is
+the case for half-integer spins), the characters are calculated for the
+double group. Its elements are :math:`(g, \\pm 1)`, with representation
+matrices :math:`\\pm D(g)`, and are labelled by the indices :math:`i` and
+:math:`i + G` for the symmetry :math:`g_i`.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+from fsc.export import export
+
+from ._cosets import _DECIMALS
+from ._block_matrix import _round_complex
+
+# tolerance for the signs, characters and multiplicities, which are integer or
+# given by roots of unity
+_TOLERANCE = 1e-6
+# number of random class sums for which the character table is attempted
+_MAX_ATTEMPTS = 5
+
+CharacterTable = namedtuple('CharacterTable', ['classes', 'characters'])
+export(CharacterTable)
+
+
+class _GroupTables:
+    """
+    Calculates the multiplication table, conjugacy classes and characters of
+    a symmetry group. The results are calculated only when they are first
+    needed.
+
+    Arguments
+    ---------
+    packed_group : PackedSymmetryGroup
+        The symmetry group. It must contain all elements of the group, not just
+        its generators.
+    """
+    def __init__(self, packed_group):
+        self._rotation_matrices = np.array(
+            packed_group.rotation_matrices, dtype=float
+        )
+        self._translation_vectors = np.array(
+            packed_group.translation_vectors, dtype=float
+        ).reshape(len(self._rotation_matrices), -1)
+        self._repr_matrices = packed_group.repr_matrices
+        self._repr_has_cc = np.array(packed_group.repr_has_cc, dtype=bool)
+        self._multiplication_table = None
+        self._conjugacy_classes = None
+        self._traces = None
+        self._double_group = None
+        self._character_table = None
+
+    def get_multiplication_table(self):
+        """
+        Returns the multiplication table, where ``table[i, j]`` is the index of
+        the product :math:`g_i g_j`.
+        """
+        if self._multiplication_table is None:
+            self._multiplication_table = _get_multiplication_table(
+                rotation_matrices=self._rotation_matrices,
+                translation_vectors=self._translation_vectors,
+                has_cc=self._repr_has_cc
+            )
+        return self._multiplication_table
+
+    def get_conjugacy_classes(self):
+        """
+        Returns the indices of the elements in each conjugacy class.
+        """
+        if self._conjugacy_classes is None:
+            self._conjugacy_classes = _get_conjugacy_classes(
+                self.get_multiplication_table()
+            )
+        return self._conjugacy_classes
+
+    def get_traces(self):
+        """
+        Returns the traces of the representation matrices.
+        """
+        if self._traces is None:
+            self._traces = _get_traces(self._repr_matrices)
+        return self._traces
+
+    def get_character_table(self):
+        """
+        Returns the character table of the group, or of its double group.
+        """
+        if self._character_table is None:
+            table, _ = self._get_double_group()
+            classes = _get_conjugacy_classes(table)
+            self._character_table = CharacterTable(
+                classes=classes,
+                characters=_get_characters(table, classes=classes)
+            )
+        return self._character_table
+
+    def get_irrep_multiplicities(self):
+        """
+        Returns the number of times each irreducible representation of the
+        character table is contained in the representation.
+        """
+        _, traces = self._get_double_group()
+        classes, characters = self.get_character_table()
+        class_traces = np.array([traces[elements[0]] for elements in classes])
+        for elements, value in zip(classes, class_traces):
+            if not np.allclose(traces[elements], value, atol=_TOLERANCE):
+                raise ValueError(
+                    'The traces of the representation matrices are not constant on the conjugacy classes.'
+                )
+        class_sizes = np.array([len(elements) for elements in classes])
+        multiplicities = (characters.conj() *
+                          class_sizes) @ class_traces / len(traces)
+        res = np.round(multiplicities.real).astype(int)
+        if not np.allclose(multiplicities, res, atol=_TOLERANCE):
+            raise ValueError(
+                'The irrep multiplicities {} are not integer.'.
+                format(multiplicities)
+            )
+        return res
+
+    def _get_double_group(self):
+        """
+        Returns the multiplication table and traces of the group, or of its
+        double group if the representation contains signs.
+        """
+        if np.any(self._repr_has_cc):
+            raise ValueError(
+                'Character tables can be calculated only for groups without anti-unitary symmetries.'
+            )
+        if self._double_group is None:
+            table = self.get_multiplication_table()
+            traces = self.get_traces()
+            signs = _get_factor_signs(
+                self._repr_matrices,
+                repr_has_cc=self._repr_has_cc,
+                table=table
+            )
+            if np.any(signs):
+                size = len(table)
+                double_table = np.empty((2 * size, 2 * size), dtype=int)
+                for i in range(2):
+                    for j in range(2):
+                        double_table[i * size:(i + 1) * size,
+                                     j * size:(j + 1) *
+                                     size] = table + size * (signs ^ (i != j))
+                self._double_group = (
+                    double_table, np.concatenate([traces, -traces])
+                )
+            else:
+                self._double_group = (table, traces)
+        return self._double_group
+
+
+def _get_element_keys(rotation_matrices, translation_vectors, has_cc):
+    """
+    Returns integer keys identifying the real-space operations, with the
+    translation vectors taken modulo lattice vectors.
+    """
+    scale = 10**_DECIMALS
+    rotation_keys = np.round(rotation_matrices * scale).astype(np.int64)
+    translation_keys = np.round(translation_vectors % 1 * scale
+                                ).astype(np.int64) % scale
+    return np.concatenate([
+        rotation_keys.reshape(len(rotation_keys), -1), translation_keys,
+        has_cc.astype(np.int64)[:, np.newaxis]
+    ],
+                          axis=1)
+
+
+def _get_multiplication_table(
+    *, rotation_matrices, translation_vectors, has_cc
+):
+    """
+    Returns the multiplication table, by matching the keys of all products to
+    the keys of the elements.
+    """
+    num_symmetries, dim, _ = rotation_matrices.shape
+    keys = _get_element_keys(rotation_matrices, translation_vectors, has_cc)
+    product_keys = _get_element_keys(
+        np.einsum('iab,jbc->ijac', rotation_matrices,
+                  rotation_matrices).reshape(-1, dim, dim),
+        (
+            np.einsum('iab,jb->ija', rotation_matrices, translation_vectors) +
+            translation_vectors[:, np.newaxis, :]
+        ).reshape(-1, dim),
+        (has_cc[:, np.newaxis] ^ has_cc[np.newaxis, :]).reshape(-1)
+    )
+    unique_keys, inverse = np.unique(
+        np.concatenate([keys, product_keys]), axis=0, return_inverse=True
+    )
+    inverse = inverse.reshape(-1)
+    if len(np.unique(inverse[:num_symmetries])) != num_symmetries:
+        raise ValueError(
+            'The real-space operations of the symmetries are not unique.'
+        )
+    element_indices = np.full(len(unique_keys), -1)
+    element_indices[inverse[:num_symmetries]] = np.arange(num_symmetries)
+    table = element_indices[inverse[num_symmetries:]
+                            ].reshape(num_symmetries, num_symmetries)
+    if np.any(table < 0):
+        raise ValueError(
+            'The symmetries do not form a group: the product of symmetries {} and {} is not contained in it.'
+            .format(*np.argwhere(table < 0)[0])
+        )
+    return table
+
+
+def _get_identity(table):
+    """
+    Returns the index of the identity element.
+    """
+    return np.flatnonzero(np.all(table == np.arange(len(table)), axis=1))[0]
+
+
+def _get_inverses(table):
+    """
+    Returns the indices of the inverse elements.
+    """
+    return np.argmax(table == _get_identity(table), axis=1)
+
+
+def _get_conjugacy_classes(table):
+    """
+    Returns the conjugacy classes, ordered by their lowest element.
+    """
+    # conjugated[g, x] is the index of g x g^-1
+    conjugated = table[table, _get_inverses(table)[:, np.newaxis]]
+    representatives = np.min(conjugated, axis=0)
+    return [
+        np.flatnonzero(representatives == rep)
+        for rep in np.unique(representatives)
+    ]
+
+
+def _get_traces(repr_matrices):
+    """
+    Returns the traces of stacked matrices, or of a list of matrices which
+    calculate their own trace (such as the block-wise trace of a
+    :class:`.BlockPermutationMatrix`).
+    """
+    if isinstance(repr_matrices, np.ndarray):
+        return np.trace(
+            np.array(repr_matrices, dtype=complex), axis1=-2, axis2=-1
+        )
+    return np.array([complex(matrix.trace()) for matrix in repr_matrices])
+
+
+def _get_factor_signs(repr_matrices, *, repr_has_cc, table):
+    """
+    Returns for each pair of symmetries whether :math:`D(g_i) D(g_j)^{(*)}`
+    is equal to :math:`-D(g_i g_j)`. The signs are determined from the matrix
+    elements :math:`u^\\dagger D v` for random vectors :math:`u, v`, which
+    requires only matrix-vector products.
+    """
+    random_state = np.random.RandomState(42)
+    size = repr_matrices[0].shape[0]
+    left, right = random_state.randn(2,
+                                     size) + 1j * random_state.randn(2, size)
+    if isinstance(repr_matrices, np.ndarray):
+        matrices = np.array(repr_matrices, dtype=complex)
+        left_products = left.conj() @ matrices
+        right_products = matrices @ right
+        conj_right_products = (matrices @ right.conj()).conj()
+    else:
+        left_products = np.array([
+            left.conj() @ matrix for matrix in repr_matrices
+        ])
+        right_products = np.array([matrix @ right for matrix in repr_matrices])
+        conj_right_products = np.array([
+            matrix @ right.conj() for matrix in repr_matrices
+        ]).conj()
+    products = np.where(
+        repr_has_cc[:, np.newaxis], left_products @ conj_right_products.T,
+        left_products @ right_products.T
+    )
+    factors = products / (left_products @ right)[table]
+    signs = np.round(factors.real)
+    if not (
+        np.allclose(factors, signs, atol=_TOLERANCE)
+        and np.all(np.abs(signs) == 1)
+    ):
+        raise ValueError(
+            'The representation matrices are not a representation of the group, up to signs.'
+        )
+    return signs < 0
+
+
+def _get_characters(table, *, classes):
+    """
+    Returns the characters of the irreducible representations, with shape
+    ``(num_classes, num_classes)``. They are calculated from the common
+    eigenvectors of the class multiplication coefficients, which are found
+    by diagonalizing a random linear combination of them (Burnside's
+    algorithm).
+    """
+    size = len(table)
+    num_classes = len(classes)
+    class_sizes = np.array([len(elements) for elements in classes])
+    class_labels = np.empty(size, dtype=int)
+    for label, elements in enumerate(classes):
+        class_labels[elements] = label
+    inverses = _get_inverses(table)
+    # coefficients[r, s, t] is the number of elements x of class r for which
+    # x^-1 z is in class s, for a fixed element z of class t
+    coefficients = np.zeros((num_classes, num_classes, num_classes))
+    for label, elements in enumerate(classes):
+        np.add.at(
+            coefficients[:, :, label],
+            (class_labels, class_labels[table[inverses, elements[0]]]), 1
+        )
+    identity_class = class_labels[_get_identity(table)]
+
+    random_state = np.random.RandomState(42)
+    for _ in range(_MAX_ATTEMPTS):
+        _, eigenvectors = np.linalg.eig(
+            np.einsum(
+                'r,rst->st', random_state.randn(num_classes), coefficients
+            )
+        )
+        with np.errstate(divide='ignore', invalid='ignore'):
+            central_characters = (
+                eigenvectors / eigenvectors[identity_class]
+            ).T
+            dimensions = np.sqrt(
+                size /
+                np.sum(np.abs(central_characters)**2 / class_sizes, axis=1)
+            )
+        characters = dimensions[:,
+                                np.newaxis] * central_characters / class_sizes
+        gram_matrix = (characters * class_sizes) @ characters.conj().T / size
+        if np.all(
+            np.isfinite(characters)
+        ) and np.allclose(gram_matrix, np.eye(num_classes), atol=_TOLERANCE):
+            break
+    else:
+        raise ValueError('Could not determine the character table.')
+    # order by dimension, with the trivial representation first
+    order = np.lexsort((-np.sum(characters.real, axis=1), dimensions))
+    return _round_complex(characters[order], decimals=12)
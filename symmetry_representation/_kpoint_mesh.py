@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Defines the reduction of regular k-point meshes to their irreducible
+k-points.
+
+The k-points of a mesh of size :math:`(n_1, \\dots, n_d)` are given by
+:math:`k_i = (m_i + s_i) / n_i`, where :math:`0 \\leq m_i < n_i` and the
+shift :math:`s_i` is either zero or one half. They are ordered such that the
+last index :math:`m_d` changes fastest. To apply the symmetries in integer
+arithmetic, the k-points are represented by the integers
+:math:`2 m_i + 2 s_i`.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+from fsc.export import export
+
+from ._sym_op import PackedSymmetryGroup
+
+# maximum number of mapped k-points which are created at once
+_MAX_CHUNK_ELEMENTS = 2**22
+
+MeshReduction = namedtuple(
+    'MeshReduction', [
+        'kpoints', 'indices', 'weights', 'star_indices', 'symmetry_indices',
+        'little_group_masks'
+    ]
+)
+export(MeshReduction)
+
+
+@export
+def get_kpoint_mesh(size, *, shift=0):
+    """
+    Returns the k-points of a regular mesh, in reduced coordinates and with
+    shape ``(Nk, d)``.
+
+    Arguments
+    ---------
+    size : List[int]
+        The number of k-points in each direction.
+    shift : float or List[float]
+        The shift of the mesh, in units of the mesh spacing. It can be either
+        zero or one half, for each direction.
+    """
+    size, doubled_shift = _get_mesh_parameters(size, shift)
+    return (
+        np.indices(size).reshape(len(size), -1).T + doubled_shift / 2
+    ) / size
+
+
+@export
+def reduce_kpoint_mesh(size, *, symmetry_group, shift=0):
+    """
+    Reduces a regular k-point mesh to its irreducible k-points, and
+    calculates the little group of each k-point. A symmetry with real-space
+    rotation matrix :math:`R` (in reduced coordinates) maps the k-point
+    :math:`k` to :math:`R^{-T} k`, or :math:`-R^{-T} k` if its representation
+    contains a complex conjugation. The mesh must be mapped onto itself by
+    the symmetries.
+
+    Arguments
+    ---------
+    size : List[int]
+        The number of k-points in each direction.
+    symmetry_group : SymmetryGroup
+        The symmetry group. It must contain all elements of the group, not just
+        its generators.
+    shift : float or List[float]
+        The shift of the mesh, in units of the mesh spacing. It can be either
+        zero or one half, for each direction.
+
+    Returns
+    -------
+    MeshReduction
+        A named tuple containing the irreducible ``kpoints``, their
+        ``indices`` in the mesh, and their ``weights`` (the number of
+        k-points in their star). For each k-point of the mesh, it contains the
+        ``star_indices`` of the irreducible k-point whose star it belongs to,
+        and the ``symmetry_indices`` of a symmetry which maps the irreducible
+        k-point onto it. The ``little_group_masks`` have shape
+        ``(Nk, ceil(G / 8))``, where bit ``g`` (in little-endian bit order, as
+        given by ``np.unpackbits(..., bitorder='little')``) is set if the
+        symmetry ``g`` leaves the k-point invariant.
+    """
+    size, doubled_shift = _get_mesh_parameters(size, shift)
+    packed_group = PackedSymmetryGroup.from_symmetry_group(symmetry_group)
+    kpoint_rotations = _get_kpoint_rotations(packed_group, size=size)
+    num_kpoints = int(np.prod(size))
+    num_symmetries = len(packed_group)
+    chunk_size = max(1, _MAX_CHUNK_ELEMENTS // num_symmetries)
+
+    def _apply_symmetries(indices):
+        """
+        Returns the indices of the mapped k-points, with shape (G, C).
+        """
+        shift_column = doubled_shift[:, np.newaxis]
+        doubled_kpoints = 2 * np.array(
+            np.unravel_index(indices, size)
+        ) + shift_column
+        mapped = kpoint_rotations @ doubled_kpoints - shift_column
+        if np.any(mapped % 2):
+            raise ValueError(
+                'The k-point mesh is not mapped onto itself by the symmetries.'
+            )
+        return np.ravel_multi_index(
+            tuple(np.swapaxes(mapped // 2, 0, 1)), size, mode='wrap'
+        )
+
+    representatives = np.zeros(num_kpoints, dtype=int)
+    symmetry_indices = np.zeros(num_kpoints, dtype=int)
+    little_group_masks = np.zeros((num_kpoints, (num_symmetries + 7) // 8),
+                                  dtype=np.uint8)
+    for start in range(0, num_kpoints, chunk_size):
+        indices = np.arange(start, min(start + chunk_size, num_kpoints))
+        mapped = _apply_symmetries(indices)
+        # the representative of a star is its k-point with the lowest index
+        chunk_representatives = np.minimum(mapped.min(axis=0), indices)
+        representatives[indices] = chunk_representatives
+        little_group_masks[indices] = np.packbits(
+            mapped == indices, axis=0, bitorder='little'
+        ).T
+        symmetry_indices[indices] = np.argmax(
+            _apply_symmetries(chunk_representatives) == indices, axis=0
+        )
+
+    irreducible_indices = np.flatnonzero(
+        representatives == np.arange(num_kpoints)
+    )
+    star_indices = np.searchsorted(irreducible_indices, representatives)
+    return MeshReduction(
+        kpoints=(
+            np.array(np.unravel_index(irreducible_indices, size)).T +
+            doubled_shift / 2
+        ) / size,
+        indices=irreducible_indices,
+        weights=np.bincount(star_indices, minlength=len(irreducible_indices)),
+        star_indices=star_indices,
+        symmetry_indices=symmetry_indices,
+        little_group_masks=little_group_masks
+    )
+
+
+def _get_mesh_parameters(size, shift):
+    """
+    Returns the size of the mesh and twice its shift, as integer arrays.
+    """
+    size = np.array(size, dtype=int).reshape(-1)
+    if np.any(size < 1):
+        raise ValueError(
+            'The mesh size must be positive, got {}.'.format(size)
+        )
+    doubled_shift = 2 * np.broadcast_to(
+        np.array(shift, dtype=float), size.shape
+    )
+    if not np.all(np.isin(doubled_shift, [0, 1])):
+        raise ValueError(
+            'The mesh shift must be zero or one half, got {}.'.format(shift)
+        )
+    return size, doubled_shift.astype(int)
+
+
+def _get_kpoint_rotations(packed_group, *, size):
+    """
+    Returns the integer matrices which map the (doubled) integer k-points onto
+    each other, with shape (G, d, d).
+    """
+    rotation_matrices = np.array(packed_group.rotation_matrices, dtype=float)
+    if rotation_matrices.shape[1:] != (len(size), len(size)):
+        raise ValueError(
+            'The dimension {} of the mesh does not match the shape {} of the rotation matrices.'
+            .format(len(size), rotation_matrices.shape[1:])
+        )
+    signs = np.where(packed_group.repr_has_cc, -1., 1.)
+    kpoint_rotations = np.swapaxes(np.linalg.inv(rotation_matrices), -1,
+                                   -2) * signs[:, np.newaxis, np.newaxis]
+    # the k-points are scaled by the mesh size in each direction
+    kpoint_rotations *= size[:, np.newaxis] / size[np.newaxis, :]
+    res = np.round(kpoint_rotations).astype(int)
+    if not np.allclose(res, kpoint_rotations):
+        raise ValueError(
+            'The k-point mesh is not mapped onto itself by the symmetries.'
+        )
+    return res
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Defines functions to convert stacks of symmetry operations between reduced
+and cartesian coordinates.
+
+The lattice is given by its lattice vectors as rows of a matrix ``A``. A
+rotation matrix ``R`` in reduced coordinates is then given by
+``A^T R A^-T`` in cartesian coordinates, and a translation vector ``t`` by
+``A^T t``.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from fsc.export import export
+
+
+@export
+def to_cartesian_rotations(rotation_matrices, *, lattice):
+    """
+    Converts rotation matrices from reduced to cartesian coordinates.
+
+    Arguments
+    ---------
+    rotation_matrices : array
+        A single rotation matrix, or a stack of rotation matrices, in reduced
+        coordinates.
+    lattice : array
+        The lattice vectors (as rows).
+    """
+    basis, inverse_basis = _get_transforms(lattice)
+    return basis @ _to_array(rotation_matrices) @ inverse_basis
+
+
+@export
+def to_reduced_rotations(rotation_matrices_cartesian, *, lattice):
+    """
+    Converts rotation matrices from cartesian to reduced coordinates.
+
+    Arguments
+    ---------
+    rotation_matrices_cartesian : array
+        A single rotation matrix, or a stack of rotation matrices, in
+        cartesian coordinates.
+    lattice : array
+        The lattice vectors (as rows).
+    """
+    basis, inverse_basis = _get_transforms(lattice)
+    return inverse_basis @ _to_array(rotation_matrices_cartesian) @ basis
+
+
+@export
+def to_cartesian_translations(translation_vectors, *, lattice):
+    """
+    Converts translation vectors from reduced to cartesian coordinates.
+
+    Arguments
+    ---------
+    translation_vectors : array
+        A single translation vector, or a stack of translation vectors, in
+        reduced coordinates.
+    lattice : array
+        The lattice vectors (as rows).
+    """
+    basis, _ = _get_transforms(lattice)
+    return _to_array(translation_vectors) @ basis.T
+
+
+@export
+def to_reduced_translations(translation_vectors_cartesian, *, lattice):
+    """
+    Converts translation vectors from cartesian to reduced coordinates.
+
+    Arguments
+    ---------
+    translation_vectors_cartesian : array
+        A single translation vector, or a stack of translation vectors, in
+        cartesian coordinates.
+    lattice : array
+        The lattice vectors (as rows).
+    """
+    _, inverse_basis = _get_transforms(lattice)
+    return _to_array(translation_vectors_cartesian) @ inverse_basis.T
+
+
+def _to_array(values):
+    """
+    Converts (a list of) numpy or sympy matrices to a float array.
+    """
+    return np.array(values).astype(float)
+
+
+def _get_transforms(lattice):
+    """
+    Returns the matrices ``A^T`` and ``A^-T`` for the given lattice.
+    """
+    lattice = np.array(lattice).astype(float)
+    if lattice.ndim != 2 or lattice.shape[0] != lattice.shape[1]:
+        raise ValueError(
+            'The lattice must be a square matrix, got shape {}.'.format(
+                lattice.shape
+            )
+        )
+    return _get_transforms_cached(lattice.tobytes(), lattice.shape[0])
+
+
+@lru_cache(maxsize=32)
+def _get_transforms_cached(lattice_bytes, dim):
+    """
+    Computes the lattice transforms. The lattice is passed as bytes, such that
+    the result can be cached.
+    """
+    basis = np.frombuffer(lattice_bytes).reshape(dim, dim).T
+    if np.isclose(np.linalg.det(basis), 0):
+        raise ValueError('The lattice vectors are not linearly independent.')
+    basis = basis.copy()
+    inverse_basis = np.linalg.inv(basis)
+    basis.flags.writeable = False
+    inverse_basis.flags.writeable = False
+    return basis, inverse_basis
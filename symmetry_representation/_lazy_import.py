@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Defines helpers for deferring slow imports until they are needed.
+"""
+
+import sys
+import types
+import importlib
+
+
+class LazyModule(types.ModuleType):
+    """
+    Placeholder for a module which is imported on the first attribute access.
+
+    Arguments
+    ---------
+    name : str
+        Name of the module.
+    """
+    def __init__(self, name):
+        super().__init__(name)
+        self._lazy_name = name
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self._lazy_name), attr)
+
+
+def is_sympy_matrix(value):
+    """
+    Checks whether the given value is a sympy matrix, without importing sympy:
+    If sympy has not been imported yet, the value cannot be a sympy matrix.
+    """
+    sympy = sys.modules.get('sympy', None)
+    return sympy is not None and isinstance(value, sympy.Matrix)
+
+
+def lazy_attribute_getter(package_name, lazy_attributes):
+    """
+    Create a module-level ``__getattr__`` function, which imports the submodule
+    defining an attribute on first access.
+
+    Arguments
+    ---------
+    package_name : str
+        Name of the package containing the submodules.
+    lazy_attributes : dict
+        Mapping from the submodule names (relative to the package) to the
+        names of the attributes they define.
+    """
+    attribute_modules = {
+        attr: module_name
+        for module_name, attributes in lazy_attributes.items()
+        for attr in attributes
+    }
+
+    def __getattr__(name):  # pylint: disable=invalid-name
+        try:
+            module_name = attribute_modules[name]
+        except KeyError as exc:
+            raise AttributeError(
+                "module '{}' has no attribute '{}'".format(package_name, name)
+            ) from exc
+        value = getattr(
+            importlib.import_module(module_name, package_name), name
+        )
+        # cache the value, such that '__getattr__' is not called again
+        setattr(sys.modules[package_name], name, value)
+        return value
+
+    return __getattr__
@@ -15,10 +15,10 @@ from ._sym_op import SymmetryGroup, SymmetryOperation, Representation
 
 def load(file_path):
     with h5py.File(file_path, 'r') as hdf5_handle:
-        return _decode(hdf5_handle)
+        return decode(hdf5_handle)
 
 
-def _decode(hdf5_handle):
+def decode(hdf5_handle):
     """
     Construct the object stored at the given HDF5 location.
     """
@@ -35,7 +35,10 @@ def _decode(hdf5_handle):
 
 
 def _decode_iterable(hdf5_handle):
-    return [_decode(hdf5_handle[key]) for key in sorted(hdf5_handle, key=int)]
+    # The keys are the indices of the list elements, which may contain gaps.
+    # Other keys are ignored.
+    keys = sorted((key for key in hdf5_handle if key.isdigit()), key=int)
+    return [decode(hdf5_handle[key]) for key in keys]
 
 
 def _decode_symgroup(hdf5_handle):
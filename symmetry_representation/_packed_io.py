@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Defines the packed HDF5 format, where the elements of a symmetry group are
+stored as stacked arrays.
+"""
+
+import os
+
+import h5py
+import numpy as np
+from fsc.export import export
+
+from ._sym_op import SymmetryGroup, PackedSymmetryGroup
+from ._profiling import phase
+
+FORMAT_KEY = 'symmetry_representation_format'
+FORMAT_NAME = 'packed_symmetry_group'
+FORMAT_VERSION = 1
+
+_DATASET_KEYS = (
+    'rotation_matrices', 'translation_vectors', 'repr_matrices', 'repr_has_cc'
+)
+
+
+def has_format(hdf5_handle, format_name):
+    """
+    Checks whether the given HDF5 location is marked with the given format
+    name.
+    """
+    value = hdf5_handle.attrs.get(FORMAT_KEY, None)
+    if isinstance(value, bytes):
+        value = value.decode('utf-8')
+    return value == format_name
+
+
+def is_packed(hdf5_handle):
+    """
+    Checks whether the given HDF5 location contains a packed symmetry group.
+    """
+    return has_format(hdf5_handle, FORMAT_NAME)
+
+
+def encode(obj, hdf5_handle):
+    """
+    Write a symmetry group to the given HDF5 location, in packed format.
+    """
+    if not isinstance(obj, SymmetryGroup):
+        raise TypeError(
+            "Only symmetry groups can be saved in packed format, got object of type '{}'."
+            .format(type(obj))
+        )
+    packed_group = PackedSymmetryGroup.from_symmetry_group(obj)
+    _write_header(hdf5_handle, full_group=packed_group.full_group)
+    if not packed_group.numeric:
+        from . import _exact_encoding  # pylint: disable=import-outside-toplevel
+        hdf5_handle.attrs['numeric'] = False
+        hdf5_handle['repr_has_cc'] = packed_group.repr_has_cc
+        for key in [
+            'rotation_matrices', 'translation_vectors', 'repr_matrices'
+        ]:
+            _exact_encoding.write(
+                getattr(packed_group, key), hdf5_handle.create_group(key)
+            )
+    elif len(packed_group) > 0:
+        _create_datasets(
+            hdf5_handle,
+            dim=packed_group.rotation_matrices.shape[1],
+            repr_dim=packed_group.repr_matrices.shape[1],
+            size=len(packed_group)
+        )
+        for key in _DATASET_KEYS:
+            hdf5_handle[key][:] = getattr(packed_group, key)
+    hdf5_handle.attrs['num_symmetries'] = len(packed_group)
+
+
+def decode(hdf5_handle):
+    """
+    Construct the packed symmetry group stored at the given HDF5 location.
+    """
+    format_version = hdf5_handle.attrs['format_version']
+    if format_version > FORMAT_VERSION:
+        raise ValueError(
+            'Packed format version {} is not supported, the latest supported version is {}.'
+            .format(format_version, FORMAT_VERSION)
+        )
+    full_group = bool(hdf5_handle.attrs['full_group'])
+    if not hdf5_handle.attrs.get('numeric', True):
+        from . import _exact_encoding  # pylint: disable=import-outside-toplevel
+        return PackedSymmetryGroup(
+            **{
+                key: _exact_encoding.read(hdf5_handle[key])
+                for key in
+                ['rotation_matrices', 'translation_vectors', 'repr_matrices']
+            },
+            repr_has_cc=np.array(hdf5_handle['repr_has_cc']),
+            full_group=full_group,
+            numeric=False
+        )
+    if 'rotation_matrices' not in hdf5_handle:
+        return PackedSymmetryGroup(
+            rotation_matrices=np.zeros((0, 0, 0)),
+            translation_vectors=np.zeros((0, 0)),
+            repr_matrices=np.zeros((0, 0, 0), dtype=complex),
+            repr_has_cc=np.zeros(0, dtype=bool),
+            full_group=full_group
+        )
+    num_symmetries = _get_num_symmetries(hdf5_handle)
+    return PackedSymmetryGroup(
+        **{key: hdf5_handle[key][:num_symmetries]
+           for key in _DATASET_KEYS},
+        full_group=full_group
+    )
+
+
+def _write_header(hdf5_handle, *, full_group):
+    """
+    Write the attributes which identify the packed format.
+    """
+    hdf5_handle.attrs[FORMAT_KEY] = FORMAT_NAME
+    hdf5_handle.attrs['format_version'] = FORMAT_VERSION
+    hdf5_handle.attrs['full_group'] = bool(full_group)
+    hdf5_handle.attrs['num_symmetries'] = 0
+
+
+def _create_datasets(hdf5_handle, *, dim, repr_dim, size):
+    """
+    Create the resizable datasets of a packed symmetry group. Each chunk
+    contains a single symmetry operation.
+    """
+    for key, shape, dtype in [
+        ('rotation_matrices', (dim, dim), float),
+        ('translation_vectors', (dim, ), float),
+        ('repr_matrices', (repr_dim, repr_dim), complex),
+        ('repr_has_cc', (), bool),
+    ]:
+        hdf5_handle.create_dataset(
+            key,
+            shape=(size, ) + shape,
+            maxshape=(None, ) + shape,
+            chunks=(1, ) + shape if shape else (1024, ),
+            dtype=dtype
+        )
+
+
+def _get_num_symmetries(hdf5_handle):
+    """
+    Get the number of completely written symmetry operations. The datasets can
+    be larger, if they were pre-allocated or a write was interrupted.
+    """
+    return int(
+        hdf5_handle.attrs.get(
+            'num_symmetries', len(hdf5_handle['rotation_matrices'])
+        )
+    )
+
+
+@export
+class SymmetryGroupWriter:
+    """
+    Writes a numeric symmetry group to a file in packed format, one symmetry
+    operation at a time. The number of completely written symmetry operations
+    is updated only after the operation itself has been written, such that an
+    interrupted run can be resumed from the last complete operation.
+
+    The writer can be used as a context manager, which closes the file on exit.
+
+    Arguments
+    ---------
+    file_path : str
+        Path of the HDF5 file.
+    full_group : bool
+        Flag which determines whether the symmetry elements describe the full
+        group or just a generating subset. When resuming, the value stored in
+        the existing file is kept.
+    resume : bool
+        If true and the file exists, symmetry operations are appended to the
+        existing group. Otherwise, the file is overwritten.
+    flush_interval : int
+        Number of symmetry operations after which the file is flushed to disk.
+    """
+    def __init__(
+        self, file_path, *, full_group=False, resume=False, flush_interval=1
+    ):
+        self._flush_interval = flush_interval
+        self._num_unflushed = 0
+        if resume and os.path.exists(file_path):
+            self._hdf5_handle = h5py.File(file_path, 'r+')
+            if not is_packed(self._hdf5_handle):
+                self._hdf5_handle.close()
+                raise ValueError(
+                    "Cannot resume writing to '{}', because it does not contain a packed symmetry group."
+                    .format(file_path)
+                )
+            if not self._hdf5_handle.attrs.get('numeric', True):
+                self._hdf5_handle.close()
+                raise ValueError(
+                    "Cannot resume writing to '{}', because it contains an analytic symmetry group."
+                    .format(file_path)
+                )
+            if 'rotation_matrices' in self._hdf5_handle:
+                self._num_symmetries = _get_num_symmetries(self._hdf5_handle)
+                # discard operations which were not completely written
+                self._resize(self._num_symmetries)
+            else:
+                self._num_symmetries = 0
+        else:
+            self._hdf5_handle = h5py.File(file_path, 'w')
+            _write_header(self._hdf5_handle, full_group=full_group)
+            self._num_symmetries = 0
+
+    def __len__(self):
+        return self._num_symmetries
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append(self, symmetry_operation):
+        """
+        Append a symmetry operation to the group.
+        """
+        if not symmetry_operation.numeric:
+            raise ValueError(
+                'Only numeric symmetry operations can be written in packed format.'
+            )
+        if 'rotation_matrices' not in self._hdf5_handle:
+            _create_datasets(
+                self._hdf5_handle,
+                dim=symmetry_operation.rotation_matrix.shape[0],
+                repr_dim=symmetry_operation.repr.matrix.shape[0],
+                size=0
+            )
+        with phase('io.writer.append'):
+            index = self._num_symmetries
+            # grow the datasets geometrically, to avoid resizing for every
+            # operation
+            capacity = len(self._hdf5_handle['rotation_matrices'])
+            if index >= capacity:
+                self._resize(max(2 * capacity, index + 1))
+            self._hdf5_handle['rotation_matrices'][index] = (
+                symmetry_operation.rotation_matrix
+            )
+            self._hdf5_handle['translation_vectors'][index] = (
+                symmetry_operation.translation_vector
+            )
+            self._hdf5_handle['repr_matrices'][index] = (
+                symmetry_operation.repr.matrix
+            )
+            self._hdf5_handle['repr_has_cc'][index] = (
+                symmetry_operation.repr.has_cc
+            )
+        self._num_symmetries += 1
+        self._hdf5_handle.attrs['num_symmetries'] = self._num_symmetries
+        self._num_unflushed += 1
+        if self._num_unflushed >= self._flush_interval:
+            self.flush()
+
+    def extend(self, symmetry_operations):
+        """
+        Append multiple symmetry operations to the group.
+        """
+        for symmetry_operation in symmetry_operations:
+            self.append(symmetry_operation)
+
+    def flush(self):
+        """
+        Write the buffered data to disk.
+        """
+        self._hdf5_handle.flush()
+        self._num_unflushed = 0
+
+    def close(self):
+        """
+        Truncate the pre-allocated datasets and close the file.
+        """
+        if not self._hdf5_handle:
+            return
+        if 'rotation_matrices' in self._hdf5_handle:
+            self._resize(self._num_symmetries)
+        self._hdf5_handle.close()
+
+    def _resize(self, size):
+        for key in _DATASET_KEYS:
+            self._hdf5_handle[key].resize(size, axis=0)
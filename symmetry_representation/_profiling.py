@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Defines the instrumentation of the time-consuming parts of the code. The
+instrumented code marks its phases with :func:`phase` and counts events with
+:func:`count`. These are recorded only while a :class:`Profiler` is active,
+and cost a single check otherwise.
+"""
+
+import time
+
+from fsc.export import export
+
+# the active profilers, in the order in which they were entered
+_PROFILERS = []
+
+
+@export
+class Profiler:
+    """
+    Collects the time spent in the phases of the representation construction,
+    compatibility checks and input / output, and counts events such as cache
+    hits. The profiler is active inside a ``with`` block. Work done in other
+    processes (e.g. with the ``--jobs`` option of the command-line interface)
+    is not recorded.
+
+    Arguments
+    ---------
+    callback : Callable, optional
+        Function which is called as ``callback(name, duration)`` at the end of
+        each phase.
+    """
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.timings = {}
+        self.counters = {}
+
+    def __enter__(self):
+        _PROFILERS.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _PROFILERS.remove(self)
+
+    def add_timing(self, name, duration):
+        """
+        Record the duration of a phase.
+        """
+        try:
+            timing = self.timings[name]
+        except KeyError:
+            timing = self.timings[name] = dict(calls=0, total=0., max=0.)
+        timing['calls'] += 1
+        timing['total'] += duration
+        timing['max'] = max(timing['max'], duration)
+        if self.callback is not None:
+            self.callback(name, duration)
+
+    def add_count(self, name, value=1):
+        """
+        Increase the counter of the given name.
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def get_report(self):
+        """
+        Returns the recorded timings and counters as a JSON-serializable dict.
+        """
+        return dict(
+            timings={
+                name: dict(timing, mean=timing['total'] / timing['calls'])
+                for name, timing in self.timings.items()
+            },
+            counters=dict(self.counters)
+        )
+
+    def format_report(self):
+        """
+        Returns the recorded timings (sorted by total time) and counters as a
+        human-readable table.
+        """
+        lines = [
+            '{:<40} {:>8} {:>12} {:>12}'.format(
+                'phase', 'calls', 'total [s]', 'mean [s]'
+            )
+        ]
+        for name, timing in sorted(
+            self.timings.items(), key=lambda item: -item[1]['total']
+        ):
+            lines.append(
+                '{:<40} {:>8} {:>12.4g} {:>12.4g}'.format(
+                    name, timing['calls'], timing['total'],
+                    timing['total'] / timing['calls']
+                )
+            )
+        if self.counters:
+            lines.append('')
+            lines.append('{:<40} {:>8}'.format('counter', 'value'))
+            for name, value in sorted(self.counters.items()):
+                lines.append('{:<40} {:>8}'.format(name, value))
+        return '\n'.join(lines)
+
+
+def phase(name):
+    """
+    Returns a context manager which records the duration of the given phase
+    in the active profilers.
+    """
+    if not _PROFILERS:
+        return _NULL_PHASE
+    return _Phase(name)
+
+
+def count(name, value=1):
+    """
+    Increase the counter of the given name in the active profilers.
+    """
+    for profiler in _PROFILERS:
+        profiler.add_count(name, value)
+
+
+class _Phase:
+    """
+    Context manager which records the duration of a phase.
+    """
+    __slots__ = ('name', 'start_time')
+
+    def __init__(self, name):
+        self.name = name
+        self.start_time = None
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = time.perf_counter() - self.start_time
+        for profiler in _PROFILERS:
+            profiler.add_timing(self.name, duration)
+
+
+class _NullPhase:
+    """
+    Context manager which does nothing, used when no profiler is active.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+_NULL_PHASE = _NullPhase()
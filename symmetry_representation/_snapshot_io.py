@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Defines the snapshot format, where a numeric symmetry group is stored as a
+single flat binary file: a fixed-size prefix, a JSON header describing the
+arrays, and the raw array buffers. The buffers are aligned such that they can
+be memory-mapped without copying.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+from ._sym_op import SymmetryGroup, PackedSymmetryGroup
+
+MAGIC = b'\x93SYMSNAP'
+FORMAT_VERSION = 1
+
+# magic string, format version and header length
+_PREFIX = struct.Struct('<8sII')
+_ALIGNMENT = 64
+_ARRAY_DTYPES = (
+    ('rotation_matrices', '<f8'),
+    ('translation_vectors', '<f8'),
+    ('repr_matrices', '<c16'),
+    ('repr_has_cc', '|b1'),
+)
+
+
+def is_snapshot(file_handle):
+    """
+    Checks whether the given binary file handle contains a snapshot. The file
+    position is reset afterwards.
+    """
+    position = file_handle.tell()
+    magic = file_handle.read(len(MAGIC))
+    file_handle.seek(position)
+    return magic == MAGIC
+
+
+def save(obj, file_path):
+    """
+    Write a numeric symmetry group to the given file, in snapshot format.
+    """
+    if not isinstance(obj, SymmetryGroup):
+        raise TypeError(
+            "Only symmetry groups can be saved in snapshot format, got object of type '{}'."
+            .format(type(obj))
+        )
+    packed_group = PackedSymmetryGroup.from_symmetry_group(obj)
+    if not packed_group.numeric:
+        raise ValueError(
+            "Analytic symmetry groups cannot be saved in snapshot format, use the 'packed' format instead."
+        )
+    arrays = [
+        (key, np.ascontiguousarray(getattr(packed_group, key), dtype=dtype))
+        for key, dtype in _ARRAY_DTYPES
+    ]
+
+    # the header size depends on the offsets, which depend on the header size
+    header_size = 0
+    while True:
+        data_start = _align(_PREFIX.size + header_size)
+        array_info = {}
+        offset = data_start
+        for key, array in arrays:
+            array_info[key] = dict(
+                dtype=array.dtype.str, shape=array.shape, offset=offset
+            )
+            offset = _align(offset + array.nbytes)
+        header = json.dumps(
+            dict(full_group=bool(packed_group.full_group), arrays=array_info),
+            sort_keys=True
+        ).encode('utf-8')
+        if len(header) <= header_size:
+            break
+        header_size = len(header)
+    header = header.ljust(data_start - _PREFIX.size)
+
+    with open(file_path, 'wb') as file_handle:
+        file_handle.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)))
+        file_handle.write(header)
+        for key, array in arrays:
+            file_handle.seek(array_info[key]['offset'])
+            file_handle.write(array.tobytes())
+        # make sure that the file is as large as the last aligned buffer
+        file_handle.truncate(offset)
+
+
+def load(file_handle):
+    """
+    Load the snapshot from the given binary file handle. The arrays of the
+    resulting :class:`.PackedSymmetryGroup` are read-only views into the
+    memory-mapped file.
+    """
+    file_handle.seek(0)
+    magic, format_version, header_size = _PREFIX.unpack(
+        file_handle.read(_PREFIX.size)
+    )
+    assert magic == MAGIC
+    if format_version > FORMAT_VERSION:
+        raise ValueError(
+            'Snapshot format version {} is not supported, the latest supported version is {}.'
+            .format(format_version, FORMAT_VERSION)
+        )
+    header = json.loads(file_handle.read(header_size).decode('utf-8'))
+    buffer = np.memmap(file_handle, dtype=np.uint8, mode='r')
+    arrays = {}
+    for key, info in header['arrays'].items():
+        dtype = np.dtype(info['dtype'])
+        shape = tuple(info['shape'])
+        size = int(np.prod(shape)) * dtype.itemsize
+        if size == 0:
+            arrays[key] = np.zeros(shape, dtype=dtype)
+        else:
+            offset = info['offset']
+            arrays[key] = buffer[offset:offset +
+                                 size].view(dtype).reshape(shape)
+    return PackedSymmetryGroup(full_group=header['full_group'], **arrays)
+
+
+def _align(offset):
+    """
+    Get the smallest aligned offset which is not smaller than the given offset.
+    """
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
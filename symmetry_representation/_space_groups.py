@@ -0,0 +1,526 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Defines the tables of space-group operations, and the alignment of a
+structure to a tabulated setting. This allows creating the symmetry group of
+a structure with a known space group without a symmetry search.
+
+The tables contain the operations of all 530 settings (Hall symbols) of the
+230 space groups, in the conventional cell of the setting. They are stored in
+a data file which is distributed with the package, and can be re-created
+(using ``spglib``) with ``python -m symmetry_representation._space_groups``.
+"""
+
+import os
+import itertools
+from collections import namedtuple
+
+import numpy as np
+from fsc.export import export
+
+from ._sym_op import RealSpaceOperator, SymmetryGroup
+from ._lattice import to_cartesian_rotations
+
+TABLE_VERSION = 1
+TABLE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'data', 'space_groups.npz'
+)
+# the translations are stored as integer multiples of this value
+_TRANSLATION_UNIT = 1 / 24
+
+# Primitive cells of the centered lattices, with the rows giving the primitive
+# lattice vectors in terms of the conventional ones.
+_PRIMITIVE_TRANSFORMATIONS = {
+    'A': [[1, 0, 0], [0, 1 / 2, -1 / 2], [0, 1 / 2, 1 / 2]],
+    'B': [[1 / 2, 0, -1 / 2], [0, 1, 0], [1 / 2, 0, 1 / 2]],
+    'C': [[1 / 2, 1 / 2, 0], [-1 / 2, 1 / 2, 0], [0, 0, 1]],
+    'I': [[-1 / 2, 1 / 2, 1 / 2], [1 / 2, -1 / 2, 1 / 2],
+          [1 / 2, 1 / 2, -1 / 2]],
+    'F': [[0, 1 / 2, 1 / 2], [1 / 2, 0, 1 / 2], [1 / 2, 1 / 2, 0]],
+}
+
+# integer offsets which are tried when solving linear equations modulo one
+_INTEGER_OFFSETS = np.array(list(itertools.product(range(-2, 3), repeat=3)))
+
+_TABLES = None
+
+SpaceGroupAlignment = namedtuple(
+    'SpaceGroupAlignment', [
+        'setting', 'transformation_matrix', 'origin_shift',
+        'real_space_operators', 'rotation_matrices_cartesian'
+    ]
+)
+export(SpaceGroupAlignment)
+
+
+def _get_tables():
+    """
+    Returns the space-group tables, which are loaded on the first call.
+    """
+    global _TABLES  # pylint: disable=global-statement
+    if _TABLES is None:
+        with np.load(TABLE_PATH) as data:
+            tables = {key: data[key] for key in data.files}
+        if int(tables['table_version']) != TABLE_VERSION:
+            raise ValueError(
+                'Space group table version {} does not match the expected version {}.'
+                .format(int(tables['table_version']), TABLE_VERSION)
+            )
+        _TABLES = tables
+    return _TABLES
+
+
+def _get_setting_indices(number, setting=None):
+    """
+    Returns the indices of the tabulated settings of a space group. If a
+    setting is given, only its index is returned.
+    """
+    if not 1 <= number <= 230:
+        raise ValueError(
+            'Invalid space group number {}, must be between 1 and 230.'.
+            format(number)
+        )
+    tables = _get_tables()
+    indices = np.flatnonzero(tables['numbers'] == number)
+    if setting is None:
+        return list(indices)
+    for idx in indices:
+        if tables['settings'][idx] == setting:
+            return [idx]
+    raise ValueError(
+        "Invalid setting '{}' for space group {}, the valid settings are {}.".
+        format(setting, number, get_space_group_settings(number))
+    )
+
+
+def _get_setting_operations(index):
+    """
+    Returns the rotation matrices and translation vectors of a setting, in
+    reduced coordinates of its conventional cell.
+    """
+    tables = _get_tables()
+    start, end = tables['offsets'][index:index + 2]
+    return (
+        tables['rotations'][start:end].astype(int),
+        tables['translations'][start:end] * _TRANSLATION_UNIT
+    )
+
+
+@export
+def get_space_group_settings(number):
+    """
+    Returns the names of the tabulated settings of a space group, with the
+    standard setting first. The names are those used by ``spglib`` (for
+    example ``'1'`` and ``'2'`` for the origin choices, or ``'H'`` and
+    ``'R'`` for the hexagonal and rhombohedral axes). Space groups with a
+    single setting have the setting ``''``.
+
+    Arguments
+    ---------
+    number : int
+        The space group number.
+    """
+    tables = _get_tables()
+    return [
+        str(tables['settings'][idx]) for idx in _get_setting_indices(number)
+    ]
+
+
+@export
+def get_space_group_operations(number, *, setting=None, lattice=None):
+    """
+    Returns the operations of a space group in the conventional cell of the
+    given setting. The operations are given as real-space operators in
+    reduced coordinates. If a lattice is given, the rotation matrices in
+    cartesian coordinates are returned as well.
+
+    Arguments
+    ---------
+    number : int
+        The space group number.
+    setting : str, optional
+        The setting, as returned by :func:`get_space_group_settings`. By
+        default, the standard setting is used.
+    lattice : array, optional
+        The lattice vectors (as rows) of the conventional cell.
+    """
+    if setting is None:
+        setting = get_space_group_settings(number)[0]
+    index, = _get_setting_indices(number, setting)
+    rotations, translations = _get_setting_operations(index)
+    real_space_operators = [
+        RealSpaceOperator(rotation_matrix=rot, translation_vector=trans)
+        for rot, trans in zip(rotations, translations)
+    ]
+    if lattice is None:
+        return real_space_operators
+    return real_space_operators, list(
+        to_cartesian_rotations(rotations, lattice=lattice)
+    )
+
+
+@export
+def align_space_group(
+    number,
+    *,
+    lattice,
+    positions,
+    species,
+    setting=None,
+    position_tolerance=1e-3
+):
+    """
+    Find the setting, cell and origin in which the tabulated operations of a
+    space group map a structure onto itself. The structure must be given
+    either in the conventional cell of one of the settings, or in the
+    standard primitive cell of a centered setting. Its origin can be
+    arbitrary.
+
+    The result contains the setting, the ``transformation_matrix`` whose rows
+    are the lattice vectors of the structure in terms of the conventional
+    lattice vectors, the ``origin_shift`` of the tabulated origin with respect
+    to the structure (in reduced coordinates of the structure), and the
+    operations in reduced and cartesian coordinates of the structure.
+
+    Arguments
+    ---------
+    number : int
+        The space group number.
+    lattice : array
+        The lattice vectors (as rows) of the structure.
+    positions : array
+        The positions of the atoms, in reduced coordinates.
+    species : list
+        The species of the atoms. Atoms with equal species are considered
+        equivalent.
+    setting : str, optional
+        The setting of the space group. By default, all tabulated settings
+        are tried.
+    position_tolerance : float
+        Absolute distance between positions (in reduced coordinates) for
+        which they are still considered to be the same position.
+    """
+    lattice = np.array(lattice, dtype=float)
+    positions = np.array(positions, dtype=float).reshape(-1, 3) % 1
+    species_ids = {}
+    labels = np.array([
+        species_ids.setdefault(label, len(species_ids)) for label in species
+    ])
+    if len(labels) != len(positions):
+        raise ValueError(
+            'The number of positions ({}) and species ({}) must match.'.format(
+                len(positions), len(labels)
+            )
+        )
+    tables = _get_tables()
+    for index in _get_setting_indices(number, setting):
+        rotations, translations = _get_setting_operations(index)
+        centering = str(tables['symbols'][index])[0]
+        transformations = [np.eye(3)]
+        if centering in _PRIMITIVE_TRANSFORMATIONS:
+            transformations.append(
+                np.array(_PRIMITIVE_TRANSFORMATIONS[centering])
+            )
+        for transformation in transformations:
+            cell_rotations, cell_translations = _transform_operations(
+                rotations, translations, transformation
+            )
+            if not _preserves_metric(cell_rotations, lattice):
+                continue
+            origin_shift = _find_origin_shift(
+                cell_rotations,
+                cell_translations,
+                positions=positions,
+                labels=labels,
+                position_tolerance=position_tolerance
+            )
+            if origin_shift is None:
+                continue
+            origin_shift = np.round(origin_shift, 10) % 1
+            cell_translations = (
+                cell_translations + (cell_rotations - np.eye(3)) @ origin_shift
+            ) % 1
+            return SpaceGroupAlignment(
+                setting=str(tables['settings'][index]),
+                transformation_matrix=transformation,
+                origin_shift=origin_shift,
+                real_space_operators=[
+                    RealSpaceOperator(
+                        rotation_matrix=rot, translation_vector=trans
+                    ) for rot, trans in zip(cell_rotations, cell_translations)
+                ],
+                rotation_matrices_cartesian=list(
+                    to_cartesian_rotations(cell_rotations, lattice=lattice)
+                )
+            )
+    raise ValueError(
+        'Could not align the structure to the tabulated operations of space group {}.'
+        .format(number)
+    )
+
+
+@export
+def get_space_group_symmetries(
+    number,
+    *,
+    orbitals,
+    lattice,
+    positions=None,
+    species=None,
+    setting=None,
+    numeric=True,
+    position_tolerance=1e-3
+):
+    """
+    Create the symmetry group of a structure with a known space group, using
+    the tabulated space group operations instead of a symmetry search.
+
+    Arguments
+    ---------
+    number : int
+        The space group number.
+    orbitals : List(Orbital)
+        Basis orbitals with respect to which the representations should be
+        created.
+    lattice : array
+        The lattice vectors (as rows) of the structure.
+    positions : array, optional
+        The positions of the atoms (in reduced coordinates), which are used
+        to align the structure. By default, the positions of the orbitals are
+        used.
+    species : list, optional
+        The species of the atoms. If the positions are not given, the sets of
+        orbitals on each position are used as species.
+    setting : str, optional
+        The setting of the space group. By default, all tabulated settings
+        are tried.
+    numeric : bool
+        Flag to determine whether numeric (numpy) or symbolic (sympy)
+        computation should be used.
+    position_tolerance : float
+        Absolute distance between positions (in reduced coordinates) for
+        which they are still considered to be the same position.
+    """
+    from ._get_repr_matrix import iter_symmetry_operations  # pylint: disable=import-outside-toplevel
+    if positions is None:
+        positions, species = _get_orbital_sites(
+            orbitals, position_tolerance=position_tolerance
+        )
+    alignment = align_space_group(
+        number,
+        lattice=lattice,
+        positions=positions,
+        species=species,
+        setting=setting,
+        position_tolerance=position_tolerance
+    )
+    return SymmetryGroup(
+        symmetries=list(
+            iter_symmetry_operations(
+                orbitals=orbitals,
+                real_space_operators=alignment.real_space_operators,
+                lattice=lattice,
+                numeric=numeric
+            )
+        ),
+        full_group=True
+    )
+
+
+def _get_orbital_sites(orbitals, *, position_tolerance):
+    """
+    Returns the distinct positions of the orbitals, and the set of orbitals
+    on each position as its species.
+    """
+    positions = []
+    species = []
+    for orbital in orbitals:
+        for i, pos in enumerate(positions):
+            delta = (orbital.position - pos + 0.5) % 1 - 0.5
+            if np.all(np.abs(delta) < position_tolerance):
+                species[i].append((orbital.function_string, orbital.spin))
+                break
+        else:
+            positions.append(np.array(orbital.position, dtype=float))
+            species.append([(orbital.function_string, orbital.spin)])
+    return positions, [tuple(sorted(site, key=repr)) for site in species]
+
+
+def _transform_operations(rotations, translations, transformation):
+    """
+    Transforms operations from the conventional cell to the cell whose
+    lattice vectors (in terms of the conventional ones) are the rows of the
+    transformation matrix. Operations which differ only by a lattice vector
+    of the new cell are removed.
+    """
+    inv_transposed = np.linalg.inv(transformation).T
+    new_rotations = np.round(inv_transposed @ rotations @ transformation.T
+                             ).astype(int)
+    new_translations = np.round((translations @ inv_transposed.T) % 1, 10) % 1
+    _, indices = np.unique(
+        np.concatenate([
+            new_rotations.reshape(-1, 9),
+            np.round(new_translations / _TRANSLATION_UNIT).astype(int) %
+            round(1 / _TRANSLATION_UNIT)
+        ],
+                       axis=1),
+        axis=0,
+        return_index=True
+    )
+    indices = np.sort(indices)
+    return new_rotations[indices], new_translations[indices]
+
+
+def _preserves_metric(rotations, lattice, tolerance=1e-3):
+    """
+    Checks whether the rotations (in reduced coordinates) leave the metric of
+    the lattice invariant.
+    """
+    metric = lattice @ lattice.T
+    transformed = np.swapaxes(rotations, 1, 2) @ metric @ rotations
+    return np.allclose(
+        transformed, metric, atol=tolerance * np.max(np.abs(metric))
+    )
+
+
+def _find_origin_shift(
+    rotations, translations, *, positions, labels, position_tolerance
+):
+    """
+    Find the shift ``s`` of the origin such that the operations
+    ``x -> R x + t + (R - 1) s`` map the structure onto itself, or return
+    ``None`` if no such shift exists.
+
+    The candidate shifts are obtained from the condition that the operations
+    map one reference atom onto an atom of the same species. Each operation
+    constrains the shift within the remaining free subspace, which is reduced
+    until no operation constrains it further (the remaining directions are
+    those of the polar axes, along which the origin is arbitrary).
+    """
+    label_counts = np.bincount(labels)
+    reference_positions = positions[labels == np.argmin(
+        np.where(label_counts > 0, label_counts,
+                 len(labels) + 1)
+    )]
+    reference = reference_positions[0]
+    # most constraining operations first
+    order = sorted(
+        range(len(rotations)),
+        key=lambda i: -np.linalg.matrix_rank(rotations[i] - np.eye(3))
+    )
+    candidates = [(np.zeros(3), np.eye(3))]
+    for i in order:
+        rot, trans = rotations[i], translations[i]
+        matrix = rot - np.eye(3)
+        new_candidates = {}
+        for shift, free_space in candidates:
+            reduced_matrix = matrix @ free_space
+            if free_space.shape[1] == 0 or np.allclose(reduced_matrix, 0):
+                new_candidates.setdefault(
+                    _get_shift_key(shift), (shift, free_space)
+                )
+                continue
+            # solve reduced_matrix @ d = rhs (mod 1)
+            rhs = (
+                reference_positions -
+                (rot @ reference + trans + matrix @ shift)
+            )
+            rhs = (rhs[:, np.newaxis, :] + _INTEGER_OFFSETS).reshape(-1, 3)
+            solutions = rhs @ np.linalg.pinv(reduced_matrix).T
+            is_valid = np.all(
+                np.abs(solutions @ reduced_matrix.T - rhs) <
+                position_tolerance,
+                axis=-1
+            )
+            _, singular_values, v_transposed = np.linalg.svd(reduced_matrix)
+            rank = np.sum(singular_values > 1e-8)
+            new_free_space = free_space @ v_transposed[rank:].T
+            for solution in solutions[is_valid]:
+                new_shift = (shift + free_space @ solution) % 1
+                new_candidates.setdefault(
+                    _get_shift_key(new_shift), (new_shift, new_free_space)
+                )
+        candidates = list(new_candidates.values())
+    for shift, _ in candidates:
+        if _maps_structure(
+            rotations,
+            translations + (rotations - np.eye(3)) @ shift,
+            positions=positions,
+            labels=labels,
+            position_tolerance=position_tolerance
+        ):
+            return shift
+    return None
+
+
+def _get_shift_key(shift):
+    """
+    Returns a hashable key identifying a shift modulo lattice vectors.
+    """
+    return tuple(np.round(shift % 1, 6) % 1)
+
+
+def _maps_structure(
+    rotations, translations, *, positions, labels, position_tolerance
+):
+    """
+    Checks whether all operations map each atom onto an atom of the same
+    species.
+    """
+    for rot, trans in zip(rotations, translations):
+        new_positions = positions @ rot.T + trans
+        delta = (
+            new_positions[:, np.newaxis, :] - positions[np.newaxis, :, :] + 0.5
+        ) % 1 - 0.5
+        is_same = np.all(np.abs(delta) < position_tolerance, axis=-1)
+        is_same &= labels[:, np.newaxis] == labels[np.newaxis, :]
+        if not np.all(np.any(is_same, axis=1)):
+            return False
+    return True
+
+
+def create_tables(file_path=TABLE_PATH):
+    """
+    Creates the space-group tables from the database of ``spglib``.
+    """
+    import spglib  # pylint: disable=import-outside-toplevel,import-error
+    numbers = []
+    settings = []
+    symbols = []
+    offsets = [0]
+    rotations = []
+    translations = []
+    for hall_number in range(1, 531):
+        spacegroup_type = spglib.get_spacegroup_type(hall_number)
+        symmetry = spglib.get_symmetry_from_database(hall_number)
+        numbers.append(spacegroup_type.number)
+        settings.append(spacegroup_type.choice)
+        symbols.append(spacegroup_type.international_short)
+        scaled_translations = symmetry['translations'] / _TRANSLATION_UNIT
+        if not np.allclose(scaled_translations, np.round(scaled_translations)):
+            raise ValueError(
+                'Translations of Hall number {} are not multiples of {}.'.
+                format(hall_number, _TRANSLATION_UNIT)
+            )
+        rotations.append(symmetry['rotations'])
+        translations.append(
+            np.round(scaled_translations) % round(1 / _TRANSLATION_UNIT)
+        )
+        offsets.append(offsets[-1] + len(symmetry['rotations']))
+    np.savez_compressed(
+        file_path,
+        table_version=TABLE_VERSION,
+        numbers=np.array(numbers, dtype=np.int16),
+        settings=np.array(settings, dtype=str),
+        symbols=np.array(symbols, dtype=str),
+        offsets=np.array(offsets, dtype=np.int32),
+        rotations=np.concatenate(rotations).astype(np.int8),
+        translations=np.concatenate(translations).astype(np.int8)
+    )
+
+
+if __name__ == '__main__':
+    create_tables()
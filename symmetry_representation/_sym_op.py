@@ -11,10 +11,14 @@ Defines symmetry operations and groups.
 import types
 
 import numpy as np
-import sympy as sp
 from fsc.export import export
 from fsc.hdf5_io import subscribe_hdf5, SimpleHDF5Mapping
 
+from ._lazy_import import LazyModule, is_sympy_matrix
+
+# sympy is needed only for analytic values, and is slow to import
+sp = LazyModule('sympy')  # pylint: disable=invalid-name
+
 
 @export
 @subscribe_hdf5('symmetry_representation.symmetry_group')
@@ -41,6 +45,271 @@ class SymmetryGroup(SimpleHDF5Mapping, types.SimpleNamespace):
     def __init__(self, symmetries, full_group=False):
         self.symmetries = list(symmetries)
         self.full_group = full_group
+        # cache of the group tables, which is not part of the equality,
+        # representation or serialization of the group
+        self._group_tables = None
+
+    def get_multiplication_table(self):
+        """
+        Returns the multiplication table of the group, with shape ``(G, G)``.
+        The entry ``[i, j]`` is the index of the product of the symmetries
+        ``i`` and ``j``. The symmetries are identified by their real-space
+        operation (with the translation up to a lattice vector) and whether
+        their representation contains a complex conjugation. The group must
+        contain all its elements.
+
+        The group tables are cached, and re-calculated only if the symmetries
+        (or, for a :class:`.PackedSymmetryGroup`, the arrays) are replaced.
+        Changes made to the symmetry operations or arrays in-place are not
+        detected.
+        """
+        return self._get_group_tables().get_multiplication_table()
+
+    def get_conjugacy_classes(self):
+        """
+        Returns the conjugacy classes of the group, as a list of arrays
+        containing the indices of their elements.
+        """
+        return self._get_group_tables().get_conjugacy_classes()
+
+    def get_traces(self):
+        """
+        Returns the traces of all representation matrices, with shape
+        ``(G,)``. Matrices given as :class:`.BlockPermutationMatrix` are
+        traced block-wise.
+        """
+        return self._get_group_tables().get_traces()
+
+    def get_character_table(self):
+        """
+        Returns the character table of the group. If the representation
+        matrices form a representation only up to signs, as for half-integer
+        spins, the character table of the double group is returned. Its
+        elements ``i`` and ``i + G`` correspond to the symmetry ``i``, with the
+        representation matrices :math:`D` and :math:`-D`. The group must not
+        contain anti-unitary symmetries.
+
+        Returns
+        -------
+        CharacterTable
+            A named tuple containing the conjugacy ``classes`` (of the double
+            group, if needed), and the ``characters`` of the irreducible
+            representations, with shape ``(num_irreps, num_classes)``. The
+            irreducible representations are ordered by their dimension.
+        """
+        return self._get_group_tables().get_character_table()
+
+    def get_irrep_multiplicities(self):
+        """
+        Returns how many times each irreducible representation of the
+        :meth:`character table <get_character_table>` is contained in the
+        representation of the group.
+        """
+        return self._get_group_tables().get_irrep_multiplicities()
+
+    def _get_group_tables(self):
+        """
+        Returns the (cached) group tables.
+        """
+        from ._group_tables import _GroupTables  # pylint: disable=import-outside-toplevel
+        cache_key = self._get_cache_key()
+        if self._group_tables is None:
+            cached_key = None
+        else:
+            cached_key, group_tables = self._group_tables
+        if cached_key is None or len(cached_key) != len(cache_key) or any(
+            old is not new for old, new in zip(cached_key, cache_key)
+        ):
+            group_tables = _GroupTables(
+                PackedSymmetryGroup.from_symmetry_group(self)
+            )
+            self._group_tables = (cache_key, group_tables)
+        return group_tables
+
+    def _get_cache_key(self):
+        """
+        Returns the objects which determine the group tables, which are
+        compared by identity.
+        """
+        return tuple(self.symmetries)
+
+    def __eq__(self, other):
+        if not isinstance(other, SymmetryGroup):
+            return NotImplemented
+        return (
+            self.full_group == other.full_group
+            and self.symmetries == other.symmetries
+        )
+
+    # 'types.SimpleNamespace' defines its own '__ne__', which compares the
+    # instance dictionaries
+    def __ne__(self, other):
+        res = self.__eq__(other)
+        if res is NotImplemented:
+            return res
+        return not res
+
+    def __repr__(self):
+        return '{}({})'.format(
+            type(self).__name__, ', '.join(
+                '{}={!r}'.format(key, value)
+                for key, value in self.__dict__.items()
+                if not key.startswith('_')
+            )
+        )
+
+    def decompose_translations(self):
+        """
+        Decompose the group into the cosets of its subgroup of pure
+        translations. The representation matrices of the pure translations
+        must be permutation matrices.
+
+        Returns
+        -------
+        TranslationCosetDecomposition
+            The coset representatives and pure translations, from which any
+            element can be re-created.
+        """
+        from ._cosets import TranslationCosetDecomposition  # pylint: disable=import-outside-toplevel
+        return TranslationCosetDecomposition.from_symmetry_group(self)
+
+
+@export
+class PackedSymmetryGroup(SymmetryGroup):
+    """
+    Describes a symmetry group whose elements are stored as stacked arrays.
+    The symmetry operations are created only when they are accessed. When
+    saved in the default HDF5 format, it is stored as a regular
+    :class:`.SymmetryGroup`.
+
+    Arguments
+    ---------
+    rotation_matrices : array
+        Real-space rotation matrices of the symmetries (in reduced coordinates),
+        with shape ``(G, d, d)``.
+    translation_vectors : array
+        Real-space displacement vectors of the symmetries (in reduced
+        coordinates), with shape ``(G, d)``.
+    repr_matrices : array
+        Representation matrices of the symmetries, with shape ``(G, N, N)``.
+        Matrices in a structured form, such as :class:`.BlockPermutationMatrix`,
+        can also be given as a list.
+    repr_has_cc : array
+        Specifies for each symmetry whether the representation contains a
+        complex conjugation.
+    full_group : bool
+        Flag which determines whether the symmetry elements describe the full group or just a generating subset.
+    numeric : bool
+        Specifies whether the symmetry operations contain numeric or analytic
+        values. For analytic values, the arrays have ``object`` type and
+        contain sympy expressions.
+    """
+    def __init__(  # pylint: disable=super-init-not-called
+        self,
+        *,
+        rotation_matrices,
+        translation_vectors,
+        repr_matrices,
+        repr_has_cc,
+        full_group=False,
+        numeric=True
+    ):
+        # 'np.asarray' is used to avoid copying memory-mapped arrays.
+        self.rotation_matrices = np.asarray(rotation_matrices)
+        self.translation_vectors = np.asarray(translation_vectors)
+        self.repr_matrices = _stack_matrices(repr_matrices)
+        self.repr_has_cc = np.asarray(repr_has_cc, dtype=bool)
+        self.full_group = full_group
+        self.numeric = numeric
+        self._group_tables = None
+        num_symmetries = len(self.rotation_matrices)
+        for value in [
+            self.translation_vectors, self.repr_matrices, self.repr_has_cc
+        ]:
+            if len(value) != num_symmetries:
+                raise ValueError(
+                    'The number of rotation matrices, translation vectors, representation matrices and complex conjugation flags must match.'
+                )
+
+    @classmethod
+    def from_symmetry_group(cls, symmetry_group):
+        """
+        Create a packed symmetry group from a :class:`.SymmetryGroup`.
+        """
+        if isinstance(symmetry_group, PackedSymmetryGroup):
+            return symmetry_group
+        symmetries = symmetry_group.symmetries
+        numeric = all(sym.numeric for sym in symmetries)
+        if not numeric and any(sym.numeric for sym in symmetries):
+            raise ValueError(
+                'Cannot pack a symmetry group with both numeric and analytic symmetry operations.'
+            )
+        dtype = None if numeric else object
+        return cls(
+            rotation_matrices=np.array([
+                np.array(sym.rotation_matrix, dtype=dtype)
+                for sym in symmetries
+            ]),
+            translation_vectors=np.array([
+                np.array(sym.translation_vector, dtype=dtype).reshape(-1)
+                for sym in symmetries
+            ]),
+            repr_matrices=np.array([
+                np.array(sym.repr.matrix, dtype=dtype) for sym in symmetries
+            ]),
+            repr_has_cc=[sym.repr.has_cc for sym in symmetries],
+            full_group=symmetry_group.full_group,
+            numeric=numeric
+        )
+
+    def to_symmetry_group(self):
+        """
+        Convert to a :class:`.SymmetryGroup` with explicit symmetry operations.
+        """
+        return SymmetryGroup(
+            symmetries=self.symmetries, full_group=self.full_group
+        )
+
+    def __len__(self):
+        return len(self.rotation_matrices)
+
+    def get_symmetry(self, index):
+        """
+        Create the symmetry operation with the given index.
+        """
+        if self.numeric:
+            to_matrix = np.asarray
+        else:
+            to_matrix = sp.Matrix
+        return SymmetryOperation(
+            rotation_matrix=to_matrix(self.rotation_matrices[index]),
+            translation_vector=to_matrix(self.translation_vectors[index]),
+            repr_matrix=to_matrix(self.repr_matrices[index]),
+            repr_has_cc=bool(self.repr_has_cc[index]),
+            numeric=self.numeric
+        )
+
+    @property
+    def symmetries(self):
+        return [self.get_symmetry(i) for i in range(len(self))]
+
+    def _get_cache_key(self):
+        return (
+            self.rotation_matrices, self.translation_vectors,
+            self.repr_matrices, self.repr_has_cc
+        )
+
+
+def _stack_matrices(matrices):
+    """
+    Stacks dense matrices into a single array, while matrices in a structured
+    form (with a ``to_dense`` method) are kept as a list.
+    """
+    if not isinstance(matrices, np.ndarray) and any(
+        hasattr(matrix, 'to_dense') for matrix in matrices
+    ):
+        return list(matrices)
+    return np.asarray(matrices)
 
 
 @export
@@ -108,13 +377,20 @@ class SymmetryOperation(SimpleHDF5Mapping, types.SimpleNamespace):
 
     @classmethod
     def from_orbitals(
-        cls, *, orbitals, real_space_operator, rotation_matrix_cartesian,
-        numeric, **kwargs
+        cls,
+        *,
+        orbitals,
+        real_space_operator,
+        rotation_matrix_cartesian=None,
+        numeric,
+        lattice=None,
+        **kwargs
     ):
         """
         Construct a (unitary) symmetry operation from the basis orbitals, real
         space operator and cartesian rotation matrix. The automatic construction
-        of the representation matrix is used.
+        of the representation matrix is used. Instead of the cartesian rotation
+        matrix, the lattice can be given.
 
         Arguments
         ---------
@@ -123,11 +399,14 @@ class SymmetryOperation(SimpleHDF5Mapping, types.SimpleNamespace):
             is constructed.
         real_space_operator : RealSpaceOperator
             The real space operator of the matrix.
-        rotation_matrix_cartesian : array
+        rotation_matrix_cartesian : array, optional
             The rotation matrix of the symmetry, in cartesian coordinates.
         numeric : bool
             Determines whether a numeric (numpy) or analytic (sympy)
             representation matrix is constructed.
+        lattice : array, optional
+            The lattice vectors (as rows), from which the cartesian rotation
+            matrix is computed.
         """
         from . import _get_repr_matrix  # pylint: disable=import-outside-toplevel
         if kwargs.get('repr_has_cc', False):
@@ -136,7 +415,8 @@ class SymmetryOperation(SimpleHDF5Mapping, types.SimpleNamespace):
             orbitals=orbitals,
             real_space_operator=real_space_operator,
             rotation_matrix_cartesian=rotation_matrix_cartesian,
-            numeric=numeric
+            numeric=numeric,
+            lattice=lattice
         )
         return cls.from_real_space_operator(
             real_space_operator=real_space_operator,
@@ -238,7 +518,7 @@ class RealSpaceOperator(SimpleHDF5Mapping, types.SimpleNamespace):
 
     def __init__(self, rotation_matrix, translation_vector=None, numeric=None):
         if numeric is None:
-            numeric = not isinstance(rotation_matrix, sp.Matrix)
+            numeric = not is_sympy_matrix(rotation_matrix)
         self.numeric = numeric
         if numeric:
             rotation_matrix = np.array(rotation_matrix).astype(float)
@@ -364,7 +644,7 @@ class Representation(SimpleHDF5Mapping, types.SimpleNamespace):
 
     def __init__(self, matrix, has_cc=False, numeric=None):
         if numeric is None:
-            numeric = not isinstance(matrix, sp.Matrix)
+            numeric = not is_sympy_matrix(matrix)
         if numeric:
             matrix = np.array(matrix).astype(complex)
             if not np.allclose(
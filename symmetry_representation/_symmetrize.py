@@ -0,0 +1,631 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Defines functions to symmetrize tight-binding Hamiltonians, given either on a
+grid of k-points or as real-space hopping matrices.
+"""
+
+import numpy as np
+from fsc.export import export
+
+from ._sym_op import PackedSymmetryGroup, RealSpaceOperator
+
+# maximum number of matrix elements which are created at once when applying
+# the symmetry operations to a chunk of k-points
+_MAX_CHUNK_ELEMENTS = 2**22
+
+
+@export
+def get_kpoint_indices(kpoints, *, symmetry_group, kpoint_tolerance=1e-6):
+    """
+    Calculates for each symmetry operation :math:`g` and k-point :math:`k` the
+    index of the k-point :math:`gk`, which must be part of the given k-points
+    (up to a reciprocal lattice vector). For a symmetry with real-space
+    rotation matrix :math:`R` (in reduced coordinates), the k-point is mapped
+    to :math:`gk = R^{-T} k`, or :math:`gk = -R^{-T} k` if the representation
+    contains a complex conjugation.
+
+    Arguments
+    ---------
+    kpoints : array
+        The k-points, in reduced coordinates, with shape ``(Nk, d)``.
+    symmetry_group : SymmetryGroup
+        The symmetry group.
+    kpoint_tolerance : float
+        Absolute distance between k-points (in reduced coordinates) for which
+        they are still considered to be the same k-point.
+
+    Returns
+    -------
+    array
+        The indices of the mapped k-points, with shape ``(G, Nk)``.
+    """
+    # scipy is imported here because it is slow to import
+    from scipy import spatial  # pylint: disable=import-outside-toplevel
+
+    kpoints = np.array(kpoints, dtype=float)
+    if kpoints.ndim != 2:
+        raise ValueError(
+            'The k-points must be given as an array of shape (Nk, d), got shape {}.'
+            .format(kpoints.shape)
+        )
+    packed_group = PackedSymmetryGroup.from_symmetry_group(symmetry_group)
+    new_kpoints = _rotate_kpoints(kpoints, packed_group=packed_group)
+    tree = spatial.cKDTree(_to_unit_cell(kpoints), boxsize=1.)
+    _, indices = tree.query(
+        _to_unit_cell(new_kpoints.reshape(-1, kpoints.shape[1])),
+        distance_upper_bound=kpoint_tolerance
+    )
+    indices = indices.reshape(len(packed_group), len(kpoints))
+    if np.any(indices == len(kpoints)):
+        raise ValueError(
+            'The k-points are not mapped onto each other by the symmetry operations.'
+        )
+    return indices
+
+
+@export
+def get_bloch_phases(
+    kpoints,
+    *,
+    symmetry_group,
+    orbitals,
+    include_positions=False,
+    kpoint_tolerance=1e-6,
+    position_tolerance=1e-4
+):
+    """
+    Calculates the k-dependent phases of the representation matrices in a
+    basis of Bloch functions. The representation matrix which maps the Bloch
+    functions at :math:`k` to those at :math:`gk` is given by
+    :math:`D(g, k) = D(g) \\operatorname{diag}(\\phi(g, k))`, where
+    :math:`D(g)` is the representation matrix of the symmetry, and
+    :math:`\\phi(g, k)` are the phases.
+
+    By default, the Bloch functions are defined as
+    :math:`\\sum_R e^{2 \\pi i k \\cdot R} |a, R\\rangle`. The phase of
+    orbital :math:`a` is then :math:`e^{-2 \\pi i (gk) \\cdot L_a}`, where
+    :math:`L_a` is the lattice vector by which the image of its position is
+    shifted back into the unit cell. If ``include_positions`` is set, the
+    Bloch functions are defined as
+    :math:`\\sum_R e^{2 \\pi i k \\cdot (R + \\tau_a)} |a, R\\rangle`, and
+    the phases are given by the translation vector of the symmetry and the
+    reciprocal lattice vector by which :math:`gk` differs from the given
+    k-point.
+
+    Arguments
+    ---------
+    kpoints : array
+        The k-points, in reduced coordinates, with shape ``(Nk, d)``. They
+        must be mapped onto each other by the symmetry operations.
+    symmetry_group : SymmetryGroup
+        The symmetry group.
+    orbitals : List(Orbital) or OrbitalBasis
+        Basis orbitals of the representation matrices.
+    include_positions : bool
+        Determines whether the orbital positions are included in the phase of
+        the Bloch functions.
+    kpoint_tolerance : float
+        Absolute distance between k-points (in reduced coordinates) for which
+        they are still considered to be the same k-point.
+    position_tolerance : float
+        Absolute distance between positions (in reciprocal units) for which
+        they are still considered to be the same position.
+
+    Returns
+    -------
+    kpoint_indices : array
+        The indices of the k-points :math:`gk`, with shape ``(G, Nk)``.
+    phases : array
+        The phases, with shape ``(G, Nk, N)``.
+    """
+    kpoints = np.array(kpoints, dtype=float)
+    packed_group = PackedSymmetryGroup.from_symmetry_group(symmetry_group)
+    kpoint_indices = get_kpoint_indices(
+        kpoints,
+        symmetry_group=packed_group,
+        kpoint_tolerance=kpoint_tolerance
+    )
+    phases = _BlochPhases(
+        packed_group=packed_group,
+        orbitals=orbitals,
+        include_positions=include_positions,
+        position_tolerance=position_tolerance
+    ).get_phases(kpoints, mapped_kpoints=kpoints[kpoint_indices])
+    return kpoint_indices, phases
+
+
+@export
+def symmetrize_hamiltonians(
+    hamiltonians,
+    *,
+    kpoints,
+    symmetry_group,
+    orbitals=None,
+    include_positions=False,
+    kpoint_tolerance=1e-6,
+    position_tolerance=1e-4,
+    chunk_size=None
+):
+    """
+    Symmetrizes the Hamiltonians :math:`H(k)` given on a grid of k-points, by
+    averaging :math:`D(g) H(g^{-1}k) D(g)^\\dagger` over the elements
+    :math:`g` of the symmetry group. For symmetries whose representation
+    contains a complex conjugation, :math:`H(g^{-1}k)` is complex conjugated.
+    If the orbitals are given, the k-dependent representation matrices
+    :math:`D(g, g^{-1}k)` of the Bloch functions are used (see
+    :func:`.get_bloch_phases`). Otherwise, the representation matrices are
+    used as given.
+
+    The symmetry operations are applied to chunks of k-points at once. If the
+    representation matrices are given as :class:`.BlockPermutationMatrix`
+    (in a :class:`.PackedSymmetryGroup`), they are applied block-wise.
+
+    Arguments
+    ---------
+    hamiltonians : array
+        The Hamiltonians, with shape ``(Nk, N, N)``.
+    kpoints : array
+        The k-points (in reduced coordinates) of the Hamiltonians, with shape
+        ``(Nk, d)``. They must be mapped onto each other by the symmetry
+        operations.
+    symmetry_group : SymmetryGroup
+        The symmetry group. It must contain all elements of the group, not just
+        its generators.
+    orbitals : List(Orbital) or OrbitalBasis, optional
+        Basis orbitals of the Hamiltonians, from which the k-dependent phases
+        of the representation matrices are calculated.
+    include_positions : bool
+        Determines whether the orbital positions are included in the phase of
+        the Bloch functions.
+    kpoint_tolerance : float
+        Absolute distance between k-points (in reduced coordinates) for which
+        they are still considered to be the same k-point.
+    position_tolerance : float
+        Absolute distance between positions (in reciprocal units) for which
+        they are still considered to be the same position.
+    chunk_size : int, optional
+        Number of k-points for which the symmetry operations are applied at
+        once. By default, it is chosen such that the memory used is bounded.
+
+    Returns
+    -------
+    array
+        The symmetrized Hamiltonians, with shape ``(Nk, N, N)``.
+    """
+    hamiltonians = np.asarray(hamiltonians)
+    if (
+        hamiltonians.ndim != 3
+        or hamiltonians.shape[1] != hamiltonians.shape[2]
+    ):
+        raise ValueError(
+            'The Hamiltonians must be given as an array of shape (Nk, N, N), got shape {}.'
+            .format(hamiltonians.shape)
+        )
+    num_kpoints, size, _ = hamiltonians.shape
+    kpoints = np.array(kpoints, dtype=float)
+    if len(kpoints) != num_kpoints:
+        raise ValueError(
+            'The number of k-points {} does not match the number of Hamiltonians {}.'
+            .format(len(kpoints), num_kpoints)
+        )
+    packed_group = PackedSymmetryGroup.from_symmetry_group(symmetry_group)
+    num_symmetries = len(packed_group)
+    kpoint_indices = get_kpoint_indices(
+        kpoints,
+        symmetry_group=packed_group,
+        kpoint_tolerance=kpoint_tolerance
+    )
+    # since g k_i = k_j for j = kpoint_indices[g, i], the k-point g^-1 k_j
+    # has index i
+    inverse_indices = np.zeros_like(kpoint_indices)
+    inverse_indices[np.arange(num_symmetries)[:, np.newaxis],
+                    kpoint_indices] = np.arange(num_kpoints)
+    if chunk_size is None:
+        chunk_size = max(1, _MAX_CHUNK_ELEMENTS // (num_symmetries * size**2))
+
+    repr_has_cc = packed_group.repr_has_cc
+    repr_matrices = packed_group.repr_matrices
+    if isinstance(repr_matrices, np.ndarray):
+        repr_matrices = repr_matrices.astype(complex)
+        apply_symmetries = _apply_dense_symmetries
+        repr_matrices_conj = repr_matrices.conj()
+    else:
+        apply_symmetries = _apply_structured_symmetries
+        repr_matrices_conj = [matrix.conj() for matrix in repr_matrices]
+    if orbitals is None:
+        bloch_phases = None
+    else:
+        bloch_phases = _BlochPhases(
+            packed_group=packed_group,
+            orbitals=orbitals,
+            include_positions=include_positions,
+            position_tolerance=position_tolerance
+        )
+
+    res = np.zeros(hamiltonians.shape, dtype=complex)
+    for start in range(0, num_kpoints, chunk_size):
+        source_indices = inverse_indices[:, start:start + chunk_size]
+        terms = hamiltonians[source_indices].astype(complex)
+        terms[repr_has_cc] = terms[repr_has_cc].conj()
+        if bloch_phases is not None:
+            # D(g, k) H D(g, k)^dagger = D(g) (phi H phi^dagger) D(g)^dagger,
+            # where phi is diagonal
+            phases = bloch_phases.get_phases(
+                kpoints[source_indices],
+                mapped_kpoints=kpoints[start:start + chunk_size]
+            )
+            terms *= phases[..., :, np.newaxis] * phases.conj()[...,
+                                                                np.newaxis, :]
+        res[start:start + chunk_size] = apply_symmetries(
+            terms,
+            repr_matrices=repr_matrices,
+            repr_matrices_conj=repr_matrices_conj
+        ) / num_symmetries
+    return res
+
+
+@export
+class HoppingSymmetrizer:
+    """
+    Symmetrizes the hopping matrices :math:`H(R)` of a real-space
+    tight-binding model, where :math:`H(R)_{ij}` is the hopping from orbital
+    :math:`j` in the unit cell at lattice vector :math:`R` to orbital
+    :math:`i` in the home unit cell. The hoppings are averaged over the
+    elements of the symmetry group.
+
+    A symmetry operation maps the hopping between the sites :math:`p, q` at
+    lattice vector :math:`R` to the hopping between their image sites at
+    :math:`R' = S R + L_q - L_p`, where :math:`S` is the rotation matrix and
+    :math:`L_p` the lattice vector by which the image of site :math:`p` is
+    shifted back into the unit cell. This map is calculated once when the
+    symmetrizer is created, such that any number of models with the same
+    lattice vectors can be symmetrized.
+
+    Arguments
+    ---------
+    symmetry_group : SymmetryGroup
+        The symmetry group. It must contain all elements of the group, not just
+        its generators.
+    orbitals : List(Orbital) or OrbitalBasis
+        Basis orbitals of the tight-binding model.
+    lattice_vectors : array
+        The lattice vectors :math:`R` (in reduced coordinates) of the hopping
+        matrices, with shape ``(NR, d)``.
+    position_tolerance : float
+        Absolute distance between positions (in reciprocal units) for which
+        they are still considered to be the same position.
+
+    Attributes
+    ----------
+    lattice_vectors : array
+        The lattice vectors of the symmetrized hopping matrices. These are the
+        given lattice vectors, followed by the additional lattice vectors onto
+        which they are mapped by the symmetry operations.
+    """
+    def __init__(
+        self,
+        *,
+        symmetry_group,
+        orbitals,
+        lattice_vectors,
+        position_tolerance=1e-4
+    ):
+        # sympy is needed only for the orbital basis, and is slow to import
+        from ._get_repr_matrix._orbital_basis import OrbitalBasis, _PositionFinder  # pylint: disable=import-outside-toplevel
+
+        if not isinstance(orbitals, OrbitalBasis):
+            orbitals = OrbitalBasis.from_orbitals(
+                orbitals, position_tolerance=position_tolerance
+            )
+        self._site_indices = orbitals.site_indices
+        self._packed_group = PackedSymmetryGroup.from_symmetry_group(
+            symmetry_group
+        )
+        lattice_vectors = _to_integer(lattice_vectors, name='lattice vectors')
+        if lattice_vectors.ndim != 2:
+            raise ValueError(
+                'The lattice vectors must be given as an array of shape (NR, d), got shape {}.'
+                .format(lattice_vectors.shape)
+            )
+        self._num_input_vectors = len(lattice_vectors)
+
+        position_finder = _PositionFinder(
+            positions=orbitals.site_positions,
+            position_tolerance=position_tolerance
+        )
+        # the lattice vectors R' for each symmetry, lattice vector and pair of
+        # (image) sites
+        new_lattice_vectors = []
+        for rotation_matrix, translation_vector in zip(
+            self._packed_group.rotation_matrices,
+            self._packed_group.translation_vectors
+        ):
+            image_sites, shifts = _get_site_images(
+                position_finder,
+                rotation_matrix=rotation_matrix,
+                translation_vector=translation_vector
+            )
+            # the shifts L_p, indexed by the image site
+            site_shifts = np.zeros_like(shifts)
+            site_shifts[image_sites] = shifts
+            # L_q - L_p, with shape (Ns, Ns, d)
+            pair_shifts = (
+                site_shifts[np.newaxis, :] - site_shifts[:, np.newaxis]
+            )
+            rotated_vectors = lattice_vectors @ _to_integer(
+                rotation_matrix, name='rotation matrices'
+            ).T
+            new_lattice_vectors.append(
+                rotated_vectors[:, np.newaxis, np.newaxis] +
+                pair_shifts[np.newaxis]
+            )
+        new_lattice_vectors = np.array(new_lattice_vectors, dtype=int)
+        self.lattice_vectors, self._index_maps = _get_lattice_vector_indices(
+            lattice_vectors, new_lattice_vectors
+        )
+
+    def symmetrize(self, hoppings):
+        """
+        Symmetrizes the given hopping matrices.
+
+        Arguments
+        ---------
+        hoppings : array
+            The hopping matrices, with shape ``(NR, N, N)``, for the lattice
+            vectors given when creating the symmetrizer.
+
+        Returns
+        -------
+        array
+            The symmetrized hopping matrices for the :attr:`lattice_vectors`,
+            with shape ``(NR', N, N)``.
+        """
+        hoppings = np.asarray(hoppings)
+        size = len(self._site_indices)
+        if hoppings.shape != (self._num_input_vectors, size, size):
+            raise ValueError(
+                'The shape {} of the hopping matrices does not match the shape {} given by the lattice vectors and orbitals.'
+                .format(hoppings.shape, (self._num_input_vectors, size, size))
+            )
+        repr_matrices = self._packed_group.repr_matrices
+        if isinstance(repr_matrices, np.ndarray):
+            repr_matrices = repr_matrices.astype(complex)
+        chunk_size = max(1, _MAX_CHUNK_ELEMENTS // size**2)
+        sites = self._site_indices
+        # the hoppings are added to the flattened result, with indices
+        # R' * N^2 + i * N + j
+        offsets = np.arange(size**2).reshape(size, size)
+        res = np.zeros((len(self.lattice_vectors), size, size), dtype=complex)
+        res_flat = res.reshape(-1)
+        for matrix, has_cc, index_map in zip(
+            repr_matrices, self._packed_group.repr_has_cc, self._index_maps
+        ):
+            matrix_conj = matrix.conj()
+            for start in range(0, len(hoppings), chunk_size):
+                chunk = hoppings[start:start + chunk_size]
+                terms = _conjugate(
+                    chunk.conj() if has_cc else chunk,
+                    matrix=matrix,
+                    matrix_conj=matrix_conj
+                )
+                # for a given pair of orbitals, the lattice vectors are mapped
+                # one-to-one, such that no index appears twice
+                index_chunk = index_map[start:start + chunk_size]
+                res_flat[index_chunk[:, sites][:, :, sites] * size**2 +
+                         offsets] += terms
+        return res / len(self._packed_group)
+
+
+class _BlochPhases:
+    """
+    Calculates the k-dependent phases of the representation matrices in a
+    basis of Bloch functions.
+    """
+    def __init__(
+        self, *, packed_group, orbitals, include_positions, position_tolerance
+    ):
+        # sympy is needed only for the orbital basis, and is slow to import
+        from ._get_repr_matrix._orbital_basis import OrbitalBasis, _PositionFinder  # pylint: disable=import-outside-toplevel
+
+        if not isinstance(orbitals, OrbitalBasis):
+            orbitals = OrbitalBasis.from_orbitals(
+                orbitals, position_tolerance=position_tolerance
+            )
+        self._packed_group = packed_group
+        self._include_positions = include_positions
+        position_finder = _PositionFinder(
+            positions=orbitals.site_positions,
+            position_tolerance=position_tolerance
+        )
+        rotation_matrices = np.array(
+            packed_group.rotation_matrices, dtype=float
+        )
+        self._translation_vectors = np.array(
+            packed_group.translation_vectors, dtype=float
+        ).reshape(len(packed_group), -1)
+        lattice_shifts = []
+        for rotation_matrix, translation_vector in zip(
+            rotation_matrices, self._translation_vectors
+        ):
+            _, shifts = _get_site_images(
+                position_finder,
+                rotation_matrix=rotation_matrix,
+                translation_vector=translation_vector
+            )
+            lattice_shifts.append(shifts)
+        # the lattice vectors L_a and the positions S tau_a + t of the images
+        # of each orbital, with shape (G, N, d)
+        self._lattice_shifts = np.array(lattice_shifts,
+                                        dtype=float)[:, orbitals.site_indices]
+        self._image_positions = (
+            orbitals.positions[np.newaxis
+                               ] @ np.swapaxes(rotation_matrices, -1, -2) +
+            self._translation_vectors[:, np.newaxis]
+        )
+
+    def get_phases(self, kpoints, *, mapped_kpoints):
+        """
+        Returns the phases with shape (G, C, N), for the k-points with shape
+        (C, d) or (G, C, d). The k-points g k must be the same as the mapped
+        k-points, up to a reciprocal lattice vector.
+        """
+        new_kpoints = _rotate_kpoints(kpoints, packed_group=self._packed_group)
+        if self._include_positions:
+            reciprocal_shifts = np.round(new_kpoints - mapped_kpoints)
+            exponents = (
+                new_kpoints @ self._translation_vectors[:, :, np.newaxis] -
+                reciprocal_shifts @ np.swapaxes(self._image_positions, -1, -2)
+            )
+        else:
+            exponents = new_kpoints @ np.swapaxes(self._lattice_shifts, -1, -2)
+        return np.exp(-2j * np.pi * exponents)
+
+
+def _apply_dense_symmetries(terms, *, repr_matrices, repr_matrices_conj):
+    """
+    Calculates the sum of D H D^dagger over all symmetries, for dense
+    representation matrices. The terms have shape (G, C, N, N).
+    """
+    return np.sum(
+        repr_matrices[:, np.newaxis] @ terms
+        @ np.swapaxes(repr_matrices_conj, -1, -2)[:, np.newaxis],
+        axis=0
+    )
+
+
+def _apply_structured_symmetries(terms, *, repr_matrices, repr_matrices_conj):
+    """
+    Calculates the sum of D H D^dagger over all symmetries, for
+    representation matrices which are applied with '@', such as block
+    matrices. The terms have shape (G, C, N, N).
+    """
+    res = np.zeros(terms.shape[1:], dtype=complex)
+    for matrix, matrix_conj, chunk in zip(
+        repr_matrices, repr_matrices_conj, terms
+    ):
+        res += _conjugate(chunk, matrix=matrix, matrix_conj=matrix_conj)
+    return res
+
+
+def _conjugate(values, *, matrix, matrix_conj):
+    """
+    Calculates D X D^dagger for a stack of matrices X with shape (C, N, N),
+    where D is a dense or structured matrix.
+    """
+    if isinstance(matrix, np.ndarray):
+        return matrix @ values @ matrix_conj.T
+    # structured matrices act on the first axis, such that D X is calculated
+    # as (D @ X^T)^T, and (D X) D^dagger as (D^* @ (D X)^T)^T
+    left = np.asarray(matrix @ values.transpose(1, 0, 2))
+    return np.asarray(matrix_conj @ left.transpose(2, 1, 0)).transpose(1, 2, 0)
+
+
+def _rotate_kpoints(kpoints, *, packed_group):
+    """
+    Applies the symmetries to the k-points, given with shape (Nk, d) or
+    (G, Nk, d). The result has shape (G, Nk, d).
+    """
+    rotation_matrices = np.array(packed_group.rotation_matrices, dtype=float)
+    signs = np.where(packed_group.repr_has_cc, -1., 1.)
+    # k-points are row vectors, such that R^-T k corresponds to k @ R^-1
+    return (np.asarray(kpoints) @ np.linalg.inv(rotation_matrices)
+            ) * signs[:, np.newaxis, np.newaxis]
+
+
+def _get_site_images(position_finder, *, rotation_matrix, translation_vector):
+    """
+    Returns for each site the index of its image site, and the lattice vector
+    L by which the image of its position is shifted from the image site.
+    """
+    real_space_operator = RealSpaceOperator(
+        rotation_matrix=np.array(rotation_matrix, dtype=float),
+        translation_vector=np.array(translation_vector, dtype=float)
+    )
+    positions_mapping = position_finder.get_mapping(real_space_operator)
+    positions = position_finder.positions
+    image_sites = np.zeros(len(positions), dtype=int)
+    shifts = np.zeros(positions.shape, dtype=int)
+    for site, position in enumerate(positions):
+        if len(positions_mapping[site]) != 1:
+            raise ValueError(
+                'The position {} is not mapped onto a unique site position by the symmetry operation.'
+                .format(position)
+            )
+        image_sites[site] = positions_mapping[site][0]
+        shifts[site] = np.round(
+            real_space_operator.apply(position) - positions[image_sites[site]]
+        )
+    if len(set(image_sites)) != len(positions):
+        raise ValueError(
+            'The sites are not mapped onto each other one-to-one by the symmetry operation.'
+        )
+    return image_sites, shifts
+
+
+def _to_unit_cell(kpoints):
+    """
+    Maps the given k-points to the half-open unit cell.
+    """
+    kpoints = kpoints % 1
+    # k-points very close to one can be mapped to exactly one by the modulo
+    kpoints[kpoints >= 1] = 0
+    return kpoints
+
+
+def _to_integer(values, *, name):
+    """
+    Converts the given values to an integer array, checking that they are
+    integers.
+    """
+    values = np.array(values, dtype=float)
+    res = np.round(values).astype(int)
+    if not np.allclose(values, res):
+        raise ValueError('The {} must be integer.'.format(name))
+    return res
+
+
+def _get_lattice_vector_indices(lattice_vectors, new_lattice_vectors):
+    """
+    Returns the union of the given and new lattice vectors, and the indices
+    of the new lattice vectors in it. The lattice vectors are encoded as
+    integers, such that they can be looked up by sorting.
+    """
+    dim = lattice_vectors.shape[-1]
+    flat_vectors = new_lattice_vectors.reshape(-1, dim)
+    offset = np.minimum(
+        lattice_vectors.min(axis=0, initial=0),
+        flat_vectors.min(axis=0, initial=0)
+    )
+    extent = np.maximum(
+        lattice_vectors.max(axis=0, initial=0),
+        flat_vectors.max(axis=0, initial=0)
+    ) - offset + 1
+    strides = np.concatenate([np.cumprod(extent[::-1])[-2::-1], [1]])
+
+    def _encode(vectors):
+        return (vectors - offset) @ strides
+
+    keys, inverse = np.unique(
+        np.concatenate([_encode(lattice_vectors),
+                        _encode(flat_vectors)]),
+        return_inverse=True
+    )
+    inverse = inverse.reshape(-1)
+    input_positions = inverse[:len(lattice_vectors)]
+    if len(np.unique(input_positions)) != len(lattice_vectors):
+        raise ValueError('The lattice vectors must be unique.')
+    # the given lattice vectors come first, in their original order
+    order = np.concatenate([
+        input_positions,
+        np.setdiff1d(np.arange(len(keys)), input_positions)
+    ])
+    ranks = np.zeros(len(keys), dtype=int)
+    ranks[order] = np.arange(len(keys))
+    return ((keys[order][:, np.newaxis] // strides % extent + offset),
+            ranks[inverse[len(lattice_vectors):].reshape(
+                new_lattice_vectors.shape[:-1]
+            )])
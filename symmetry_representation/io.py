@@ -6,27 +6,156 @@
 Defines the functions to save and load objects to HDF5 files.
 """
 
+import h5py
 import fsc.hdf5_io
 from fsc.export import export
 
 from . import _legacy_io
+from . import _packed_io
+from . import _block_io
+from . import _snapshot_io
+from ._packed_io import SymmetryGroupWriter
+from ._profiling import phase, count
 
-__all__ = ['save']
+__all__ = ['SymmetryGroupWriter']
 
-save = fsc.hdf5_io.save  # pylint: disable=invalid-name
+FILE_FORMATS = ('hdf5', 'packed', 'blocks', 'snapshot')
+
+# Key used by 'fsc.hdf5_io' to store the type of the serialized object.
+_TYPE_TAG_KEY = 'type_tag'
+
+
+@export
+def save(obj, file_path, *, file_format='hdf5', block_table=None):
+    """
+    Save an object to the given HDF5 file.
+
+    Arguments
+    ---------
+    obj :
+        The object to save.
+    file_path : str
+        Path of the HDF5 file.
+    file_format : str
+        The format in which the object is stored. With ``'hdf5'``, the generic
+        format of ``fsc.hdf5_io`` is used. With ``'packed'``, the elements of
+        a :class:`.SymmetryGroup` are stored as stacked arrays. For numeric
+        groups, further symmetry operations can be appended with a
+        :class:`.SymmetryGroupWriter`. Analytic values are stored exactly as
+        integer coefficients with respect to 1, sqrt(2), sqrt(3), sqrt(6) and
+        their products with the imaginary unit, or as strings if they cannot
+        be expressed in that form. With ``'blocks'``, the representation
+        matrices of a numeric :class:`.SymmetryGroup` are decomposed into
+        blocks, and each unique block is stored only once, either in the file
+        itself or in a shared ``block_table``. In this format, the entries of
+        the representation matrices are rounded to 12 decimals.
+        With ``'snapshot'``, a numeric :class:`.SymmetryGroup` is stored as a
+        flat binary file (not HDF5) which is memory-mapped when loading, such
+        that processes loading the same file share its memory.
+    block_table : str, optional
+        Path of a shared block table file, for the ``'blocks'`` format. The
+        unique blocks are added to this file (which is created if it does not
+        exist) instead of being stored in the symmetry group file, such that
+        blocks which repeat across files are stored only once. The symmetry
+        group file refers to the block table by its relative path, so both
+        files must be moved together.
+    """
+    if block_table is not None and file_format != 'blocks':
+        raise ValueError(
+            "A shared block table can only be used with the 'blocks' format."
+        )
+    with phase('io.save.{}'.format(file_format)):
+        if file_format == 'hdf5':
+            fsc.hdf5_io.save(obj, file_path)
+        elif file_format == 'packed':
+            with h5py.File(file_path, 'w') as hdf5_handle:
+                _packed_io.encode(obj, hdf5_handle)
+        elif file_format == 'blocks':
+            with h5py.File(file_path, 'w') as hdf5_handle:
+                _block_io.encode(
+                    obj, hdf5_handle, block_table_path=block_table
+                )
+        elif file_format == 'snapshot':
+            _snapshot_io.save(obj, file_path)
+        else:
+            raise ValueError(
+                "Invalid file format '{}', must be one of {}.".format(
+                    file_format, FILE_FORMATS
+                )
+            )
+
+
+@export
+def load(file_path, *, dense=True):
+    """
+    Load an object from the given file. The format of the file is detected
+    automatically.
+
+    Arguments
+    ---------
+    file_path : str
+        Path of the file to load.
+    dense : bool
+        If false, the representation matrices of a file in ``'blocks'``
+        format are returned as :class:`.BlockPermutationMatrix` instead of
+        dense arrays.
+    """
+    with phase('io.load'):
+        # the file is opened only once, and the same handle is used for
+        # reading HDF5 files
+        with open(file_path, 'rb') as file_handle:
+            if _snapshot_io.is_snapshot(file_handle):
+                count('io.load.snapshot')
+                return _snapshot_io.load(file_handle)
+            with h5py.File(file_handle, 'r') as hdf5_handle:
+                return _decode(hdf5_handle, dense=dense, file_path=file_path)
+
+
+def _decode(hdf5_handle, *, dense, file_path):
+    """
+    Construct the object stored at the given HDF5 location, dispatching on its
+    format.
+    """
+    if _TYPE_TAG_KEY in hdf5_handle:
+        count('io.load.hdf5')
+        # register the orbital types, which are not imported with the package
+        from . import _get_repr_matrix  # pylint: disable=import-outside-toplevel,unused-import
+        return fsc.hdf5_io.from_hdf5(hdf5_handle)
+    if _packed_io.is_packed(hdf5_handle):
+        count('io.load.packed')
+        return _packed_io.decode(hdf5_handle)
+    if _block_io.is_block_format(hdf5_handle):
+        count('io.load.blocks')
+        return _block_io.decode(hdf5_handle, dense=dense, file_path=file_path)
+    count('io.load.legacy')
+    return _legacy_io.decode(hdf5_handle)
 
 
 @export
-def load(hdf5_file):
+def save_stream(
+    symmetry_operations, file_path, *, full_group=False, flush_interval=1
+):
     """
-    Load an object from the given HDF5 file.
+    Save numeric symmetry operations to the given HDF5 file in packed format,
+    writing each operation as soon as it is produced. The resulting file
+    contains a :class:`.SymmetryGroup`. Returns the number of written symmetry
+    operations.
 
     Arguments
     ---------
-    hdf5_file : str
-        Path of the HDF5 file to load.
+    symmetry_operations : Iterable[SymmetryOperation]
+        The symmetry operations to save, for example as created by
+        :func:`.iter_symmetry_operations`.
+    file_path : str
+        Path of the HDF5 file.
+    full_group : bool
+        Flag which determines whether the symmetry elements describe the full
+        group or just a generating subset.
+    flush_interval : int
+        Number of symmetry operations after which the file is flushed to disk.
     """
-    try:
-        return fsc.hdf5_io.load(hdf5_file)
-    except ValueError:
-        return _legacy_io.load(hdf5_file)
+    with SymmetryGroupWriter(
+        file_path, full_group=full_group, flush_interval=flush_interval
+    ) as writer:
+        writer.extend(symmetry_operations)
+        return len(writer)
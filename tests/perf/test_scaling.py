@@ -0,0 +1,214 @@
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Performance tests, which check how the run time scales with the problem size.
+The tests compare the run times of differently sized problems, such that they
+do not depend on the speed of the machine. They are not run by default, use
+``pytest -m perf`` to run them.
+"""
+
+import os
+import time
+import tempfile
+import itertools
+
+import pytest
+import numpy as np
+
+import symmetry_representation as sr
+from symmetry_representation._get_repr_matrix._get_repr_matrix import _get_positions_mapping
+
+pytestmark = pytest.mark.perf  # pylint: disable=invalid-name
+
+ROTATION_C4Z = np.array([[0, -1, 0], [1, 0, 0], [0, 0, 1]])
+
+
+def _get_min_time(func, repeat=5):
+    """
+    Returns the minimum run time of the given function, which is the least
+    affected by other processes.
+    """
+    times = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start_time)
+    return min(times)
+
+
+def _get_bcc_orbitals(supercell_size, function_string='1'):
+    """
+    Creates one orbital on each site of a body-centered cubic supercell.
+    """
+    cell_positions = np.array(
+        list(itertools.product(range(supercell_size), repeat=3))
+    )
+    positions = np.concatenate([cell_positions, cell_positions + 0.5]
+                               ) / supercell_size
+    return [
+        sr.Orbital(position=position, function_string=function_string)
+        for position in positions
+    ]
+
+
+def _get_axis_orbitals(num_sites):
+    """
+    Creates spinful p orbitals on sites along the z-axis, which are mapped
+    onto themselves by a four-fold rotation around the z-axis.
+    """
+    return [
+        sr.Orbital(
+            position=[0, 0, i / num_sites], function_string=fct, spin=spin
+        ) for spin in (sr.SPIN_UP, sr.SPIN_DOWN) for i in range(num_sites)
+        for fct in sr.WANNIER_ORBITALS['p']
+    ]
+
+
+def _get_packed_group(num_symmetries, repr_dim):
+    """
+    Creates a packed symmetry group with the given number of (identical)
+    symmetry operations.
+    """
+    return sr.PackedSymmetryGroup(
+        rotation_matrices=np.tile(ROTATION_C4Z, (num_symmetries, 1, 1)),
+        translation_vectors=np.zeros((num_symmetries, 3)),
+        repr_matrices=np.tile(
+            np.eye(repr_dim, dtype=complex), (num_symmetries, 1, 1)
+        ),
+        repr_has_cc=np.zeros(num_symmetries, dtype=bool)
+    )
+
+
+def test_positions_mapping_scaling():
+    """
+    Check that the mapping of positions scales (nearly) linearly with the
+    number of positions.
+    """
+    real_space_operator = sr.RealSpaceOperator(
+        rotation_matrix=ROTATION_C4Z, translation_vector=[0, 0, 0.5]
+    )
+    times = []
+    for supercell_size in [4, 8]:
+        orbitals = _get_bcc_orbitals(supercell_size)
+        times.append(
+            _get_min_time(
+                lambda: _get_positions_mapping(
+                    orbitals=orbitals,  # pylint: disable=cell-var-from-loop
+                    real_space_operator=real_space_operator,
+                    position_tolerance=1e-4
+                )
+            )
+        )
+    # eight times more positions: linear scaling gives a ratio of 8, quadratic
+    # scaling a ratio of 64
+    assert times[1] / times[0] < 24
+
+
+def test_repr_matrix_scaling():
+    """
+    Check that the construction of the representation matrix (including the
+    unitarity check) scales (nearly) linearly with the number of orbitals,
+    when each orbital is mapped onto a single site.
+    """
+    times = []
+    for num_sites in [4, 32]:
+        orbitals = _get_axis_orbitals(num_sites)
+        times.append(
+            _get_min_time(
+                lambda: sr.get_repr_matrix(
+                    orbitals=orbitals,  # pylint: disable=cell-var-from-loop
+                    real_space_operator=sr.
+                    RealSpaceOperator(rotation_matrix=ROTATION_C4Z),
+                    rotation_matrix_cartesian=ROTATION_C4Z,
+                    numeric=True
+                ),
+                repeat=3
+            )
+        )
+    assert times[1] / times[0] < 24
+
+
+def test_snapshot_access_scaling():
+    """
+    Check that loading a snapshot and accessing a single symmetry operation
+    does not depend on the total number of symmetry operations.
+    """
+    times = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for num_symmetries in [10, 10000]:
+            file_path = os.path.join(tmpdir, '{}.bin'.format(num_symmetries))
+            sr.io.save(
+                _get_packed_group(num_symmetries, repr_dim=32),
+                file_path,
+                file_format='snapshot'
+            )
+            times.append(
+                _get_min_time(
+                    lambda: sr.io.load(file_path).get_symmetry(5)  # pylint: disable=cell-var-from-loop
+                )
+            )
+    # reading all of the data would scale with the factor 1000
+    assert times[1] / times[0] < 5
+
+
+def test_packed_load_scaling():
+    """
+    Check that loading a group in the packed format scales sub-linearly with
+    the number of symmetry operations, because the arrays are read in bulk
+    instead of creating each symmetry operation.
+    """
+    times = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for num_symmetries in [10, 10000]:
+            file_path = os.path.join(tmpdir, '{}.hdf5'.format(num_symmetries))
+            sr.io.save(
+                _get_packed_group(num_symmetries, repr_dim=8),
+                file_path,
+                file_format='packed'
+            )
+            times.append(
+                _get_min_time(
+                    lambda: sr.io.load(file_path).get_symmetry(5)  # pylint: disable=cell-var-from-loop
+                )
+            )
+    # linear scaling gives a ratio of 1000
+    assert times[1] / times[0] < 500
+
+
+def test_batched_construction():
+    """
+    Check that creating symmetry operations which share a rotation together
+    is faster than creating them one at a time, because the orbital blocks
+    are computed only once per rotation.
+    """
+    orbitals = _get_axis_orbitals(4)
+    real_space_operators = [
+        sr.RealSpaceOperator(
+            rotation_matrix=ROTATION_C4Z, translation_vector=[0, 0, i / 4]
+        ) for i in range(4)
+    ]
+
+    def create_batched():
+        list(
+            sr.iter_symmetry_operations(
+                orbitals=orbitals,
+                real_space_operators=real_space_operators,
+                rotation_matrices_cartesian=[ROTATION_C4Z] *
+                len(real_space_operators),
+                numeric=True
+            )
+        )
+
+    def create_single():
+        for real_space_operator in real_space_operators:
+            sr.SymmetryOperation.from_orbitals(
+                orbitals=orbitals,
+                real_space_operator=real_space_operator,
+                rotation_matrix_cartesian=ROTATION_C4Z,
+                numeric=True
+            )
+
+    time_batched = _get_min_time(create_batched, repeat=3)
+    time_single = _get_min_time(create_single, repeat=3)
+    # the blocks are computed once instead of four times
+    assert 2 * time_batched < time_single
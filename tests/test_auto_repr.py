@@ -196,3 +196,121 @@ def test_simple_repr(orbitals, rotation_matrix, reference, numeric):
     else:
         assert isinstance(result, sp.Matrix)
         assert result.equals(reference)
+
+
+def test_iter_symmetry_operations(numeric):
+    """
+    Test that the symmetry operations created by the generator match the ones
+    created separately.
+    """
+    orbitals = [
+        sr.Orbital(position=(0, 0, 0), function_string=fct, spin=spin)
+        for spin in (sr.SPIN_UP, sr.SPIN_DOWN)
+        for fct in sr.WANNIER_ORBITALS['p']
+    ]
+    rotation_matrices = [
+        np.eye(3, dtype=int),
+        np.array([[0, 1, 0], [1, 0, 0], [0, 0, 1]]),
+        np.array([[0, -1, 0], [1, 0, 0], [0, 0, 1]]),
+        -np.eye(3, dtype=int),
+    ]
+    if not numeric:
+        rotation_matrices = [sp.Matrix(rot) for rot in rotation_matrices]
+    real_space_operators = [
+        sr.RealSpaceOperator(rotation_matrix=rot, numeric=numeric)
+        for rot in rotation_matrices
+    ]
+    result = list(
+        sr.iter_symmetry_operations(
+            orbitals=orbitals,
+            real_space_operators=real_space_operators,
+            rotation_matrices_cartesian=rotation_matrices,
+            numeric=numeric
+        )
+    )
+    assert len(result) == len(rotation_matrices)
+    for sym_op, real_space_op, rot in zip(
+        result, real_space_operators, rotation_matrices
+    ):
+        reference = sr.SymmetryOperation.from_orbitals(
+            orbitals=orbitals,
+            real_space_operator=real_space_op,
+            rotation_matrix_cartesian=rot,
+            numeric=numeric
+        )
+        assert sym_op.real_space_operator == reference.real_space_operator
+        if numeric:
+            assert_allclose(
+                sym_op.repr.matrix, reference.repr.matrix, atol=1e-12
+            )
+        else:
+            assert sym_op.repr == reference.repr
+
+
+def test_iter_symmetry_operations_length_mismatch():
+    """
+    Test that an error is raised when the number of real-space operators and
+    cartesian rotation matrices do not match.
+    """
+    with pytest.raises(ValueError):
+        list(
+            sr.iter_symmetry_operations(
+                orbitals=[sr.Orbital(position=(0, 0, 0), function_string='1')],
+                real_space_operators=[
+                    sr.RealSpaceOperator(rotation_matrix=np.eye(3))
+                ],
+                rotation_matrices_cartesian=[],
+                numeric=True
+            )
+        )
+
+
+def test_shared_rotation_blocks(numeric):
+    """
+    Test that symmetry operations which share a rotation but differ in the
+    translation reuse the orbital blocks, and match the operations created
+    separately.
+    """
+    orbitals = [
+        sr.Orbital(position=pos, function_string=fct, spin=spin)
+        for spin in (sr.SPIN_UP, sr.SPIN_DOWN)
+        for pos in [(0, 0, 0), (0, 0, 0.5)]
+        for fct in sr.WANNIER_ORBITALS['s'] + sr.WANNIER_ORBITALS['p']
+    ]
+    rot = np.array([[0, -1, 0], [1, 0, 0], [0, 0, 1]])
+    if not numeric:
+        rot = sp.Matrix(rot)
+    real_space_operators = [
+        sr.RealSpaceOperator(
+            rotation_matrix=rot,
+            translation_vector=translation,
+            numeric=numeric
+        ) for translation in [(0, 0, 0), (0, 0, 0.5)]
+    ]
+    with sr.Profiler() as profiler:
+        result = list(
+            sr.iter_symmetry_operations(
+                orbitals=orbitals,
+                real_space_operators=real_space_operators,
+                rotation_matrices_cartesian=[rot, rot],
+                numeric=numeric
+            )
+        )
+    # both sites carry the same orbitals, so a single block is computed
+    assert profiler.counters['repr_matrix.block_cache.misses'] == 1
+    assert profiler.counters['repr_matrix.block_cache.hits'] == 3
+    for sym_op, real_space_op in zip(result, real_space_operators):
+        reference = sr.SymmetryOperation.from_orbitals(
+            orbitals=orbitals,
+            real_space_operator=real_space_op,
+            rotation_matrix_cartesian=rot,
+            numeric=numeric
+        )
+        if numeric:
+            assert_allclose(
+                sym_op.repr.matrix, reference.repr.matrix, atol=1e-12
+            )
+        else:
+            assert sym_op.repr == reference.repr
+    # the translation exchanges the two sites
+    assert np.allclose(np.array(result[1].repr.matrix)[:4, :4], 0)
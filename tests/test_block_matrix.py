@@ -0,0 +1,163 @@
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the block decomposition of representation matrices.
+"""
+
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose
+
+import symmetry_representation as sr
+
+
+def test_from_dense_roundtrip(symmetries_file_content):
+    """
+    Test that decomposing representation matrices into blocks and converting
+    back gives the initial matrix.
+    """
+    _, group = symmetries_file_content
+    for sym in group.symmetries:
+        block_matrix = sr.BlockPermutationMatrix.from_dense(sym.repr.matrix)
+        assert block_matrix.shape == sym.repr.matrix.shape
+        assert_allclose(block_matrix.to_dense(), sym.repr.matrix, atol=1e-12)
+
+
+def test_shared_block_table():
+    """
+    Test that equal blocks are stored only once, also across matrices.
+    """
+    block = np.array([[1, 1j], [1j, 1]]) / np.sqrt(2)
+    matrix = np.zeros((6, 6), dtype=complex)
+    matrix[2:4, 0:2] = block
+    matrix[0:2, 2:4] = block
+    matrix[4:6, 4:6] = np.array([[0.6, 0.8], [-0.8, 0.6]])
+    block_table = sr.BlockTable()
+    block_matrix = sr.BlockPermutationMatrix.from_dense(
+        matrix, block_table=block_table
+    )
+    assert len(block_table) == 2
+    assert list(block_matrix.block_ids) == [0, 0, 1]
+    sr.BlockPermutationMatrix.from_dense(
+        matrix[[2, 3, 0, 1, 4, 5]], block_table=block_table
+    )
+    assert len(block_table) == 2
+    assert_allclose(block_matrix.to_dense(), matrix)
+    assert_allclose(np.array(block_matrix), matrix)
+
+
+def test_matmul(symmetries_file_content):
+    """
+    Test applying the block matrices to vectors and matrices from both sides.
+    """
+    _, group = symmetries_file_content
+    size = group.symmetries[0].repr.matrix.shape[0]
+    rng = np.random.RandomState(42)
+    vector = rng.rand(size) + 1j * rng.rand(size)
+    matrix = rng.rand(size, size) + 1j * rng.rand(size, size)
+    for sym in group.symmetries:
+        dense = sym.repr.matrix
+        block_matrix = sr.BlockPermutationMatrix.from_dense(dense)
+        assert_allclose(block_matrix @ vector, dense @ vector, atol=1e-12)
+        assert_allclose(block_matrix @ matrix, dense @ matrix, atol=1e-12)
+        assert_allclose(vector @ block_matrix, vector @ dense, atol=1e-12)
+        assert_allclose(matrix @ block_matrix, matrix @ dense, atol=1e-12)
+        assert_allclose(
+            block_matrix @ matrix @ block_matrix.conj().transpose(),
+            dense @ matrix @ dense.conj().T,
+            atol=1e-12
+        )
+
+
+def test_iter_block_repr_matrices(sample):
+    """
+    Test that the block representation matrices match the dense
+    representation matrices, and that the blocks are shared in a supercell.
+    """
+    from monty.serialization import loadfn  # pylint: disable=import-outside-toplevel
+    symops, symops_cart = loadfn(sample('InAs_symops.json'))
+    real_space_operators = [
+        sr.RealSpaceOperator.from_pymatgen(op) for op in symops
+    ]
+    rotations_cartesian = [op.rotation_matrix for op in symops_cart]
+    orbitals = []
+    for spin in (sr.SPIN_UP, sr.SPIN_DOWN):
+        orbitals.extend([
+            sr.Orbital(position=(0, 0, 0), function_string=fct, spin=spin)
+            for fct in sr.WANNIER_ORBITALS['s'] + sr.WANNIER_ORBITALS['p']
+        ])
+        orbitals.extend([
+            sr.Orbital(
+                position=(0.25, 0.25, 0.25), function_string=fct, spin=spin
+            ) for fct in sr.WANNIER_ORBITALS['p']
+        ])
+    block_matrices = list(
+        sr.iter_block_repr_matrices(
+            orbitals=orbitals,
+            real_space_operators=real_space_operators,
+            rotation_matrices_cartesian=rotations_cartesian
+        )
+    )
+    symmetries = sr.iter_symmetry_operations(
+        orbitals=orbitals,
+        real_space_operators=real_space_operators,
+        rotation_matrices_cartesian=rotations_cartesian,
+        numeric=True
+    )
+    for block_matrix, sym in zip(block_matrices, symmetries):
+        assert_allclose(block_matrix.to_dense(), sym.repr.matrix, atol=1e-12)
+
+    # 2x2x2 supercell: the blocks are the same as in the primitive cell
+    offsets = np.array(np.meshgrid(*[[0, 1]] * 3)).reshape(3, -1).T
+    basis = sr.OrbitalBasis(
+        site_positions=np.concatenate([
+            (offsets + position) / 2
+            for position in [(0, 0, 0), (0.25, 0.25, 0.25)]
+        ]),
+        site_indices=np.repeat(np.arange(16), 3),
+        function_strings=sr.WANNIER_ORBITALS['p'],
+        function_indices=np.tile([0, 1, 2], 16),
+        spin_indices=np.zeros(48, dtype=int)
+    )
+    supercell_matrices = list(
+        sr.iter_block_repr_matrices(
+            orbitals=basis,
+            real_space_operators=[
+                sr.RealSpaceOperator(
+                    rotation_matrix=op.rotation_matrix,
+                    translation_vector=op.translation_vector / 2
+                ) for op in real_space_operators
+            ],
+            rotation_matrices_cartesian=rotations_cartesian
+        )
+    )
+    # each unique block is created only once, and shared between the matrices
+    blocks = supercell_matrices[-1].blocks
+    assert len(blocks) <= len(real_space_operators)
+    for block_matrix in supercell_matrices:
+        assert all(
+            block is shared_block
+            for block, shared_block in zip(block_matrix.blocks, blocks)
+        )
+        dense = block_matrix.to_dense()
+        assert_allclose(dense @ dense.conj().T, np.eye(48), atol=1e-12)
+
+
+def test_block_repr_matrix_invalid():
+    """
+    Test that an operation which does not map the orbital positions onto
+    each other raises an error.
+    """
+    with pytest.raises(ValueError):
+        list(
+            sr.iter_block_repr_matrices(
+                orbitals=[sr.Orbital(position=(0, 0, 0), function_string='x')],
+                real_space_operators=[
+                    sr.RealSpaceOperator(
+                        rotation_matrix=np.eye(3),
+                        translation_vector=[0.5, 0, 0]
+                    )
+                ],
+                lattice=np.eye(3)
+            )
+        )
@@ -4,8 +4,14 @@
 Tests for the command-line interface ``symmetry-repr``.
 """
 
+import os
+import json
+import shutil
 import tempfile
 
+import pytest
+import numpy as np
+import sympy as sp
 from click.testing import CliRunner
 
 import symmetry_representation as sr
@@ -49,3 +55,213 @@ def test_filter_symmetries_strained(strained_poscar, symmetries_file):
     reference = sr.io.load(symmetries_file)
     assert len(result) == len(reference)
     assert len(result[1].symmetries) == 4
+
+
+@pytest.mark.parametrize('jobs', ['1', '2'])
+def test_migrate(sample, jobs):
+    """
+    Test converting a directory of symmetry files to the packed format, in
+    the main process or in worker processes.
+    """
+    runner = CliRunner()
+    with tempfile.TemporaryDirectory() as input_dir, \
+            tempfile.TemporaryDirectory() as output_dir:
+        _, group = sr.io.load(sample('symmetries_old.hdf5'))
+        sr.io.save(group, os.path.join(input_dir, 'group.hdf5'))
+        shutil.copy(
+            sample('symmetries_old.hdf5'),
+            os.path.join(input_dir, 'symmetries_old.hdf5')
+        )
+        result = runner.invoke(
+            cli, [
+                'migrate', input_dir, '-o', output_dir, '--format', 'packed',
+                '-j', jobs
+            ],
+            catch_exceptions=False
+        )
+        assert result.exit_code == 0
+        assert 'Converted 2 file(s)' in result.output
+        migrated_group = sr.io.load(os.path.join(output_dir, 'group.hdf5'))
+        migrated_list = sr.io.load(
+            os.path.join(output_dir, 'symmetries_old.hdf5')
+        )
+    assert isinstance(migrated_group, sr.PackedSymmetryGroup)
+    assert len(migrated_group.symmetries) == len(group.symmetries)
+    assert len(migrated_list) == 2
+
+
+def test_migrate_block_table(sample):
+    """
+    Test converting symmetry files to the block format with a shared block
+    table, which is rejected for other formats and multiple jobs.
+    """
+    runner = CliRunner()
+    with tempfile.TemporaryDirectory() as input_dir, \
+            tempfile.TemporaryDirectory() as output_dir:
+        _, group = sr.io.load(sample('symmetries.hdf5'))
+        for name in ['group1.hdf5', 'group2.hdf5']:
+            sr.io.save(group, os.path.join(input_dir, name))
+        table_file = os.path.join(output_dir, 'table.hdf5')
+        for options in [['--format', 'packed'], ['-j', '2']]:
+            result = runner.invoke(
+                cli, [
+                    'migrate', input_dir, '-o', output_dir, '--block-table',
+                    table_file
+                ] + options
+            )
+            assert result.exit_code != 0
+        result = runner.invoke(
+            cli, [
+                'migrate', input_dir, '-o', output_dir, '--format', 'blocks',
+                '--block-table', table_file
+            ],
+            catch_exceptions=False
+        )
+        assert result.exit_code == 0
+        assert 'Converted 2 file(s)' in result.output
+        for name in ['group1.hdf5', 'group2.hdf5']:
+            migrated_group = sr.io.load(os.path.join(output_dir, name))
+            assert len(migrated_group.symmetries) == len(group.symmetries)
+
+
+def test_generate(unstrained_poscar):
+    """
+    Test that creating the symmetry group in parallel and streaming it to a
+    packed file gives the same result as the serial version.
+    """
+    runner = CliRunner()
+    with tempfile.TemporaryDirectory() as output_dir:
+        results = []
+        for file_format, jobs in [('hdf5', '1'), ('packed', '2')]:
+            output = os.path.join(output_dir, file_format + '.hdf5')
+            result = runner.invoke(
+                cli, [
+                    'generate', unstrained_poscar, '-b', 'In:s,p', '-b', '1:p',
+                    '--spin', '-o', output, '--format', file_format, '-j', jobs
+                ],
+                catch_exceptions=False
+            )
+            assert result.exit_code == 0
+            assert 'Created 24 symmetry operation(s)' in result.output
+            results.append(sr.io.load(output))
+    serial_group, parallel_group = results
+    assert isinstance(parallel_group, sr.PackedSymmetryGroup)
+    assert serial_group.full_group and parallel_group.full_group
+    assert len(parallel_group) == len(serial_group.symmetries)
+    for serial_op, parallel_op in zip(
+        serial_group.symmetries, parallel_group.symmetries
+    ):
+        assert serial_op.repr.matrix.shape == (14, 14)
+        np.testing.assert_allclose(
+            serial_op.rotation_matrix, parallel_op.rotation_matrix
+        )
+        np.testing.assert_allclose(
+            serial_op.repr.matrix, parallel_op.repr.matrix, atol=1e-10
+        )
+
+
+@pytest.mark.parametrize('spin', [False, True])
+def test_generate_analytic(unstrained_poscar, spin):
+    """
+    Test that the analytic symmetry group contains exact values, which match
+    the numeric symmetry group.
+    """
+    runner = CliRunner()
+    with tempfile.TemporaryDirectory() as output_dir:
+        results = []
+        for mode in ['--analytic', '--numeric']:
+            output = os.path.join(output_dir, mode[2:] + '.hdf5')
+            result = runner.invoke(
+                cli, [
+                    'generate', unstrained_poscar, '-b', 'In:p',
+                    '--spin' if spin else '--no-spin', mode, '-o', output,
+                    '--format', 'packed'
+                ],
+                catch_exceptions=False
+            )
+            assert result.exit_code == 0
+            results.append(sr.io.load(output))
+    analytic_group, numeric_group = results
+    for analytic_op, numeric_op in zip(
+        analytic_group.symmetries, numeric_group.symmetries
+    ):
+        assert not analytic_op.numeric
+        for matrix in [
+            analytic_op.rotation_matrix, analytic_op.translation_vector,
+            analytic_op.repr.matrix
+        ]:
+            assert not matrix.atoms(sp.Float)
+        np.testing.assert_allclose(
+            np.array(analytic_op.rotation_matrix).astype(float),
+            numeric_op.rotation_matrix
+        )
+        # the spin representation is determined only up to a sign
+        assert any(
+            np.allclose(
+                np.array(analytic_op.repr.matrix).astype(complex),
+                sign * numeric_op.repr.matrix,
+                atol=1e-10
+            ) for sign in [1, -1]
+        )
+
+
+@pytest.mark.parametrize('orbitals', ['Xe:s', 'In:q', 'In'])
+def test_generate_invalid_orbitals(unstrained_poscar, orbitals):
+    """
+    Test that invalid orbital specifications are rejected.
+    """
+    runner = CliRunner()
+    with tempfile.TemporaryDirectory() as output_dir:
+        result = runner.invoke(
+            cli, [
+                'generate', unstrained_poscar, '-b', orbitals, '-o',
+                os.path.join(output_dir, 'symmetries.hdf5')
+            ]
+        )
+    assert result.exit_code != 0
+
+
+def test_bench():
+    """
+    Test that the benchmark command writes a JSON report.
+    """
+    runner = CliRunner()
+    with tempfile.NamedTemporaryFile(suffix='.json') as out_file:
+        result = runner.invoke(
+            cli, [
+                'bench', '-k', 'io_load', '--quick', '-r', '2', '-o',
+                out_file.name
+            ],
+            catch_exceptions=False
+        )
+        assert result.exit_code == 0
+        with open(out_file.name) as in_file:
+            report = json.load(in_file)
+    assert report['environment']['symmetry_representation'] == sr.__version__
+    assert report['repeat'] == 2
+    assert {res['params']['file_format']
+            for res in report['benchmarks']} == set(sr.io.FILE_FORMATS)
+    for res in report['benchmarks']:
+        assert res['name'] == 'io_load'
+        assert 'error' not in res
+        assert len(res['times']) == 2
+        assert res['size_bytes'] > 0
+
+
+def test_profile():
+    """
+    Test that the '--profile' option shows the time spent in loading and
+    saving.
+    """
+    runner = CliRunner()
+    with tempfile.NamedTemporaryFile(suffix='.json') as out_file:
+        result = runner.invoke(
+            cli, [
+                '--profile', 'bench', '-k', 'io_load', '--quick', '-r', '1',
+                '-o', out_file.name
+            ],
+            catch_exceptions=False
+        )
+    assert result.exit_code == 0
+    assert 'io.load' in result.output
+    assert 'io.save.packed' in result.output
@@ -0,0 +1,148 @@
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the decomposition of symmetry groups into cosets of the pure
+translations.
+"""
+
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose
+import sympy as sp
+
+import symmetry_representation as sr
+
+ROTATION_C4Z = np.array([[0, -1, 0], [1, 0, 0], [0, 0, 1]])
+
+
+@pytest.fixture
+def orbitals():
+    """
+    Spinful p orbitals on two sites, which are exchanged by a translation by
+    half of the unit cell.
+    """
+    return [
+        sr.Orbital(position=pos, function_string=fct, spin=spin)
+        for spin in (sr.SPIN_UP, sr.SPIN_DOWN)
+        for pos in [(0, 0, 0), (0, 0, 0.5)] for fct in sr.WANNIER_ORBITALS['p']
+    ]
+
+
+@pytest.fixture
+def real_space_operators():
+    """
+    The four-fold rotations around the z-axis, combined with translations
+    by zero, half a unit cell, and one and a half unit cells.
+    """
+    return [
+        sr.RealSpaceOperator(
+            rotation_matrix=np.linalg.matrix_power(ROTATION_C4Z, k),
+            translation_vector=translation
+        ) for translation in [(0, 0, 0), (0, 0, 0.5), (0, 0, 1.5)]
+        for k in range(4)
+    ]
+
+
+def _get_reference(orbitals, real_space_operators):  # pylint: disable=redefined-outer-name
+    return [
+        sr.SymmetryOperation.from_orbitals(
+            orbitals=orbitals,
+            real_space_operator=real_space_op,
+            rotation_matrix_cartesian=real_space_op.rotation_matrix,
+            numeric=True
+        ) for real_space_op in real_space_operators
+    ]
+
+
+def _assert_same_symmetries(symmetries, reference):
+    assert len(symmetries) == len(reference)
+    for sym, ref in zip(symmetries, reference):
+        assert sym.real_space_operator == ref.real_space_operator
+        assert sym.repr.has_cc == ref.repr.has_cc
+        assert_allclose(
+            np.array(sym.repr.matrix).astype(complex),
+            np.array(ref.repr.matrix).astype(complex),
+            atol=1e-12
+        )
+
+
+def test_from_orbitals(orbitals, real_space_operators):  # pylint: disable=redefined-outer-name
+    """
+    Test that the decomposition created from the orbitals reproduces the
+    symmetry operations created separately, while storing representation
+    matrices only for the point group.
+    """
+    decomposition = sr.TranslationCosetDecomposition.from_orbitals(
+        orbitals=orbitals,
+        real_space_operators=real_space_operators,
+        rotation_matrices_cartesian=[
+            op.rotation_matrix for op in real_space_operators
+        ],
+        numeric=True,
+        full_group=True
+    )
+    assert len(decomposition) == 12
+    assert len(decomposition.representatives) == 4
+    assert len(decomposition.translation_vectors) == 2
+    assert decomposition.lattice_shifts[8:].tolist() == [[0, 0, 1]] * 4
+    _assert_same_symmetries(
+        decomposition.symmetries,
+        _get_reference(orbitals, real_space_operators)
+    )
+    assert decomposition.to_symmetry_group().full_group
+
+
+def test_decompose_group(orbitals, real_space_operators):  # pylint: disable=redefined-outer-name
+    """
+    Test decomposing an existing symmetry group.
+    """
+    reference = _get_reference(orbitals, real_space_operators)
+    decomposition = sr.SymmetryGroup(symmetries=reference,
+                                     full_group=True).decompose_translations()
+    assert len(decomposition.representatives) == 4
+    assert decomposition.translation_permutations.shape == (2, 12)
+    _assert_same_symmetries(decomposition.symmetries, reference)
+
+
+def test_decompose_analytic():
+    """
+    Test decomposing an analytic symmetry group, which does not contain the
+    identity.
+    """
+    symmetries = [
+        sr.SymmetryOperation(
+            rotation_matrix=sp.Matrix(rot),
+            translation_vector=sp.Matrix(translation),
+            repr_matrix=sp.Matrix(repr_matrix)
+        ) for rot, translation, repr_matrix in [
+            (-sp.eye(3), [0, 0, 0], sp.eye(2)),
+            (-sp.eye(3), [0, 0, sp.Rational(1, 2)], [[0, 1], [1, 0]]),
+            (sp.eye(3), [0, 0, sp.Rational(1, 2)], [[0, 1], [1, 0]]),
+        ]
+    ]
+    decomposition = sr.SymmetryGroup(symmetries=symmetries
+                                     ).decompose_translations()
+    assert not decomposition.numeric
+    # the identity is not given, so the pure translation represents its coset
+    assert len(decomposition.representatives) == 2
+    assert len(decomposition.translation_vectors) == 2
+    for sym, ref in zip(decomposition.symmetries, symmetries):
+        assert sym == ref
+
+
+def test_decompose_invalid_translation():
+    """
+    Test that an error is raised when the representation of a pure
+    translation is not a permutation.
+    """
+    symmetry_group = sr.SymmetryGroup(
+        symmetries=[
+            sr.SymmetryOperation(
+                rotation_matrix=np.eye(3),
+                translation_vector=[0, 0, 0.5],
+                repr_matrix=np.diag([1, -1])
+            )
+        ]
+    )
+    with pytest.raises(ValueError):
+        symmetry_group.decompose_translations()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the multiplication table, conjugacy classes and character table of
+symmetry groups.
+"""
+
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose
+from monty.serialization import loadfn
+
+import symmetry_representation as sr
+
+LATTICE_INAS = [[0., 3.029, 3.029], [3.029, 0., 3.029], [3.029, 3.029, 0.]]
+
+
+@pytest.fixture
+def inas_group(sample):
+    """
+    Returns the symmetry group of InAs, with or without spin.
+    """
+    def inner(spin):
+        if spin:
+            return sr.io.load(sample('symmetries_InAs.hdf5'))
+        symops, _ = loadfn(sample('InAs_symops.json'))
+        orbitals = [
+            sr.Orbital(position=(0, 0, 0), function_string=fct)
+            for fct in sr.WANNIER_ORBITALS['s'] + sr.WANNIER_ORBITALS['p']
+        ] + [
+            sr.Orbital(position=(0.25, 0.25, 0.25), function_string=fct)
+            for fct in sr.WANNIER_ORBITALS['p']
+        ]
+        return sr.SymmetryGroup(
+            sr.iter_symmetry_operations(
+                orbitals=orbitals,
+                real_space_operators=[
+                    sr.RealSpaceOperator.from_pymatgen(op) for op in symops
+                ],
+                lattice=LATTICE_INAS,
+                numeric=True
+            ),
+            full_group=True
+        )
+
+    return inner
+
+
+def test_multiplication_table(inas_group):  # pylint: disable=redefined-outer-name
+    """
+    Test the multiplication table against the products of the real-space
+    operations, for a group which includes time-reversal.
+    """
+    symmetries = inas_group(spin=True).symmetries
+    time_reversal = sr.SymmetryOperation(
+        rotation_matrix=np.eye(3),
+        repr_matrix=np.eye(len(symmetries[0].repr.matrix)),
+        repr_has_cc=True
+    )
+    group = sr.SymmetryGroup(
+        symmetries + [time_reversal @ sym for sym in symmetries],
+        full_group=True
+    )
+    table = group.get_multiplication_table()
+    for i, sym1 in enumerate(group.symmetries):
+        for j, sym2 in enumerate(group.symmetries):
+            product = sym1 @ sym2
+            result = group.symmetries[table[i, j]]
+            assert_allclose(result.rotation_matrix, product.rotation_matrix)
+            assert_allclose(
+                (result.translation_vector - product.translation_vector + 0.5)
+                % 1 - 0.5,
+                0,
+                atol=1e-12
+            )
+            assert result.repr.has_cc == product.repr.has_cc
+    for elements in group.get_conjugacy_classes():
+        # the classes are closed under conjugation
+        inverses = np.argmax(table == 0, axis=1)
+        assert set(table[table[:, elements],
+                         inverses[:, np.newaxis]].flat) == set(elements)
+
+
+@pytest.mark.parametrize(
+    'spin, num_classes, dimensions, multiplicities', [
+        (False, 5, [1, 1, 2, 3, 3], [1, 0, 0, 0, 2]),
+        (True, 8, [1, 1, 2, 2, 2, 3, 3, 4], [0, 0, 1, 2, 0, 0, 0, 2]),
+    ]
+)
+def test_character_table(
+    inas_group, spin, num_classes, dimensions, multiplicities
+):  # pylint: disable=redefined-outer-name
+    """
+    Test the character table and irrep multiplicities of InAs, where the
+    spinful representation gives the character table of the double group.
+    """
+    group = inas_group(spin=spin)
+    assert [len(elements)
+            for elements in group.get_conjugacy_classes()] == [1, 6, 3, 6, 8]
+    classes, characters = group.get_character_table()
+    class_sizes = np.array([len(elements) for elements in classes])
+    assert len(classes) == num_classes
+    assert_allclose(characters[:, 0], dimensions)
+    assert_allclose((characters * class_sizes) @ characters.conj().T /
+                    np.sum(class_sizes),
+                    np.eye(num_classes),
+                    atol=1e-12)
+    assert list(group.get_irrep_multiplicities()) == multiplicities
+    assert_allclose(
+        group.get_traces(),
+        [np.trace(sym.repr.matrix) for sym in group.symmetries],
+        atol=1e-12
+    )
+
+
+def test_block_matrices(inas_group):  # pylint: disable=redefined-outer-name
+    """
+    Test that representation matrices given as block matrices give the same
+    traces and irrep multiplicities.
+    """
+    group = inas_group(spin=True)
+    packed_group = sr.PackedSymmetryGroup.from_symmetry_group(group)
+    block_group = sr.PackedSymmetryGroup(
+        rotation_matrices=packed_group.rotation_matrices,
+        translation_vectors=packed_group.translation_vectors,
+        repr_matrices=[
+            sr.BlockPermutationMatrix.from_dense(matrix)
+            for matrix in packed_group.repr_matrices
+        ],
+        repr_has_cc=packed_group.repr_has_cc,
+        full_group=True
+    )
+    assert_allclose(block_group.get_traces(), group.get_traces(), atol=1e-12)
+    assert list(block_group.get_irrep_multiplicities()
+                ) == list(group.get_irrep_multiplicities())
+
+
+def test_cache(inas_group, tmpdir):  # pylint: disable=redefined-outer-name
+    """
+    Test that the group tables are cached without changing the equality and
+    serialization of the group, and are re-calculated when the symmetries
+    are replaced.
+    """
+    group = inas_group(spin=False)
+    reference = sr.SymmetryGroup(group.symmetries, full_group=True)
+    table = group.get_multiplication_table()
+    assert group.get_multiplication_table() is table
+    assert group == reference
+    file_path = str(tmpdir.join('group.hdf5'))
+    sr.io.save(group, file_path)
+    assert sr.io.load(file_path) == reference
+
+    assert '_group_tables' not in repr(group)
+
+    group.symmetries = group.symmetries[:1]
+    assert group.get_multiplication_table().shape == (1, 1)
+
+
+def test_compare_other_types(inas_group):  # pylint: disable=redefined-outer-name
+    """
+    Test that comparing (packed) symmetry groups to other types does not
+    raise an error.
+    """
+    group = inas_group(spin=False)
+    packed_group = sr.PackedSymmetryGroup.from_symmetry_group(group)
+    packed_group.get_multiplication_table()
+    for group1, group2 in [(group, packed_group), (packed_group, group)]:
+        assert group1 == group2
+        assert not group1 != group2  # pylint: disable=unneeded-not
+    for value in [None, 1, group.symmetries]:
+        for group1 in [group, packed_group]:
+            assert not group1 == value  # pylint: disable=unneeded-not
+            assert group1 != value
+
+
+def test_invalid(inas_group):  # pylint: disable=redefined-outer-name
+    """
+    Test that incomplete groups, and character tables of groups with
+    anti-unitary symmetries raise an error.
+    """
+    symmetries = inas_group(spin=False).symmetries
+    with pytest.raises(ValueError):
+        sr.SymmetryGroup(symmetries[:5]).get_conjugacy_classes()
+    time_reversal = sr.SymmetryOperation(
+        rotation_matrix=np.eye(3),
+        repr_matrix=np.eye(len(symmetries[0].repr.matrix)),
+        repr_has_cc=True
+    )
+    group = sr.SymmetryGroup(
+        symmetries + [time_reversal @ sym for sym in symmetries],
+        full_group=True
+    )
+    assert len(group.get_conjugacy_classes()) == 10
+    with pytest.raises(ValueError):
+        group.get_character_table()
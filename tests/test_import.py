@@ -0,0 +1,57 @@
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests that slow dependencies are imported only when they are needed.
+"""
+
+import sys
+import json
+import subprocess
+
+import pytest
+
+import symmetry_representation as sr
+from symmetry_representation import _compatibility, _get_repr_matrix
+
+SLOW_MODULES = ['sympy', 'scipy', 'pymatgen']
+
+
+def _get_imported_slow_modules(code):
+    """
+    Run the given code in a new interpreter, and return the slow modules which
+    were imported.
+    """
+    output = subprocess.check_output([
+        sys.executable, '-c', code + '\nimport sys, json\n' +
+        'print(json.dumps([m for m in {} if m in sys.modules]))'.format(
+            json.dumps(SLOW_MODULES)
+        )
+    ])
+    return json.loads(output.decode('utf-8').splitlines()[-1])
+
+
+@pytest.mark.parametrize(
+    'code', [
+        'import symmetry_representation',
+        'from symmetry_representation._cli import cli',
+    ]
+)
+def test_no_slow_imports(code):
+    """
+    Check that importing the package or the command-line interface does not
+    import sympy, scipy or pymatgen.
+    """
+    assert _get_imported_slow_modules(code) == []
+
+
+def test_lazy_attributes():
+    """
+    Check that the lazily imported attributes match the public interface of
+    the corresponding submodules.
+    """
+    for module in [_compatibility, _get_repr_matrix]:
+        for name in module.__all__:
+            assert name in sr.__all__
+            assert getattr(sr, name) is getattr(module, name)
+    with pytest.raises(AttributeError):
+        sr.does_not_exist  # pylint: disable=pointless-statement
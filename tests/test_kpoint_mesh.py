@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the reduction of k-point meshes to their irreducible k-points.
+"""
+
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose
+
+import symmetry_representation as sr
+
+
+def _get_orbitals():
+    orbitals = []
+    for spin in (sr.SPIN_UP, sr.SPIN_DOWN):
+        orbitals.extend([
+            sr.Orbital(position=(0, 0, 0), function_string=fct, spin=spin)
+            for fct in sr.WANNIER_ORBITALS['s'] + sr.WANNIER_ORBITALS['p']
+        ])
+        orbitals.extend([
+            sr.Orbital(
+                position=(0.25, 0.25, 0.25), function_string=fct, spin=spin
+            ) for fct in sr.WANNIER_ORBITALS['p']
+        ])
+    return orbitals
+
+
+@pytest.fixture
+def symmetry_group(sample):
+    """
+    Returns the symmetry group of InAs, including time-reversal.
+    """
+    time_reversal = sr.get_time_reversal(
+        orbitals=_get_orbitals(), numeric=True
+    )
+    symmetries = sr.io.load(sample('symmetries_InAs.hdf5')).symmetries
+    return sr.SymmetryGroup(
+        symmetries=symmetries + [time_reversal @ sym for sym in symmetries],
+        full_group=True
+    )
+
+
+def test_mesh():
+    """
+    Test the ordering of the k-points in the mesh.
+    """
+    kpoints = sr.get_kpoint_mesh([2, 3], shift=[0, 0.5])
+    assert_allclose(
+        kpoints,
+        [[0, 1 / 6], [0, 1 / 2], [0, 5 / 6], [0.5, 1 / 6], [0.5, 1 / 2],
+         [0.5, 5 / 6]]
+    )
+
+
+@pytest.mark.parametrize('size', [[6, 6, 6], [4, 4, 4]])
+def test_reduce_mesh(symmetry_group, size):  # pylint: disable=redefined-outer-name
+    """
+    Test the reduction of a mesh against the mapping of the k-points by the
+    individual symmetries.
+    """
+    kpoints = sr.get_kpoint_mesh(size)
+    reduction = sr.reduce_kpoint_mesh(size, symmetry_group=symmetry_group)
+    kpoint_indices = sr.get_kpoint_indices(
+        kpoints, symmetry_group=symmetry_group
+    )
+    assert_allclose(reduction.kpoints, kpoints[reduction.indices])
+    assert np.sum(reduction.weights) == len(kpoints)
+    assert_allclose(
+        reduction.indices[reduction.star_indices],
+        np.min(kpoint_indices, axis=0)
+    )
+    for idx, star_idx in enumerate(reduction.star_indices):
+        star = set(kpoint_indices[:, reduction.indices[star_idx]])
+        assert idx in star
+        assert len(star) == reduction.weights[star_idx]
+    assert list(
+        kpoint_indices[reduction.symmetry_indices,
+                       reduction.indices[reduction.star_indices]]
+    ) == list(range(len(kpoints)))
+    little_group_masks = np.unpackbits(
+        reduction.little_group_masks, axis=1, bitorder='little'
+    )[:, :len(symmetry_group.symmetries)].astype(bool)
+    assert np.all(
+        little_group_masks == (kpoint_indices == np.arange(len(kpoints))).T
+    )
+    # the size of the little group is given by the size of the star
+    assert np.all(
+        np.sum(little_group_masks[reduction.indices], axis=1) *
+        reduction.weights == len(symmetry_group.symmetries)
+    )
+
+
+def test_reduce_shifted_mesh(symmetry_group):  # pylint: disable=redefined-outer-name
+    """
+    Test reducing a shifted mesh with time-reversal symmetry, and that a
+    shifted mesh which is not mapped onto itself raises an error.
+    """
+    symmetries = symmetry_group.symmetries
+    identity, time_reversal = symmetries[0], symmetries[24]
+    assert np.allclose(np.array(identity.rotation_matrix), np.eye(3))
+    assert np.allclose(np.array(time_reversal.rotation_matrix), np.eye(3))
+    reduction = sr.reduce_kpoint_mesh(
+        [2, 3, 4],
+        symmetry_group=sr.SymmetryGroup([identity, time_reversal],
+                                        full_group=True),
+        shift=0.5
+    )
+    # no k-point is invariant under k -> -k
+    assert len(reduction.indices) == 12
+    assert np.all(reduction.weights == 2)
+    with pytest.raises(ValueError):
+        sr.reduce_kpoint_mesh([4, 4, 4],
+                              symmetry_group=symmetry_group,
+                              shift=0.5)
+    with pytest.raises(ValueError):
+        sr.reduce_kpoint_mesh([4, 4, 4],
+                              symmetry_group=symmetry_group,
+                              shift=0.3)
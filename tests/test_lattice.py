@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the conversion of operations between reduced and cartesian
+coordinates.
+"""
+
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose
+import sympy as sp
+from monty.serialization import loadfn
+
+import symmetry_representation as sr
+
+LATTICE_INAS = [[0., 3.029, 3.029], [3.029, 0., 3.029], [3.029, 3.029, 0.]]
+LATTICE_HEXAGONAL = [[3., 0., 0.], [-1.5, 1.5 * np.sqrt(3), 0.], [0., 0., 5.]]
+
+
+@pytest.fixture
+def inas_symops(sample):
+    """
+    Returns the reduced and cartesian symmetry operations of InAs.
+    """
+    return loadfn(sample('InAs_symops.json'))
+
+
+def test_rotations(inas_symops):  # pylint: disable=redefined-outer-name
+    """
+    Test the conversion of rotation matrices against the cartesian operations
+    from pymatgen.
+    """
+    symops, symops_cart = inas_symops
+    rotations = [op.rotation_matrix for op in symops]
+    rotations_cart = [op.rotation_matrix for op in symops_cart]
+    assert_allclose(
+        sr.to_cartesian_rotations(rotations, lattice=LATTICE_INAS),
+        rotations_cart,
+        atol=1e-12
+    )
+    assert_allclose(
+        sr.to_reduced_rotations(rotations_cart, lattice=LATTICE_INAS),
+        rotations,
+        atol=1e-12
+    )
+    assert_allclose(
+        sr.to_cartesian_rotations(rotations[3], lattice=LATTICE_INAS),
+        rotations_cart[3],
+        atol=1e-12
+    )
+
+
+def test_translations(inas_symops):  # pylint: disable=redefined-outer-name
+    """
+    Test the conversion of translation vectors.
+    """
+    symops, symops_cart = inas_symops
+    translations = [op.translation_vector for op in symops]
+    translations_cart = [op.translation_vector for op in symops_cart]
+    assert_allclose(
+        sr.to_cartesian_translations(translations, lattice=LATTICE_INAS),
+        translations_cart,
+        atol=1e-12
+    )
+    assert_allclose(
+        sr.to_reduced_translations(translations_cart, lattice=LATTICE_INAS),
+        translations,
+        atol=1e-12
+    )
+
+
+def test_invalid_lattice():
+    """
+    Test that singular or non-square lattices raise an error.
+    """
+    with pytest.raises(ValueError):
+        sr.to_cartesian_rotations(np.eye(3), lattice=[[1, 0, 0], [0, 1, 0]])
+    with pytest.raises(ValueError):
+        sr.to_cartesian_rotations(
+            np.eye(3), lattice=[[1, 0, 0], [0, 1, 0], [1, 1, 0]]
+        )
+
+
+@pytest.mark.parametrize(
+    'rotation_matrix, lattice', [
+        ([[0, 0, 1], [1, 0, 0], [0, 1, 0]], LATTICE_INAS),
+        ([[0, -1, 0], [1, -1, 0], [0, 0, 1]], LATTICE_HEXAGONAL),
+        ([[0, 1, 0], [1, 0, 0], [0, 0, -1]], LATTICE_HEXAGONAL),
+    ]
+)
+def test_repr_matrix(rotation_matrix, lattice, numeric):
+    """
+    Test that the representation matrix created from the lattice is the same
+    as that created from the cartesian rotation matrix.
+    """
+    orbitals = [
+        sr.Orbital(position=(0, 0, 0), function_string=fct, spin=spin)
+        for spin in (sr.SPIN_UP, sr.SPIN_DOWN)
+        for fct in sr.WANNIER_ORBITALS['p']
+    ]
+    real_space_operator = sr.RealSpaceOperator(
+        rotation_matrix=rotation_matrix, numeric=numeric
+    )
+    rotation_matrix_cartesian = sr.to_cartesian_rotations(
+        rotation_matrix, lattice=lattice
+    )
+    if not numeric:
+        rotation_matrix_cartesian = sp.Matrix(
+            np.round(rotation_matrix_cartesian, 10)
+        ).applyfunc(
+            lambda value: sp.nsimplify(value, [sp.sqrt(3)], tolerance=1e-10)
+        )
+    result = sr.get_repr_matrix(
+        orbitals=orbitals,
+        real_space_operator=real_space_operator,
+        lattice=lattice,
+        numeric=numeric
+    )
+    reference = sr.get_repr_matrix(
+        orbitals=orbitals,
+        real_space_operator=real_space_operator,
+        rotation_matrix_cartesian=rotation_matrix_cartesian,
+        numeric=numeric
+    )
+    if numeric:
+        assert_allclose(result, reference, atol=1e-12)
+    else:
+        assert result == reference
+
+
+def test_iter_symmetry_operations(inas_symops):  # pylint: disable=redefined-outer-name
+    """
+    Test creating the symmetry operations from the lattice and reduced
+    operations only.
+    """
+    symops, symops_cart = inas_symops
+    orbitals = [
+        sr.Orbital(position=pos, function_string=fct)
+        for pos in [(0, 0, 0), (0.25, 0.25, 0.25)]
+        for fct in sr.WANNIER_ORBITALS['p']
+    ]
+    real_space_operators = [
+        sr.RealSpaceOperator.from_pymatgen(op) for op in symops
+    ]
+    result = sr.iter_symmetry_operations(
+        orbitals=orbitals,
+        real_space_operators=real_space_operators,
+        lattice=LATTICE_INAS,
+        numeric=True
+    )
+    reference = sr.iter_symmetry_operations(
+        orbitals=orbitals,
+        real_space_operators=real_space_operators,
+        rotation_matrices_cartesian=[op.rotation_matrix for op in symops_cart],
+        numeric=True
+    )
+    for sym, sym_reference in zip(result, reference):
+        assert_allclose(sym.repr.matrix, sym_reference.repr.matrix, atol=1e-12)
+
+
+def test_invalid_arguments():
+    """
+    Test that giving both or neither of the cartesian rotation matrix and the
+    lattice raises an error, as well as a rotation whose exact form is not
+    known in the analytic case.
+    """
+    orbitals = [sr.Orbital(position=(0, 0, 0), function_string='x')]
+    real_space_operator = sr.RealSpaceOperator(rotation_matrix=np.eye(3))
+    with pytest.raises(ValueError):
+        sr.get_repr_matrix(
+            orbitals=orbitals,
+            real_space_operator=real_space_operator,
+            numeric=True
+        )
+    with pytest.raises(ValueError):
+        sr.get_repr_matrix(
+            orbitals=orbitals,
+            real_space_operator=real_space_operator,
+            rotation_matrix_cartesian=np.eye(3),
+            lattice=np.eye(3),
+            numeric=True
+        )
+    with pytest.raises(ValueError):
+        sr.get_repr_matrix(
+            orbitals=orbitals,
+            real_space_operator=sr.RealSpaceOperator(
+                rotation_matrix=[[0, -1, 0], [1, 0, 0], [0, 0, 1]]
+            ),
+            lattice=[[1, 0, 0], [0.3, 1, 0], [0, 0, 1]],
+            numeric=False
+        )
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the handling of polynomial orbital functions as coefficient vectors.
+"""
+
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose
+import sympy as sp
+
+import symmetry_representation as sr
+from symmetry_representation._get_repr_matrix._expr_utils import _get_substitution
+from symmetry_representation._get_repr_matrix._monomial_space import _MonomialSpace
+
+# three-fold rotation around the (1, 1, 1) axis
+ROTATION_C3 = np.array([[0, 0, 1], [1, 0, 0], [0, 1, 0]])
+
+
+@pytest.mark.parametrize('shell', ['s', 'p', 'd', 'f', 'sp3d2'])
+def test_rotation_matrix(shell, numeric):
+    """
+    Test that rotating the coefficient vector gives the same result as
+    substituting the rotated coordinates.
+    """
+    functions = [sp.sympify(fct) for fct in sr.WANNIER_ORBITALS[shell]]
+    space = _MonomialSpace.from_expressions(functions)
+    if numeric:
+        rot = np.array([[0.6, -0.8, 0], [0.8, 0.6, 0], [0, 0, 1]])
+    else:
+        rot = sp.Matrix([[sp.Rational(3, 5), -sp.Rational(4, 5), 0],
+                         [sp.Rational(4, 5),
+                          sp.Rational(3, 5), 0], [0, 0, 1]])
+    rotation_matrix = space.get_rotation_matrix(rot, numeric=numeric)
+    for function in functions:
+        reference = sp.expand(
+            function.subs(
+                _get_substitution(sp.Matrix(rot)), simultaneous=True
+            )
+        )
+        result = rotation_matrix @ space.to_vector(function, numeric=numeric)
+        if numeric:
+            assert_allclose(
+                result, space.to_vector(reference, numeric=True), atol=1e-12
+            )
+        else:
+            assert sp.expand(space.to_expression(result) - reference) == 0
+
+
+def test_f_orbitals(numeric):
+    """
+    Test that the numeric and analytic representation matrices of the f
+    orbitals for a three-fold rotation agree.
+    """
+    orbitals = [
+        sr.Orbital(position=(0, 0, 0), function_string=fct)
+        for fct in ['x**3', 'y**3', 'z**3']
+    ]
+    rot = ROTATION_C3 if numeric else sp.Matrix(ROTATION_C3)
+    result = sr.get_repr_matrix(
+        orbitals=orbitals,
+        real_space_operator=sr.RealSpaceOperator(
+            rotation_matrix=rot, numeric=numeric
+        ),
+        rotation_matrix_cartesian=rot,
+        numeric=numeric
+    )
+    assert_allclose(np.array(result).astype(complex), ROTATION_C3, atol=1e-12)
+
+
+def test_non_polynomial():
+    """
+    Test that functions which are not polynomials are still supported.
+    """
+    assert _MonomialSpace.from_expressions([sp.sympify('sin(x)')]) is None
+    result = sr.get_repr_matrix(
+        orbitals=[
+            sr.Orbital(
+                position=(0, 0, 0),
+                function_string='exp(-sqrt(x**2 + y**2 + z**2))'
+            )
+        ],
+        real_space_operator=sr.RealSpaceOperator(rotation_matrix=ROTATION_C3),
+        rotation_matrix_cartesian=ROTATION_C3,
+        numeric=True
+    )
+    assert_allclose(result, [[1]])
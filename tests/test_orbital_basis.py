@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the columnar orbital basis.
+"""
+
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose
+
+import symmetry_representation as sr
+
+
+@pytest.fixture
+def structure():
+    """
+    Creates the InAs structure.
+    """
+    from pymatgen.core import Structure  # pylint: disable=import-outside-toplevel
+    return Structure(
+        lattice=[[0., 3.029, 3.029], [3.029, 0., 3.029], [3.029, 3.029, 0.]],
+        species=['In', 'As'],
+        coords=[[0, 0, 0], [0.25, 0.25, 0.25]]
+    )
+
+
+def _get_orbitals():
+    orbitals = []
+    for spin in (sr.SPIN_UP, sr.SPIN_DOWN):
+        orbitals.extend([
+            sr.Orbital(position=(0, 0, 0), function_string=fct, spin=spin)
+            for fct in sr.WANNIER_ORBITALS['s'] + sr.WANNIER_ORBITALS['p']
+        ])
+        orbitals.extend([
+            sr.Orbital(
+                position=(0.25, 0.25, 0.25), function_string=fct, spin=spin
+            ) for fct in sr.WANNIER_ORBITALS['p']
+        ])
+    return orbitals
+
+
+def _assert_same_orbitals(basis, orbitals):
+    assert len(basis) == len(orbitals)
+    for orbital, reference in zip(basis, orbitals):
+        assert_allclose(orbital.position, reference.position)
+        assert orbital.function == reference.function
+        assert orbital.spin == reference.spin
+
+
+def test_from_orbitals():
+    """
+    Test creating the basis from a list of orbitals.
+    """
+    orbitals = _get_orbitals()
+    # a function string which describes an existing function is merged
+    orbitals.append(sr.Orbital(position=(1, 0, 0), function_string='1 * x'))
+    basis = sr.OrbitalBasis.from_orbitals(orbitals)
+    _assert_same_orbitals(basis, orbitals)
+    assert list(basis.site_indices) == ([0] * 4 + [1] * 3) * 2 + [0]
+    assert list(basis.spin_indices) == [1] * 7 + [2] * 7 + [0]
+    assert basis.function_strings == ('1', 'z', 'x', 'y')
+    assert list(basis.shell_indices) == [-1] * 15
+
+
+def test_from_structure(structure):  # pylint: disable=redefined-outer-name
+    """
+    Test that the basis created from a structure matches the list of orbitals.
+    """
+    basis = sr.OrbitalBasis.from_structure(
+        structure, {
+            'In': ['s', 'p'],
+            'As': ['p']
+        }, spin=True
+    )
+    _assert_same_orbitals(basis, _get_orbitals())
+    assert basis.shells == ('s', 'p')
+    assert list(basis.shell_indices) == [0, 1, 1, 1, 1, 1, 1] * 2
+    assert_allclose(basis.positions[4], [0.25, 0.25, 0.25])
+
+
+@pytest.mark.parametrize('shells', [{'Xe': ['s']}, {2: ['s']}, {'In': ['q']}])
+def test_from_structure_invalid(structure, shells):  # pylint: disable=redefined-outer-name
+    """
+    Test that invalid site keys and shells raise an error.
+    """
+    with pytest.raises(ValueError):
+        sr.OrbitalBasis.from_structure(structure, shells)
+
+
+def test_block_indices(structure):  # pylint: disable=redefined-outer-name
+    """
+    Test grouping the orbitals by site, shell and spin.
+    """
+    basis = sr.OrbitalBasis.from_structure(
+        structure, {
+            'In': ['s', 'p'],
+            'As': ['p']
+        }, spin=True
+    )
+    blocks = basis.get_block_indices()
+    assert list(blocks) == [(0, 0, 1), (0, 1, 1), (1, 1, 1), (0, 0, 2),
+                            (0, 1, 2), (1, 1, 2)]
+    assert list(blocks[(1, 1, 2)]) == [11, 12, 13]
+    site_blocks = basis.get_block_indices('site')
+    assert list(site_blocks) == [(0, ), (1, )]
+    assert list(site_blocks[(1, )]) == [4, 5, 6, 11, 12, 13]
+    with pytest.raises(ValueError):
+        basis.get_block_indices('function')
+
+
+def test_repr_matrix(structure, numeric):  # pylint: disable=redefined-outer-name
+    """
+    Test that the representation matrix is the same for the basis and the
+    list of orbitals.
+    """
+    basis = sr.OrbitalBasis.from_structure(
+        structure, {
+            'In': ['s', 'p'],
+            'As': ['p']
+        }, spin=True
+    )
+    rotation_matrix = np.array([[0, 1, 0], [1, 0, 0], [0, 0, 1]])
+    rotation_matrix_cartesian = np.array([[0, 1, 0], [1, 0, 0], [0, 0, 1]])
+    kwargs = dict(
+        real_space_operator=sr.RealSpaceOperator(
+            rotation_matrix=rotation_matrix, numeric=numeric
+        ),
+        rotation_matrix_cartesian=rotation_matrix_cartesian,
+        numeric=numeric
+    )
+    result = sr.get_repr_matrix(orbitals=basis, **kwargs)
+    reference = sr.get_repr_matrix(orbitals=_get_orbitals(), **kwargs)
+    assert_allclose(
+        np.array(result).astype(complex),
+        np.array(reference).astype(complex)
+    )
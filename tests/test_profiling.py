@@ -0,0 +1,106 @@
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the instrumentation of the representation construction and
+input / output.
+"""
+
+import tempfile
+
+import numpy as np
+
+import symmetry_representation as sr
+
+ROTATION_C4Z = np.array([[0, -1, 0], [1, 0, 0], [0, 0, 1]])
+# rotation around the z-axis which is not contained in the shell library
+ROTATION_Z = np.array([[0.6, -0.8, 0], [0.8, 0.6, 0], [0, 0, 1]])
+
+
+def _get_rotation_repr_matrix():
+    """
+    Create the representation matrix of a rotation around the z-axis for
+    spinful p orbitals.
+    """
+    orbitals = [
+        sr.Orbital(position=[0, 0, 0], function_string=fct, spin=spin)
+        for spin in (sr.SPIN_UP, sr.SPIN_DOWN)
+        for fct in sr.WANNIER_ORBITALS['p']
+    ]
+    return sr.get_repr_matrix(
+        orbitals=orbitals,
+        real_space_operator=sr.RealSpaceOperator(rotation_matrix=ROTATION_Z),
+        rotation_matrix_cartesian=ROTATION_Z,
+        numeric=True
+    )
+
+
+def test_repr_matrix_phases():
+    """
+    Check that the phases of the representation construction are recorded,
+    and passed to the callback.
+    """
+    events = []
+    with sr.Profiler(
+        callback=lambda name, duration: events.append(name)
+    ) as profiler:
+        _get_rotation_repr_matrix()
+    report = profiler.get_report()
+    timings = report['timings']
+    assert timings['repr_matrix.total']['calls'] == 1
+    assert timings['repr_matrix.substitution']['calls'] == 6
+    # the spin rotation is computed once for each spin
+    assert timings['repr_matrix.spin_rotation']['calls'] == 2
+    for name in [
+        'repr_matrix.positions_mapping', 'repr_matrix.expr_to_vector',
+        'repr_matrix.unitarity_check'
+    ]:
+        assert timings[name]['calls'] > 0
+    assert 'repr_matrix.simplify' not in timings
+    assert (
+        timings['repr_matrix.total']['total'] >=
+        timings['repr_matrix.expr_to_vector']['total']
+    )
+    assert report['counters'] == {
+        'repr_matrix.builders': 1,
+        'repr_matrix.operations': 1,
+        'repr_matrix.block_cache.misses': 1,
+        'repr_matrix.shell_library.misses': 6
+    }
+    assert sorted(events) == sorted(
+        name for name, timing in timings.items()
+        for _ in range(timing['calls'])
+    )
+    assert 'repr_matrix.total' in profiler.format_report()
+
+
+def test_inactive():
+    """
+    Check that nothing is recorded outside of the profiler context, and that
+    nested profilers both record the events.
+    """
+    with sr.Profiler() as outer_profiler:
+        with sr.Profiler() as inner_profiler:
+            _get_rotation_repr_matrix()
+    _get_rotation_repr_matrix()
+    assert outer_profiler.get_report() == inner_profiler.get_report()
+    assert outer_profiler.counters['repr_matrix.operations'] == 1
+
+
+def test_io_phases():
+    """
+    Check that saving and loading is recorded, with the detected format.
+    """
+    symmetry_group = sr.SymmetryGroup(
+        symmetries=[
+            sr.SymmetryOperation(
+                rotation_matrix=ROTATION_C4Z, repr_matrix=np.eye(2)
+            )
+        ],
+        full_group=False
+    )
+    with tempfile.NamedTemporaryFile() as tmpf, sr.Profiler() as profiler:
+        sr.io.save(symmetry_group, tmpf.name, file_format='packed')
+        sr.io.load(tmpf.name)
+    assert profiler.timings['io.save.packed']['calls'] == 1
+    assert profiler.timings['io.load']['calls'] == 1
+    assert profiler.counters == {'io.load.packed': 1}
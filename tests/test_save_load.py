@@ -7,9 +7,11 @@
 Tests for saving and loading ``symmetry-representation`` objects.
 """
 
+import os
 import tempfile
 
 import pytest
+import h5py
 import numpy as np
 import sympy as sp
 
@@ -63,3 +65,266 @@ def test_load_samples(sample, sample_name):
     assert isinstance(res, list)
     assert isinstance(res[0], sr.SymmetryOperation)
     assert isinstance(res[1], sr.SymmetryGroup)
+
+
+def test_load_legacy_iterable():
+    """
+    Test loading a list in the legacy format, where the indices contain gaps
+    and there are additional keys.
+    """
+    with tempfile.NamedTemporaryFile() as f:
+        with h5py.File(f.name, 'w') as hdf5_handle:
+            for key, value in [('0', 1), ('2', -1), ('10', 1j)]:
+                hdf5_handle[key + '/matrix'] = value * np.eye(2)
+                hdf5_handle[key + '/has_cc'] = False
+            hdf5_handle['description'] = 'legacy list'
+        res = sr.io.load(f.name)
+    assert [rep.matrix[0, 0] for rep in res] == [1, -1, 1j]
+
+
+def test_save_load_packed():
+    """
+    Test saving and loading a symmetry group in packed format.
+    """
+    with tempfile.NamedTemporaryFile() as f:
+        sr.io.save(SYM_GROUP, f.name, file_format='packed')
+        result = sr.io.load(f.name)
+    assert isinstance(result, sr.PackedSymmetryGroup)
+    assert result.full_group == SYM_GROUP.full_group
+    assert result.symmetries == SYM_GROUP.symmetries
+    assert result.to_symmetry_group() == SYM_GROUP
+
+
+def test_save_packed_invalid():
+    """
+    Test that objects which are not numeric symmetry groups cannot be saved in
+    packed format.
+    """
+    with tempfile.NamedTemporaryFile() as f:
+        with pytest.raises(TypeError):
+            sr.io.save([SYM_GROUP], f.name, file_format='packed')
+        with pytest.raises(ValueError):
+            sr.io.save(SYM_GROUP, f.name, file_format='invalid')
+
+
+@pytest.mark.parametrize('file_format', ['hdf5', 'packed'])
+def test_packed_group_from_sample(sample, file_format):
+    """
+    Test converting a legacy sample file to the other formats.
+    """
+    _, reference = sr.io.load(sample('symmetries_old.hdf5'))
+    with tempfile.NamedTemporaryFile() as f:
+        sr.io.save(
+            sr.PackedSymmetryGroup.from_symmetry_group(reference),
+            f.name,
+            file_format=file_format
+        )
+        result = sr.io.load(f.name)
+    assert result.full_group == reference.full_group
+    for sym1, sym2 in zip(result.symmetries, reference.symmetries):
+        np.testing.assert_allclose(sym1.rotation_matrix, sym2.rotation_matrix)
+        np.testing.assert_allclose(sym1.repr.matrix, sym2.repr.matrix)
+
+
+def test_writer_append():
+    """
+    Test writing a symmetry group one operation at a time.
+    """
+    with tempfile.NamedTemporaryFile() as f:
+        with sr.io.SymmetryGroupWriter(f.name, full_group=True) as writer:
+            for sym in SYM_GROUP.symmetries:
+                writer.append(sym)
+            assert len(writer) == 2
+        result = sr.io.load(f.name)
+    assert result == SYM_GROUP
+
+
+def test_writer_resume():
+    """
+    Test that writing a symmetry group can be resumed after an interruption,
+    discarding incompletely written operations.
+    """
+    with tempfile.NamedTemporaryFile() as f:
+        with sr.io.SymmetryGroupWriter(f.name, full_group=True) as writer:
+            writer.append(SYM_OP)
+        # simulate an operation which was not completely written
+        with h5py.File(f.name, 'r+') as hdf5_handle:
+            for key in ['rotation_matrices', 'repr_matrices']:
+                hdf5_handle[key].resize(2, axis=0)
+        assert len(sr.io.load(f.name).symmetries) == 1
+
+        with sr.io.SymmetryGroupWriter(f.name, resume=True) as writer:
+            assert len(writer) == 1
+            writer.extend(SYM_GROUP.symmetries[len(writer):])
+        result = sr.io.load(f.name)
+    assert result == SYM_GROUP
+
+
+def test_writer_resume_append_to_saved():
+    """
+    Test appending to a group saved in packed format.
+    """
+    with tempfile.NamedTemporaryFile() as f:
+        sr.io.save(
+            sr.SymmetryGroup(symmetries=[SYM_OP], full_group=True),
+            f.name,
+            file_format='packed'
+        )
+        with sr.io.SymmetryGroupWriter(f.name, resume=True) as writer:
+            writer.append(SYM_OP)
+        result = sr.io.load(f.name)
+    assert result == SYM_GROUP
+
+
+def test_save_stream():
+    """
+    Test saving symmetry operations from a generator.
+    """
+    with tempfile.NamedTemporaryFile() as f:
+        num_written = sr.io.save_stream((sym for sym in SYM_GROUP.symmetries),
+                                        f.name,
+                                        full_group=True)
+        result = sr.io.load(f.name)
+    assert num_written == 2
+    assert result == SYM_GROUP
+
+
+@pytest.mark.parametrize('dense', [True, False])
+def test_save_load_blocks(sample, dense):
+    """
+    Test saving and loading a symmetry group in the de-duplicated block format,
+    and that the file is smaller than in the packed format.
+    """
+    _, reference = sr.io.load(sample('symmetries.hdf5'))
+    with tempfile.TemporaryDirectory() as dirname:
+        blocks_file = os.path.join(dirname, 'blocks.hdf5')
+        packed_file = os.path.join(dirname, 'packed.hdf5')
+        sr.io.save(reference, blocks_file, file_format='blocks')
+        sr.io.save(reference, packed_file, file_format='packed')
+        assert os.path.getsize(blocks_file) < os.path.getsize(packed_file)
+        result = sr.io.load(blocks_file, dense=dense)
+    assert isinstance(result, sr.PackedSymmetryGroup)
+    if not dense:
+        assert all(
+            isinstance(matrix, sr.BlockPermutationMatrix)
+            for matrix in result.repr_matrices
+        )
+    assert result.full_group == reference.full_group
+    for sym1, sym2 in zip(result.symmetries, reference.symmetries):
+        assert sym1.real_space_operator == sym2.real_space_operator
+        assert sym1.repr.has_cc == sym2.repr.has_cc
+        np.testing.assert_allclose(
+            sym1.repr.matrix, sym2.repr.matrix, atol=1e-12
+        )
+
+
+def test_save_load_shared_block_table(sample):
+    """
+    Test saving symmetry groups with a shared block table, such that blocks
+    which repeat across files are stored only once.
+    """
+    _, reference = sr.io.load(sample('symmetries.hdf5'))
+    with tempfile.TemporaryDirectory() as dirname:
+        table_file = os.path.join(dirname, 'table.hdf5')
+        group_files = [
+            os.path.join(dirname, name)
+            for name in ['group1.hdf5', 'group2.hdf5']
+        ]
+        for file_path in group_files:
+            sr.io.save(
+                reference,
+                file_path,
+                file_format='blocks',
+                block_table=table_file
+            )
+        with h5py.File(group_files[0], 'r') as hdf5_handle:
+            num_blocks = len(hdf5_handle['block_hashes'])
+            assert 'block_data' not in hdf5_handle
+        with h5py.File(table_file, 'r') as table_handle:
+            assert len(table_handle['block_hashes']) == num_blocks
+        results = [sr.io.load(file_path) for file_path in group_files]
+    for result in results:
+        assert result.full_group == reference.full_group
+        for sym1, sym2 in zip(result.symmetries, reference.symmetries):
+            assert sym1.real_space_operator == sym2.real_space_operator
+            np.testing.assert_allclose(
+                sym1.repr.matrix, sym2.repr.matrix, atol=1e-12
+            )
+
+
+def test_shared_block_table_invalid(sample):
+    """
+    Test that a shared block table which does not match the symmetry group
+    file, or which is not a block table, raises an error.
+    """
+    _, reference = sr.io.load(sample('symmetries.hdf5'))
+    with tempfile.TemporaryDirectory() as dirname:
+        table_file = os.path.join(dirname, 'table.hdf5')
+        group_file = os.path.join(dirname, 'group.hdf5')
+        with pytest.raises(ValueError):
+            sr.io.save(reference, group_file, block_table=table_file)
+        sr.io.save(
+            reference,
+            group_file,
+            file_format='blocks',
+            block_table=table_file
+        )
+        with h5py.File(table_file, 'r+') as table_handle:
+            table_handle['block_hashes'][0] = b'0' * 40
+        with pytest.raises(ValueError):
+            sr.io.load(group_file)
+        sr.io.save(reference, table_file, file_format='packed')
+        with pytest.raises(ValueError):
+            sr.io.load(group_file)
+
+
+def test_save_load_packed_analytic():
+    """
+    Test saving and loading an analytic symmetry group in packed format,
+    including entries which are stored as strings.
+    """
+    sym_op_irrational = sr.SymmetryOperation(
+        rotation_matrix=sp.Matrix([[0, -1, 0], [1, 0, 0], [0, 0, 1]]),
+        translation_vector=sp.Matrix([sp.Rational(1, 2), 0, 0]),
+        repr_matrix=sp.Matrix([[1 + sp.I, 1 - sp.I], [1 - sp.I, 1 + sp.I]]) /
+        2,
+    )
+    sym_op_fallback = sr.SymmetryOperation(
+        rotation_matrix=sp.eye(3),
+        repr_matrix=sp.Matrix([[sp.exp(sp.I * sp.pi / 5), 0],
+                               [0, sp.sqrt(6) / 6 + sp.sqrt(30) * sp.I / 6]]),
+    )
+    sym_op_cc = sr.SymmetryOperation(
+        rotation_matrix=-sp.eye(3),
+        repr_matrix=sp.Matrix([[0, sp.I], [sp.I, 0]]),
+        repr_has_cc=True
+    )
+    group = sr.SymmetryGroup(
+        symmetries=[sym_op_cc, sym_op_irrational, sym_op_fallback],
+        full_group=False
+    )
+    with tempfile.NamedTemporaryFile() as f:
+        sr.io.save(group, f.name, file_format='packed')
+        result = sr.io.load(f.name)
+    assert not result.numeric
+    assert result.full_group == group.full_group
+    for sym1, sym2 in zip(result.symmetries, group.symmetries):
+        assert not sym1.numeric
+        assert sym1.real_space_operator == sym2.real_space_operator
+        assert sym1.repr.has_cc == sym2.repr.has_cc
+        assert sym1.repr.matrix == sym2.repr.matrix
+
+
+def test_save_load_snapshot(sample):
+    """
+    Test saving and loading a symmetry group in the memory-mapped snapshot
+    format.
+    """
+    _, reference = sr.io.load(sample('symmetries.hdf5'))
+    with tempfile.NamedTemporaryFile() as f:
+        sr.io.save(reference, f.name, file_format='snapshot')
+        result = sr.io.load(f.name)
+        assert isinstance(result, sr.PackedSymmetryGroup)
+        assert not result.repr_matrices.flags.writeable
+        assert result.repr_matrices.ctypes.data % 64 == 0
+        assert result == reference
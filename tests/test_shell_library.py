@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the library of precomputed shell blocks.
+"""
+
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose
+import sympy as sp
+
+import symmetry_representation as sr
+from symmetry_representation._get_repr_matrix import _get_repr_matrix
+from symmetry_representation._get_repr_matrix._shell_library import (
+    get_shell_library, get_rotation_id, get_standard_rotations,
+    compute_shell_block
+)
+
+ROTATION_C6Z = sp.Matrix([[sp.Rational(1, 2), -sp.sqrt(3) / 2, 0],
+                          [sp.sqrt(3) / 2,
+                           sp.Rational(1, 2), 0], [0, 0, 1]])
+ROTATION_C4Z = sp.Matrix([[0, -1, 0], [1, 0, 0], [0, 0, 1]])
+ROTATION_C2Z = sp.diag(-1, -1, 1)
+
+
+def test_rotation_id():
+    """
+    Test the identifiers of standard and non-standard rotations.
+    """
+    rotations = get_standard_rotations()
+    assert len(rotations) == 64
+    assert get_rotation_id(ROTATION_C6Z) == get_rotation_id(
+        np.array(ROTATION_C6Z).astype(float)
+    )
+    assert get_rotation_id(ROTATION_C6Z) in rotations
+    assert get_rotation_id([[0.6, -0.8, 0], [0.8, 0.6, 0], [0, 0, 1]]) is None
+    assert get_rotation_id(sp.Matrix([[sp.Symbol('a')]])) is None
+
+
+@pytest.mark.parametrize('shell', ['p', 'sp2', 'f'])
+def test_library_up_to_date(shell):
+    """
+    Test that the blocks stored in the library match the computed blocks.
+    """
+    library = get_shell_library()
+    functions = [
+        sp.sympify(function) for function in sr.WANNIER_ORBITALS[shell]
+    ]
+    for rotation_id, rot in get_standard_rotations().items():
+        block = compute_shell_block(sr.WANNIER_ORBITALS[shell], rot)
+        for numeric in [True, False]:
+            columns = [
+                column for shell_functions, column in library.
+                iter_columns(functions[0], rotation_id, numeric=numeric)
+                if list(shell_functions) == functions
+            ]
+            if block is None:
+                assert not columns
+                continue
+            column, = columns
+            if numeric:
+                assert_allclose(
+                    column,
+                    np.array(block[:, 0]).astype(complex).ravel()
+                )
+            else:
+                assert list(column) == list(block[:, 0])
+
+
+@pytest.mark.parametrize(
+    'shell, rotation_matrix', [('p', ROTATION_C6Z), ('sp2', ROTATION_C6Z),
+                               ('d', ROTATION_C4Z), ('f', ROTATION_C4Z),
+                               ('sp3', ROTATION_C2Z)]
+)
+def test_library_matches_computation(
+    shell, rotation_matrix, numeric, monkeypatch
+):
+    """
+    Test that the representation matrices created from the library are the
+    same as those computed without it.
+    """
+    orbitals = [
+        sr.Orbital(position=(0, 0, 0), function_string=fct, spin=spin)
+        for spin in (sr.SPIN_UP, sr.SPIN_DOWN)
+        for fct in sr.WANNIER_ORBITALS[shell]
+    ]
+    if numeric:
+        rot = np.array(rotation_matrix).astype(float)
+    else:
+        rot = rotation_matrix
+
+    def get_repr_matrix():
+        return sr.get_repr_matrix(
+            orbitals=orbitals,
+            real_space_operator=sr.RealSpaceOperator(
+                rotation_matrix=np.eye(3), numeric=numeric
+            ),
+            rotation_matrix_cartesian=rot,
+            numeric=numeric
+        )
+
+    with sr.Profiler() as profiler:
+        result = get_repr_matrix()
+    assert profiler.counters['repr_matrix.shell_library.hits'] == len(orbitals)
+    monkeypatch.setattr(_get_repr_matrix, 'get_rotation_id', lambda rot: None)
+    reference = get_repr_matrix()
+    assert_allclose(
+        np.array(result).astype(complex),
+        np.array(reference).astype(complex),
+        atol=1e-12
+    )
+    if not numeric:
+        assert (result - reference).applyfunc(sp.simplify
+                                              ) == sp.zeros(*result.shape)
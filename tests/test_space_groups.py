@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the tabulated space-group operations.
+"""
+
+import pytest
+import numpy as np
+
+import symmetry_representation as sr
+
+LATTICE_FCC = [[0., 3.029, 3.029], [3.029, 0., 3.029], [3.029, 3.029, 0.]]
+LATTICE_HEXAGONAL = [[3., 0., 0.], [-1.5, 1.5 * np.sqrt(3), 0.], [0., 0., 5.]]
+
+
+def _get_key(rotation_matrix, translation_vector):
+    return (
+        tuple(
+            np.round(np.array(rotation_matrix).astype(float)
+                     ).astype(int).ravel()
+        ),
+        tuple(
+            np.
+            round(np.array(translation_vector).astype(float).ravel() % 1, 6) %
+            1
+        )
+    )
+
+
+def _get_keys(rotations, translations):
+    return {
+        _get_key(rot, trans)
+        for rot, trans in zip(rotations, translations)
+    }
+
+
+def _get_operator_keys(real_space_operators):
+    return _get_keys([op.rotation_matrix for op in real_space_operators],
+                     [op.translation_vector for op in real_space_operators])
+
+
+@pytest.mark.parametrize('number', [1, 14, 166, 194, 216, 227, 230])
+def test_tables(number):
+    """
+    Test that the tabulated operations match those of spglib.
+    """
+    spglib = pytest.importorskip('spglib')
+    settings = sr.get_space_group_settings(number)
+    hall_numbers = [
+        hall_number for hall_number in range(1, 531)
+        if spglib.get_spacegroup_type(hall_number).number == number
+    ]
+    assert len(settings) == len(hall_numbers)
+    for setting, hall_number in zip(settings, hall_numbers):
+        assert setting == spglib.get_spacegroup_type(hall_number).choice
+        reference = spglib.get_symmetry_from_database(hall_number)
+        assert _get_operator_keys(
+            sr.get_space_group_operations(number, setting=setting)
+        ) == _get_keys(reference['rotations'], reference['translations'])
+
+
+def test_invalid_number_or_setting():
+    """
+    Test that invalid space group numbers and settings raise an error.
+    """
+    with pytest.raises(ValueError):
+        sr.get_space_group_settings(231)
+    with pytest.raises(ValueError):
+        sr.get_space_group_operations(227, setting='H')
+
+
+@pytest.mark.parametrize('shift', [0, 0.13, [0.1, 0.7, 0.35]])
+def test_align_zincblende(shift):
+    """
+    Test that the operations of the zincblende structure in its primitive
+    cell are found for an arbitrary origin.
+    """
+    positions = np.array([[0, 0, 0], [0.25, 0.25, 0.25]]) + shift
+    alignment = sr.align_space_group(
+        216, lattice=LATTICE_FCC, positions=positions, species=['In', 'As']
+    )
+    assert len(alignment.real_space_operators) == 24
+    for op in alignment.real_space_operators:
+        new_positions = (
+            positions @ op.rotation_matrix.T + op.translation_vector -
+            positions
+        )
+        assert np.allclose(new_positions, np.round(new_positions))
+    lattice = np.array(LATTICE_FCC)
+    for op, rot_cart in zip(
+        alignment.real_space_operators, alignment.rotation_matrices_cartesian
+    ):
+        assert np.allclose(rot_cart @ rot_cart.T, np.eye(3))
+        assert np.allclose(
+            lattice @ rot_cart.T, op.rotation_matrix.T @ lattice
+        )
+
+
+def test_align_polar():
+    """
+    Test the alignment of a polar space group (wurtzite), where the origin
+    along the polar axis is arbitrary.
+    """
+    positions = np.array([[1 / 3, 2 / 3, 0], [2 / 3, 1 / 3, 0.5],
+                          [1 / 3, 2 / 3, 0.375], [2 / 3, 1 / 3, 0.875]]
+                         ) + [0.1, 0.2, 0.31]
+    alignment = sr.align_space_group(
+        186,
+        lattice=LATTICE_HEXAGONAL,
+        positions=positions,
+        species=['Ga', 'Ga', 'N', 'N']
+    )
+    assert len(alignment.real_space_operators) == 12
+
+
+def test_align_setting():
+    """
+    Test that the origin choice of a space group is found.
+    """
+    base = np.array([[0, 0, 0], [0, 0.5, 0.5], [0.5, 0, 0.5], [0.5, 0.5, 0]])
+    positions = np.concatenate([base, base + 0.25])
+    alignment = sr.align_space_group(
+        227, lattice=np.eye(3) * 5, positions=positions, species=['C'] * 8
+    )
+    assert alignment.setting == '1'
+    assert len(alignment.real_space_operators) == 192
+
+
+def test_align_mismatch():
+    """
+    Test that aligning a structure to a space group which it does not have
+    raises an error.
+    """
+    with pytest.raises(ValueError):
+        sr.align_space_group(
+            225,
+            lattice=LATTICE_FCC,
+            positions=[[0, 0, 0], [0.25, 0.25, 0.25]],
+            species=['In', 'As']
+        )
+
+
+def test_space_group_symmetries(sample, numeric):
+    """
+    Test that the symmetry group created from the tables matches the
+    reference symmetry group of InAs.
+    """
+    orbitals = []
+    for spin in (sr.SPIN_UP, sr.SPIN_DOWN):
+        orbitals.extend([
+            sr.Orbital(position=(0, 0, 0), function_string=fct, spin=spin)
+            for fct in sr.WANNIER_ORBITALS['s'] + sr.WANNIER_ORBITALS['p']
+        ])
+        orbitals.extend([
+            sr.Orbital(
+                position=(0.25, 0.25, 0.25), function_string=fct, spin=spin
+            ) for fct in sr.WANNIER_ORBITALS['p']
+        ])
+    symmetry_group = sr.get_space_group_symmetries(
+        216, orbitals=orbitals, lattice=LATTICE_FCC, numeric=numeric
+    )
+    reference = sr.io.load(sample('symmetries_InAs.hdf5'))
+    reference_symmetries = {
+        _get_key(sym.rotation_matrix, sym.translation_vector): sym
+        for sym in reference.symmetries
+    }
+    assert len(symmetry_group.symmetries) == len(reference_symmetries)
+    for sym in symmetry_group.symmetries:
+        key = _get_key(sym.rotation_matrix, sym.translation_vector)
+        matrix = np.array(sym.repr.matrix).astype(complex)
+        reference_matrix = reference_symmetries[key].repr.matrix
+        # the spin part is defined only up to a sign
+        assert min(
+            np.max(np.abs(matrix - reference_matrix)),
+            np.max(np.abs(matrix + reference_matrix))
+        ) < 1e-10
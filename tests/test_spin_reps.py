@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the spin representation of rotations.
+"""
+
+import itertools
+
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose
+
+import symmetry_representation as sr
+from symmetry_representation._get_repr_matrix._spin_reps import (
+    _spin_reps_numeric, _spin_reps_numeric_batched
+)
+
+PAULI_MATRICES = np.array([[[0, 1], [1, 0]], [[0, -1j], [1j, 0]],
+                           [[1, 0], [0, -1]]])
+
+
+def _get_rotations():
+    """
+    Returns the cubic point group, the hexagonal point group and proper and
+    improper rotations by pi around random axes.
+    """
+    res = []
+    for permutation in itertools.permutations(range(3)):
+        for signs in itertools.product([1, -1], repeat=3):
+            rot = np.zeros((3, 3))
+            rot[range(3), permutation] = signs
+            res.append(rot)
+    c6z = np.array([[0.5, -np.sqrt(3) / 2, 0], [np.sqrt(3) / 2, 0.5, 0],
+                    [0, 0, 1]])
+    mirror_y = np.diag([1, -1, 1])
+    for k in range(6):
+        for rot in [
+            np.linalg.matrix_power(c6z, k),
+            np.linalg.matrix_power(c6z, k) @ mirror_y
+        ]:
+            res.extend([rot, -rot])
+    random_state = np.random.RandomState(42)
+    for _ in range(10):
+        axis = random_state.normal(size=3)
+        axis /= np.linalg.norm(axis)
+        rot = 2 * np.outer(axis, axis) - np.eye(3)
+        res.extend([rot, -rot])
+    return np.array(res)
+
+
+@pytest.mark.parametrize(
+    'rotation_matrix, spin_matrix', [
+        (np.eye(3), np.eye(2)),
+        (-np.eye(3), np.eye(2)),
+        (np.diag([-1, -1, 1]), np.diag([-1j, 1j])),
+        (np.diag([1, 1, -1]), np.diag([-1j, 1j])),
+        ([[0, -1, 0], [1, 0, 0], [0, 0, 1]
+          ], np.diag([1 - 1j, 1 + 1j]) / np.sqrt(2)),
+        ([[0, 1, 0], [-1, 0, 0], [0, 0, -1]
+          ], -np.diag([1 - 1j, 1 + 1j]) / np.sqrt(2)),
+    ]
+)
+def test_spin_matrix(rotation_matrix, spin_matrix):
+    """
+    Test the spin matrices, including their sign, for some simple rotations.
+    """
+    assert_allclose(
+        _spin_reps_numeric(np.array(rotation_matrix)), spin_matrix, atol=1e-12
+    )
+
+
+def test_batched():
+    """
+    Test that the spin matrices of a stack of rotations are the same as those
+    of the individual rotations, and that they rotate the spin as a
+    pseudovector.
+    """
+    rotations = _get_rotations()
+    spin_matrices = _spin_reps_numeric_batched(rotations)
+    assert spin_matrices.shape == (len(rotations), 2, 2)
+    for rot, spin_matrix in zip(rotations, spin_matrices):
+        assert_allclose(spin_matrix, _spin_reps_numeric(rot), atol=1e-14)
+        assert_allclose(
+            spin_matrix @ spin_matrix.conj().T, np.eye(2), atol=1e-12
+        )
+        assert np.isclose(np.linalg.det(spin_matrix), 1)
+        proper_rot = np.linalg.det(rot) * rot
+        for i, pauli in enumerate(PAULI_MATRICES):
+            assert_allclose(
+                spin_matrix.conj().T @ pauli @ spin_matrix,
+                np.einsum('j,jkl->kl', proper_rot[i], PAULI_MATRICES),
+                atol=1e-12
+            )
+
+
+def test_perturbed_half_turn():
+    """
+    Test that the axis of a rotation by pi is found when the rotation matrix
+    contains numerical noise.
+    """
+    rotations = _get_rotations()
+    # rotations by pi (and reflections) are the symmetric matrices, except
+    # for the identity and inversion
+    is_symmetric = np.all(
+        np.isclose(rotations, np.swapaxes(rotations, 1, 2)), axis=(1, 2)
+    )
+    is_identity = np.isclose(np.abs(np.trace(rotations, axis1=1, axis2=2)), 3)
+    half_turns = rotations[is_symmetric & ~is_identity]
+    random_state = np.random.RandomState(42)
+    perturbed = half_turns + 1e-9 * random_state.normal(size=half_turns.shape)
+    for spin_matrix, reference in zip(
+        _spin_reps_numeric_batched(perturbed),
+        _spin_reps_numeric_batched(half_turns)
+    ):
+        # the sign of the axis is not fixed for rotations by pi
+        assert np.allclose(spin_matrix, reference, atol=1e-7) or np.allclose(
+            spin_matrix, -reference, atol=1e-7
+        )
+
+
+def test_invalid_rotation():
+    """
+    Test that an error is raised for matrices which are not rotations.
+    """
+    with pytest.raises(ValueError):
+        _spin_reps_numeric_batched(np.array([np.eye(3), 2 * np.eye(3)]))
+    # the eigenvalues -0.995, -0.995 and 1.01 do not match the determinant
+    with pytest.raises(ValueError):
+        _spin_reps_numeric_batched(
+            np.diag([-1 / np.sqrt(1.01), -1 / np.sqrt(1.01), 1.01])[np.newaxis]
+        )
+
+
+def test_iter_symmetry_operations_spin():
+    """
+    Test that the representation matrices created for multiple operations at
+    once (where the spin rotations are computed together) are the same as
+    those created separately.
+    """
+    orbitals = [
+        sr.Orbital(position=(0, 0, 0), function_string=fct, spin=spin)
+        for spin in (sr.SPIN_UP, sr.SPIN_DOWN)
+        for fct in sr.WANNIER_ORBITALS['p']
+    ]
+    rotations = _get_rotations()[:48]
+    real_space_operators = [
+        sr.RealSpaceOperator(rotation_matrix=rot) for rot in rotations
+    ]
+    symmetries = list(
+        sr.iter_symmetry_operations(
+            orbitals=orbitals,
+            real_space_operators=real_space_operators,
+            rotation_matrices_cartesian=rotations,
+            numeric=True
+        )
+    )
+    for sym, rot, real_space_op in zip(
+        symmetries, rotations, real_space_operators
+    ):
+        assert_allclose(
+            sym.repr.matrix,
+            sr.get_repr_matrix(
+                orbitals=orbitals,
+                real_space_operator=real_space_op,
+                rotation_matrix_cartesian=rot,
+                numeric=True
+            ),
+            atol=1e-12
+        )
@@ -0,0 +1,346 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2017-2018, ETH Zurich, Institut fuer Theoretische Physik
+# Author: Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the symmetrization of Hamiltonians on k-point grids and of
+real-space hopping matrices.
+"""
+
+import itertools
+
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose
+
+import symmetry_representation as sr
+
+
+@pytest.fixture
+def orbitals():
+    """
+    Returns the orbitals of the InAs model.
+    """
+    res = []
+    for spin in (sr.SPIN_UP, sr.SPIN_DOWN):
+        res.extend([
+            sr.Orbital(position=(0, 0, 0), function_string=fct, spin=spin)
+            for fct in sr.WANNIER_ORBITALS['s'] + sr.WANNIER_ORBITALS['p']
+        ])
+        res.extend([
+            sr.Orbital(
+                position=(0.25, 0.25, 0.25), function_string=fct, spin=spin
+            ) for fct in sr.WANNIER_ORBITALS['p']
+        ])
+    return res
+
+
+@pytest.fixture
+def symmetry_group(sample, orbitals):  # pylint: disable=redefined-outer-name
+    """
+    Returns the symmetry group of InAs, including time-reversal.
+    """
+    time_reversal = sr.get_time_reversal(orbitals=orbitals, numeric=True)
+    symmetries = sr.io.load(sample('symmetries_InAs.hdf5')).symmetries
+    return sr.SymmetryGroup(
+        symmetries=symmetries + [time_reversal @ sym for sym in symmetries],
+        full_group=True
+    )
+
+
+@pytest.fixture
+def kpoints():
+    """
+    Returns a 4x4x4 grid of k-points.
+    """
+    return np.array(list(itertools.product(np.arange(4) / 4, repeat=3)))
+
+
+@pytest.fixture
+def hamiltonians(kpoints):  # pylint: disable=redefined-outer-name
+    """
+    Returns random Hermitian matrices on the k-point grid.
+    """
+    rng = np.random.RandomState(42)
+    matrices = rng.rand(len(kpoints), 14,
+                        14) + 1j * rng.rand(len(kpoints), 14, 14)
+    return matrices + matrices.conj().transpose(0, 2, 1)
+
+
+def test_kpoint_indices(symmetry_group, kpoints):  # pylint: disable=redefined-outer-name
+    """
+    Test the mapping of k-points by the symmetry operations.
+    """
+    indices = sr.get_kpoint_indices(kpoints, symmetry_group=symmetry_group)
+    assert indices.shape == (48, 64)
+    for sym, sym_indices in zip(symmetry_group.symmetries, indices):
+        # each k-point is mapped onto a distinct k-point
+        assert len(set(sym_indices)) == len(kpoints)
+        rotation_matrix = np.array(sym.rotation_matrix, dtype=float)
+        sign = -1 if sym.repr.has_cc else 1
+        for kpt, idx in zip(kpoints, sym_indices):
+            delta = (
+                sign * np.linalg.inv(rotation_matrix).T @ kpt - kpoints[idx]
+            )
+            assert_allclose(delta, np.round(delta), atol=1e-12)
+    with pytest.raises(ValueError):
+        sr.get_kpoint_indices(kpoints + 0.1, symmetry_group=symmetry_group)
+
+
+@pytest.mark.parametrize('chunk_size', [None, 7])
+def test_symmetrize(symmetry_group, kpoints, hamiltonians, chunk_size):  # pylint: disable=redefined-outer-name
+    """
+    Test that the symmetrized Hamiltonians are invariant under the symmetry
+    operations, and that symmetrizing again does not change them.
+    """
+    result = sr.symmetrize_hamiltonians(
+        hamiltonians,
+        kpoints=kpoints,
+        symmetry_group=symmetry_group,
+        chunk_size=chunk_size
+    )
+    assert_allclose(result, result.conj().transpose(0, 2, 1), atol=1e-12)
+    indices = sr.get_kpoint_indices(kpoints, symmetry_group=symmetry_group)
+    for sym, sym_indices in zip(symmetry_group.symmetries, indices):
+        matrix = sym.repr.matrix
+        rotated = result.conj() if sym.repr.has_cc else result
+        assert_allclose(
+            result[sym_indices],
+            matrix @ rotated @ matrix.conj().T,
+            atol=1e-12
+        )
+    assert_allclose(
+        sr.symmetrize_hamiltonians(
+            result, kpoints=kpoints, symmetry_group=symmetry_group
+        ),
+        result,
+        atol=1e-12
+    )
+
+
+def test_symmetrize_block_matrices(symmetry_group, kpoints, hamiltonians):  # pylint: disable=redefined-outer-name
+    """
+    Test that the symmetrization with block representation matrices gives
+    the same result as with dense matrices.
+    """
+    packed_group = sr.PackedSymmetryGroup.from_symmetry_group(symmetry_group)
+    block_group = sr.PackedSymmetryGroup(
+        rotation_matrices=packed_group.rotation_matrices,
+        translation_vectors=packed_group.translation_vectors,
+        repr_matrices=[
+            sr.BlockPermutationMatrix.from_dense(matrix)
+            for matrix in packed_group.repr_matrices
+        ],
+        repr_has_cc=packed_group.repr_has_cc,
+        full_group=True
+    )
+    assert_allclose(
+        sr.symmetrize_hamiltonians(
+            hamiltonians,
+            kpoints=kpoints,
+            symmetry_group=block_group,
+            chunk_size=10
+        ),
+        sr.symmetrize_hamiltonians(
+            hamiltonians, kpoints=kpoints, symmetry_group=packed_group
+        ),
+        atol=1e-12
+    )
+
+
+def test_symmetrize_invalid(symmetry_group, kpoints, hamiltonians):  # pylint: disable=redefined-outer-name
+    """
+    Test that Hamiltonians of invalid shape raise an error.
+    """
+    with pytest.raises(ValueError):
+        sr.symmetrize_hamiltonians(
+            hamiltonians[:-1], kpoints=kpoints, symmetry_group=symmetry_group
+        )
+    with pytest.raises(ValueError):
+        sr.symmetrize_hamiltonians(
+            hamiltonians[:, :-1],
+            kpoints=kpoints,
+            symmetry_group=symmetry_group
+        )
+
+
+def test_hopping_symmetrizer(symmetry_group, orbitals):  # pylint: disable=redefined-outer-name
+    """
+    Test that the symmetrized hopping matrices are invariant under the
+    symmetry operations, and that symmetrizing again does not change them.
+    """
+    lattice_vectors = np.array(list(itertools.product([-1, 0, 1], repeat=3)))
+    rng = np.random.RandomState(42)
+    hoppings = rng.rand(len(lattice_vectors), 14,
+                        14) + 1j * rng.rand(len(lattice_vectors), 14, 14)
+    # H(-R) = H(R)^dagger
+    hoppings = hoppings + hoppings[::-1].conj().transpose(0, 2, 1)
+    symmetrizer = sr.HoppingSymmetrizer(
+        symmetry_group=symmetry_group,
+        orbitals=orbitals,
+        lattice_vectors=lattice_vectors
+    )
+    new_lattice_vectors = symmetrizer.lattice_vectors
+    assert_allclose(
+        new_lattice_vectors[:len(lattice_vectors)], lattice_vectors
+    )
+    assert len(new_lattice_vectors) > len(lattice_vectors)
+    result = symmetrizer.symmetrize(hoppings)
+    assert result.shape == (len(new_lattice_vectors), 14, 14)
+    vector_indices = {
+        tuple(vec): idx
+        for idx, vec in enumerate(new_lattice_vectors)
+    }
+    negative_indices = [
+        vector_indices[tuple(-vec)] for vec in new_lattice_vectors
+    ]
+    assert_allclose(
+        result, result[negative_indices].conj().transpose(0, 2, 1), atol=1e-12
+    )
+
+    # check the invariance explicitly for a few symmetries, by mapping the
+    # positions of the orbitals
+    positions = np.array([orbital.position for orbital in orbitals])
+    for sym in symmetry_group.symmetries[::16]:
+        matrix = sym.repr.matrix
+        rotation_matrix = np.array(sym.rotation_matrix, dtype=float)
+        source = np.argmax(np.abs(matrix), axis=1)
+        shifts = np.round(
+            positions[source] @ rotation_matrix.T +
+            np.array(sym.translation_vector, dtype=float).ravel() - positions
+        ).astype(int)
+        for vec, hopping in zip(new_lattice_vectors, result):
+            rotated = matrix @ (
+                hopping.conj() if sym.repr.has_cc else hopping
+            ) @ matrix.conj().T
+            for row, col in itertools.product(range(14), repeat=2):
+                new_vec = tuple(
+                    np.round(rotation_matrix @ vec).astype(int) + shifts[col] -
+                    shifts[row]
+                )
+                if new_vec in vector_indices:
+                    assert np.isclose(
+                        result[vector_indices[new_vec], row, col], rotated[row,
+                                                                           col]
+                    )
+                else:
+                    assert np.isclose(rotated[row, col], 0)
+
+    symmetrizer_again = sr.HoppingSymmetrizer(
+        symmetry_group=symmetry_group,
+        orbitals=orbitals,
+        lattice_vectors=new_lattice_vectors
+    )
+    result_again = symmetrizer_again.symmetrize(result)
+    assert_allclose(result_again[:len(result)], result, atol=1e-12)
+    assert_allclose(result_again[len(result):], 0, atol=1e-12)
+
+
+def test_hopping_symmetrizer_invalid(symmetry_group, orbitals):  # pylint: disable=redefined-outer-name
+    """
+    Test that invalid lattice vectors and hopping matrices raise an error.
+    """
+    with pytest.raises(ValueError):
+        sr.HoppingSymmetrizer(
+            symmetry_group=symmetry_group,
+            orbitals=orbitals,
+            lattice_vectors=[[0, 0, 0], [0, 0, 0]]
+        )
+    with pytest.raises(ValueError):
+        sr.HoppingSymmetrizer(
+            symmetry_group=symmetry_group,
+            orbitals=orbitals,
+            lattice_vectors=[[0, 0, 0.5]]
+        )
+    symmetrizer = sr.HoppingSymmetrizer(
+        symmetry_group=symmetry_group,
+        orbitals=orbitals,
+        lattice_vectors=[[0, 0, 0]]
+    )
+    with pytest.raises(ValueError):
+        symmetrizer.symmetrize(np.zeros((1, 13, 13)))
+
+
+@pytest.mark.parametrize('include_positions', [False, True])
+def test_bloch_phases(kpoints, include_positions):  # pylint: disable=redefined-outer-name
+    """
+    Test that the Hamiltonian of a symmetric real-space model is invariant
+    under the k-dependent representation matrices, for a structure whose
+    symmetries contain translations.
+    """
+    orbitals = []
+    for spin in (sr.SPIN_UP, sr.SPIN_DOWN):
+        for position, shell in [((0, 0, 0), 's'), ((0, 0, 0), 'p'),
+                                ((0.25, 0.25, 0.25), 'p')]:
+            orbitals.extend([
+                sr.Orbital(
+                    position=np.array(position) + 0.13,
+                    function_string=fct,
+                    spin=spin
+                ) for fct in sr.WANNIER_ORBITALS[shell]
+            ])
+    symmetries = sr.get_space_group_symmetries(
+        216,
+        orbitals=orbitals,
+        lattice=[[0., 3.029, 3.029], [3.029, 0., 3.029], [3.029, 3.029, 0.]]
+    ).symmetries
+    time_reversal = sr.get_time_reversal(orbitals=orbitals, numeric=True)
+    symmetry_group = sr.SymmetryGroup(
+        symmetries=symmetries + [time_reversal @ sym for sym in symmetries],
+        full_group=True
+    )
+    assert any(
+        np.any(np.array(sym.translation_vector, dtype=float) != 0)
+        for sym in symmetries
+    )
+
+    lattice_vectors = np.array(list(itertools.product([-1, 0, 1], repeat=3)))
+    rng = np.random.RandomState(42)
+    hoppings = rng.rand(len(lattice_vectors), 14,
+                        14) + 1j * rng.rand(len(lattice_vectors), 14, 14)
+    hoppings = hoppings + hoppings[::-1].conj().transpose(0, 2, 1)
+    symmetrizer = sr.HoppingSymmetrizer(
+        symmetry_group=symmetry_group,
+        orbitals=orbitals,
+        lattice_vectors=lattice_vectors
+    )
+    hoppings = symmetrizer.symmetrize(hoppings)
+    hamiltonians = np.einsum(
+        'kr,rij->kij',
+        np.exp(2j * np.pi * kpoints @ symmetrizer.lattice_vectors.T), hoppings
+    )
+    if include_positions:
+        positions = np.array([orbital.position for orbital in orbitals])
+        position_phases = np.exp(2j * np.pi * kpoints @ positions.T)
+        hamiltonians *= position_phases.conj()[:, :, np.newaxis]
+        hamiltonians *= position_phases[:, np.newaxis, :]
+
+    kpoint_indices, phases = sr.get_bloch_phases(
+        kpoints,
+        symmetry_group=symmetry_group,
+        orbitals=orbitals,
+        include_positions=include_positions
+    )
+    assert phases.shape == (48, len(kpoints), 14)
+    for sym, sym_indices, sym_phases in zip(
+        symmetry_group.symmetries, kpoint_indices, phases
+    ):
+        matrices = sym.repr.matrix * sym_phases[:, np.newaxis, :]
+        rotated = hamiltonians.conj() if sym.repr.has_cc else hamiltonians
+        assert_allclose(
+            hamiltonians[sym_indices],
+            matrices @ rotated @ matrices.conj().transpose(0, 2, 1),
+            atol=1e-10
+        )
+    assert_allclose(
+        sr.symmetrize_hamiltonians(
+            hamiltonians,
+            kpoints=kpoints,
+            symmetry_group=symmetry_group,
+            orbitals=orbitals,
+            include_positions=include_positions
+        ),
+        hamiltonians,
+        atol=1e-10
+    )